@@ -0,0 +1,176 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Files the program only reads (stylesheets, symptoms, postal codes), loaded once and kept in memory
+
+import os
+import json
+import hashlib
+import threading
+from storage import fileVersion, temporaryFileFor
+
+# Goes up whenever the layout of the cache file changes
+CACHE_FORMAT = 2
+
+"""
+Read a whole text file (The default way to load an asset)
+"""
+def readText(file: str):
+    with open(file, 'r') as f:
+        return f.read()
+
+"""
+A fingerprint of the program's code, so a cache written by a different version of the program is never used
+"""
+def codeVersion():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+"""
+Keeps every loaded asset with the mtime/size of the file it came from (And of the files it was built from), and
+only loads a file again when one of them changes
+"""
+class AssetRegistry:
+    def __init__(self):
+        # File to the function that loads it
+        self.loaders = {}
+        # File to the other files its asset is built from (e.g. the sites need the postal codes)
+        self.depends = {}
+        # File to (mtime/size of the file, loaded asset)
+        self.assets = {}
+        self.lock = threading.RLock()
+
+    """
+    Say how a file gets loaded, and which other files the loader reads too
+    """
+    def register(self, file: str, loader = readText, depends = ()):
+        with self.lock:
+            self.loaders[file] = loader
+            self.depends[file] = tuple(depends)
+
+    """
+    The mtime/size of a file, together with those of the files its asset is built from (If there are any)
+    """
+    def version(self, file: str):
+        with self.lock:
+            depends = self.depends.get(file, ())
+        if not depends:
+            return fileVersion(file)
+        return (fileVersion(file),) + tuple(fileVersion(i) for i in depends)
+
+    """
+    Get the asset for a file, loading it if it hasn't been loaded or the file (Or one it is built from) changed since
+    """
+    def get(self, file: str):
+        version = self.version(file)
+        with self.lock:
+            cached = self.assets.get(file)
+            loader = self.loaders.get(file, readText)
+        if cached is not None and cached[0]==version:
+            return cached[1]
+        value = loader(file)
+        with self.lock:
+            self.assets[file] = (version, value)
+        return value
+
+    """
+    Load a file again even if it didn't change
+    """
+    def reload(self, file: str):
+        with self.lock:
+            self.assets.pop(file, None)
+        return self.get(file)
+
+    """
+    Load every registered file at once, in parallel. With a cache file, anything already in the
+    cache (And unchanged since) is taken from it, and the cache is written again afterwards
+    """
+    def preload(self, cache_file: str = None):
+        if cache_file:
+            self.loadCache(cache_file)
+        # Imported here so the command line doesn't have to (It never preloads)
+        from concurrent.futures import ThreadPoolExecutor
+        with self.lock:
+            files = list(self.loaders)
+        with ThreadPoolExecutor() as pool:
+            list(pool.map(self.get, files))
+        if cache_file:
+            self.saveCache(cache_file)
+
+    """
+    Take the already loaded assets from a cache file (Entries for files that changed since are skipped). The cache is
+    plain JSON, only used if it was written by this exact version of the program
+    """
+    def loadCache(self, cache_file: str):
+        try:
+            with open(cache_file, 'r', encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            # No cache yet, or it isn't a cache
+            return
+        if not isinstance(cached, dict) or cached.get("format")!=CACHE_FORMAT or cached.get("code")!=codeVersion():
+            return
+        for file, entry in (cached.get("assets") or {}).items():
+            with self.lock:
+                loader = self.loaders.get(file)
+                if loader is None or file in self.assets:
+                    continue
+            try:
+                version = self.version(file)
+                # The cache has JSON lists where the versions have tuples
+                if json.dumps(entry["version"])!=json.dumps(version):
+                    continue
+                value = entry["data"] if loader is readText else loader(file, cached=entry["data"])
+            except (KeyError, TypeError, ValueError):
+                # Not what this program writes; the file gets loaded the normal way
+                continue
+            with self.lock:
+                self.assets.setdefault(file, (version, value))
+
+    """
+    Write every loaded asset that can be cached (Text, or anything with a toCache function whose loader takes it
+    back as cached) into one cache file, so the next start doesn't have to parse anything
+    """
+    def saveCache(self, cache_file: str):
+        with self.lock:
+            assets = dict(self.assets)
+        entries = {}
+        for file, (version, value) in assets.items():
+            if isinstance(value, str):
+                entries[file] = {"version": version, "data": value}
+            elif hasattr(value, "toCache"):
+                entries[file] = {"version": version, "data": value.toCache()}
+        handle, temp = temporaryFileFor(cache_file)
+        try:
+            with os.fdopen(handle, 'w', encoding="utf-8") as f:
+                json.dump({"format": CACHE_FORMAT, "code": codeVersion(), "assets": entries}, f, ensure_ascii=False)
+            os.replace(temp, cache_file)
+        except BaseException:
+            os.remove(temp)
+            raise
+
+# Every asset of the program
+asset_registry = AssetRegistry()
+
+"""
+Say how a file gets loaded (depends has the other files the loader reads, so the asset is loaded again when they change)
+"""
+def registerAsset(file: str, loader = readText, depends = ()):
+    asset_registry.register(file, loader, depends)
+
+"""
+Get the asset for a file (Loaded again only if the file changed)
+"""
+def getAsset(file: str):
+    return asset_registry.get(file)
+
+"""
+Load every registered asset at startup (Optionally using and writing a cache file)
+"""
+def preloadAssets(cache_file: str = None):
+    asset_registry.preload(cache_file)
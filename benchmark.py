@@ -0,0 +1,263 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Times the program's real code paths on made up data of any size (python benchmark.py --help)
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import date, datetime, timedelta
+
+# The files the program needs that aren't made up
+ASSET_FILES = ["postal_codes.csv", "main.qss", "calender.qss", "symptoms.qss", "view.qss"]
+
+"""
+Write a JSON object one key at a time, laid out exactly like writeJSONAtomic would (So big files never have to be in memory at once)
+"""
+def writeObjectStream(f, items):
+    f.write("{")
+    first = True
+    for key, value in items:
+        f.write("\n    " if first else ",\n    ")
+        f.write(json.dumps(key) + ": " + json.dumps(value, indent=4).replace("\n", "\n    "))
+        first = False
+    f.write("\n}" if not first else "}")
+
+"""
+Make up a symptoms.json with a number of symptoms split into categories; gives back every symptom name (Lower case, like the symptom page saves them)
+"""
+def generateSymptoms(file: str, symptoms: int, rng: random.Random):
+    per_category = 10
+    names = []
+    categories = []
+    for c in range((symptoms+per_category-1)//per_category):
+        category = []
+        for i in range(c*per_category, min(symptoms, (c+1)*per_category)):
+            names.append(f"symptom {i}")
+            category.append({f"symptom {i}": rng.randint(1, 10)})
+        categories.append((f"category {c}", category))
+    with open(file, 'w') as f:
+        writeObjectStream(f, categories)
+    return names
+
+"""
+Make up data.json with a number of users; gives back (username, password) of each one
+"""
+def generateUsers(file: str, users: int, postal_codes: list, rng: random.Random):
+    accounts = []
+    with open(file, 'w') as f:
+        f.write('{\n    "users": [')
+        for i in range(users):
+            username, password = f"user{i}", f"Password{i}$a"
+            user = {"First Name": f"First{i}", "Last Name": f"Last{i}", "Email Address": f"user{i}@example.com",
+                    "Phone Number": f"{4160000000+i}", "Address": f"{i} Main St",
+                    "Postal Code": rng.choice(postal_codes) + f"{rng.randint(0, 9)}A{rng.randint(0, 9)}",
+                    "Username": username, "Password": password}
+            f.write(("\n        " if i==0 else ",\n        ") + json.dumps(user, indent=4).replace("\n", "\n        "))
+            accounts.append((username, password))
+        f.write("\n    ]\n}" if users else "]\n}")
+    return accounts
+
+"""
+Make up appointments.json with a number of appointments for every user, spread over the next year
+"""
+def generateAppointments(file: str, accounts: list, appointments: int, symptoms: list, rng: random.Random):
+    today = date.today()
+    def userAppointments():
+        for username, password in accounts:
+            booked = []
+            for i in range(appointments):
+                day = today + timedelta(days=rng.randint(1, 365))
+                booked.append({"Date": day.isoformat(), "Time": f"{rng.randint(8, 16):02d}:{rng.choice([0, 15, 30, 45]):02d}",
+                               "Reasons": rng.sample(symptoms, min(len(symptoms), rng.randint(1, 3))),
+                               "ID": f"{rng.getrandbits(128):032x}"})
+            yield username, booked
+    with open(file, 'w') as f:
+        writeObjectStream(f, userAppointments())
+
+"""
+Make up every data file in a directory (With the real postal codes and stylesheets copied in)
+"""
+def generateData(directory: str, users: int, appointments: int, symptoms: int, seed: int):
+    rng = random.Random(seed)
+    source = os.path.dirname(os.path.abspath(__file__))
+    for file in ASSET_FILES:
+        shutil.copy(os.path.join(source, file), os.path.join(directory, file))
+    with open(os.path.join(directory, "postal_codes.csv"), encoding="windows-1252") as f:
+        postal_codes = [line.split("|")[0] for line in list(f)[1:] if line.strip()]
+    symptom_names = generateSymptoms(os.path.join(directory, "symptoms.json"), symptoms, rng)
+    accounts = generateUsers(os.path.join(directory, "data.json"), users, postal_codes, rng)
+    generateAppointments(os.path.join(directory, "appointments.json"), accounts, appointments, symptom_names, rng)
+    return accounts, postal_codes, symptom_names
+
+"""
+Run a function a number of times; gives back how long each run took in seconds
+"""
+def measure(function, repeat: int):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        times.append(time.perf_counter()-start)
+    return times
+
+"""
+Summarize the run times of one benchmark (In milliseconds)
+"""
+def summarize(times: list):
+    ms = sorted(i*1000 for i in times)
+    return {"runs": len(ms), "min_ms": ms[0], "median_ms": statistics.median(ms), "mean_ms": statistics.fmean(ms),
+            "p95_ms": ms[min(len(ms)-1, int(len(ms)*0.95))], "max_ms": ms[-1]}
+
+"""
+Time the code paths that don't need Qt
+"""
+def runStorageBenchmarks(results: dict, accounts: list, postal_codes: list, repeat: int, rng: random.Random):
+    from storage import getBackend, readFileJSON_Appointment
+    from validation import isValidDate, isValidTime, validateSignUp
+    from postal import isValidPostalCode
+    from triage import getSymptomCatalog
+    # The first call reads the files, so it is timed on its own
+    results["open storage"] = summarize(measure(lambda i: getBackend().getUser(accounts[0][0]), 1))
+    results["read appointments"] = summarize(measure(lambda i: readFileJSON_Appointment(rng.choice(accounts)[0]), repeat))
+    # What LogIn.logIn checks in the background
+    results["log in"] = summarize(measure(lambda i: getBackend().verifyUser(*rng.choice(accounts)), repeat))
+    results["load symptom catalog"] = summarize(measure(lambda i: getSymptomCatalog(), 1))
+    user = {"First Name": "A", "Last Name": "B", "Email Address": "a@b.ca", "Phone Number": "4165550000",
+            "Postal Code": rng.choice(postal_codes)+"1A1", "Username": "someone", "Password": "Password1$"}
+    results["validate sign up"] = summarize(measure(lambda i: validateSignUp(user), repeat))
+    results["validate date and time"] = summarize(measure(lambda i: isValidDate("2099-01-01") and isValidTime("10:30"), repeat))
+    results["postal code check"] = summarize(measure(lambda i: isValidPostalCode(rng.choice(postal_codes)+"1A1"), repeat))
+
+"""
+Time booking the way the booking page does (Each run saves a new appointment for someone, so the data grows as the
+benchmark goes)
+"""
+def runBookingBenchmarks(results: dict, accounts: list, symptoms: list, repeat: int, rng: random.Random):
+    from scheduler import bookAppointments
+    from triage import getSymptomCatalog
+    appointment = lambda: {"Date": (date.today()+timedelta(days=rng.randint(1, 60))).isoformat(), "Time": "10:00",
+                           "Reasons": rng.sample(symptoms, min(len(symptoms), 3))}
+    results["severity"] = summarize(measure(lambda i: getSymptomCatalog().highestSeverity(appointment()["Reasons"]), repeat))
+    # The first booking builds the index of taken times from every appointment
+    results["bookAppointments (first)"] = summarize(measure(lambda i: bookAppointments(rng.choice(accounts)[0], [appointment()]), 1))
+    results["bookAppointments"] = summarize(measure(lambda i: bookAppointments(rng.choice(accounts)[0], [appointment()]), repeat))
+
+"""
+Time the pages (Under the offscreen Qt platform, so no screen is needed)
+"""
+def runPageBenchmarks(results: dict, accounts: list, postal_codes: list, symptoms: list, repeat: int, rng: random.Random):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6 import QtCore, QtWidgets
+    import gui
+    from storage import getBackend
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    # Wait for the page's background tasks and deliver their results
+    def waitForTasks():
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        while gui.running_tasks:
+            app.processEvents()
+
+    def month(i):
+        data = getBackend().getUser(rng.choice(accounts)[0])
+        today = datetime.today()
+        gui.Month(f"{today.year}-{today.month}", data).deleteLater()
+    results["Month construction"] = summarize(measure(month, repeat))
+    app.processEvents()
+
+    view = gui.ViewAppointments()
+    def loadAppointments(i):
+        view.reset(getBackend().getUser(rng.choice(accounts)[0]))
+        waitForTasks()
+    results["ViewAppointments.loadAppointments"] = summarize(measure(loadAppointments, repeat))
+
+    # Each run deletes a different user's first appointment, so the data changes as the benchmark goes
+    deletes = []
+    for i in range(repeat):
+        loadAppointments(i)
+        if view.model.rowCount():
+            view.appointments.setCurrentIndex(view.model.index(0))
+            start = time.perf_counter()
+            view.deleteAppointment()
+            waitForTasks()
+            deletes.append(time.perf_counter()-start)
+    if deletes:
+        results["ViewAppointments.deleteAppointment"] = summarize(deletes)
+
+"""
+The command line arguments
+"""
+def makeParser():
+    parser = argparse.ArgumentParser(description="Time HABS on made up data")
+    parser.add_argument("--users", type=int, default=1000, help="how many users to make up (1000 by default)")
+    parser.add_argument("--appointments", type=int, default=10, help="how many appointments each user has (10 by default)")
+    parser.add_argument("--symptoms", type=int, default=40, help="how many symptoms symptoms.json has (40 by default)")
+    parser.add_argument("--repeat", type=int, default=50, help="how many times each benchmark runs (50 by default)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the made up data, so runs can be compared")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite", "sharded"], default="json", help="the storage to time")
+    parser.add_argument("--directory", help="make the data here and keep it (A temporary directory by default)")
+    parser.add_argument("--no-pages", action="store_true", help="skip the benchmarks that need Qt")
+    parser.add_argument("--output", default="benchmark_report.json", help="where to write the report")
+    return parser
+
+"""
+Make the data, time everything and write the report; gives back the exit code
+"""
+def main(argv: list = None):
+    args = makeParser().parse_args(argv)
+    output = os.path.abspath(args.output)
+    directory = args.directory or tempfile.mkdtemp(prefix="habs-benchmark-")
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    accounts, postal_codes, symptoms = generateData(directory, args.users, args.appointments, args.symptoms, args.seed)
+    generate_seconds = time.perf_counter()-start
+    if not accounts:
+        print("Error: at least 1 user is needed", file=sys.stderr)
+        return 1
+
+    # Everything opens its files relative to where it runs, so run inside the made up data
+    cwd = os.getcwd()
+    os.chdir(directory)
+    if args.storage=="journal":
+        os.environ["HABS_JOURNAL"] = "1"
+    elif args.storage=="sqlite":
+        os.environ["HABS_STORAGE"] = "sqlite"
+    elif args.storage=="sharded":
+        from storage import shardAppointments
+        shardAppointments()
+    results = {}
+    try:
+        runStorageBenchmarks(results, accounts, postal_codes, args.repeat, rng)
+        runBookingBenchmarks(results, accounts, symptoms, args.repeat, rng)
+        if not args.no_pages:
+            runPageBenchmarks(results, accounts, postal_codes, symptoms, args.repeat, rng)
+    finally:
+        from storage import getBackend
+        getBackend().close()
+        os.chdir(cwd)
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report = {"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+              "platform": platform.platform(), "config": {"users": args.users, "appointments": args.appointments,
+              "symptoms": args.symptoms, "repeat": args.repeat, "seed": args.seed, "storage": args.storage},
+              "generate_seconds": generate_seconds, "results": results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    for name in results:
+        print(f"{name:<36} median {results[name]['median_ms']:9.3f} ms   p95 {results[name]['p95_ms']:9.3f} ms")
+    print(f"Report written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Importing and exporting lots of users and appointments at once (For onboarding a clinic); no Qt
+
+import os
+import csv
+import sys
+import json
+from datetime import datetime
+from validation import validateSignUps, isValidTime
+from storage import getBackend, writeManyUsers, writeManyAppointments
+
+# The fields a user has, in the order the sign up pages save them
+USER_FIELDS = ["First Name", "Last Name", "Email Address", "Phone Number", "Address", "Postal Code", "Username", "Password"]
+
+"""
+Read records one at a time from a CSV file (With a header row) or a JSON lines file, without reading the whole file.
+Gives back (line number, record) pairs; a record with a Date is an appointment, anything else is a user
+"""
+def readRecords(file: str, format: str = None):
+    format = format or ("csv" if file.lower().endswith(".csv") else "jsonl")
+    handle = sys.stdin if file=="-" else open(file, 'r', encoding="utf-8", newline="" if format=="csv" else None)
+    try:
+        if format=="csv":
+            reader = csv.DictReader(handle)
+            for record in reader:
+                # Empty cells are left out, like a missing key in JSON
+                record = {key: value for key, value in record.items() if key is not None and value not in (None, "")}
+                if "Reasons" in record:
+                    record["Reasons"] = [i.strip() for i in record["Reasons"].split(";") if i.strip()]
+                yield reader.line_num, record
+        else:
+            for number, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield number, {"Error": f"not valid JSON ({error.msg})"}
+                    continue
+                yield number, record if isinstance(record, dict) else {"Error": "not a JSON object"}
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+"""
+Check one appointment record the way the pages would (Without looking at the storage, so it can run in another
+process); gives back ("appointment", the cleaned up record, what is wrong with it or None)
+"""
+def checkAppointmentRecord(record: dict):
+    reasons = record.get("Reasons") or []
+    if isinstance(reasons, str):
+        reasons = reasons.split(";")
+    appointment = {"Date": str(record["Date"]).strip(), "Time": str(record.get("Time", "")).strip(),
+                   "Reasons": [str(i).strip().lower() for i in reasons if str(i).strip()]}
+    if record.get("ID"):
+        appointment["ID"] = str(record["ID"])
+    if not record.get("Username"):
+        return "appointment", appointment, "no username"
+    # Old appointments can be imported too, so only the form of the date is checked (Not whether it's in the past)
+    try:
+        appointment["Date"] = datetime.strptime(appointment["Date"], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return "appointment", appointment, f"{appointment['Date']} is not a valid date"
+    if not isValidTime(appointment["Time"]):
+        return "appointment", appointment, f"{appointment['Time']} is not a valid time"
+    if not appointment["Reasons"]:
+        return "appointment", appointment, "at least 1 reason is needed"
+    return "appointment", dict(appointment, Username=str(record["Username"])), None
+
+"""
+Check a batch of records (Run in a worker process); gives back (line number, "user" or "appointment", the cleaned
+up record, what is wrong with it or None) for each one. The users' sign up details are checked all at once, one
+field at a time over the whole batch
+"""
+def checkRecords(records: list):
+    checked = []
+    # Where each user that still has to be checked is in checked
+    users = []
+    for number, record in records:
+        if "Error" in record:
+            checked.append((number, "user", record, record["Error"]))
+        elif "Date" in record:
+            checked.append((number,) + checkAppointmentRecord(record))
+        else:
+            user = {field: str(record.get(field, "")) for field in USER_FIELDS}
+            if not user["Username"] or not user["Password"]:
+                checked.append((number, "user", user, "a username and a password are needed"))
+            else:
+                users.append(len(checked))
+                checked.append((number, "user", user, None))
+    for i, result in zip(users, validateSignUps([checked[i][2] for i in users])):
+        if not result.valid:
+            checked[i] = checked[i][:3] + (result.message(),)
+    return checked
+
+"""
+Split records into lists of a size
+"""
+def batches(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch)>=size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+"""
+Check batches of records in worker processes, keeping only a few batches in flight so a huge file is never all in
+memory. Gives back the checked batches in the same order (With no workers everything is checked here instead)
+"""
+def checkInParallel(records, batch_size: int, workers: int):
+    if workers<=1:
+        for batch in batches(records, batch_size):
+            yield checkRecords(batch)
+        return
+    # Imported here so nothing is started unless there are workers
+    from concurrent.futures import ProcessPoolExecutor
+    from collections import deque
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches(records, batch_size):
+            pending.append(pool.submit(checkRecords, batch))
+            if len(pending)>=workers*2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+"""
+What an import did
+"""
+class ImportResult:
+    def __init__(self):
+        self.users = 0
+        self.appointments = 0
+        self.batches = 0
+        # (line number, what was wrong) for every record that wasn't imported
+        self.rejected = []
+
+    """
+    Note a record that wasn't imported
+    """
+    def reject(self, number: int, message: str):
+        self.rejected.append((number, message))
+
+"""
+Import users and appointments from a CSV or JSON lines file. Records are checked in worker processes, checked
+against everyone already saved (Usernames, emails and phone numbers have to be new), and saved one batch at a
+time with one write for the batch's users and one for its appointments. Appointments can be for users earlier
+in the same file
+"""
+def importRecords(file: str, format: str = None, batch_size: int = 1000, workers: int = None):
+    backend = getBackend()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    result = ImportResult()
+    # Usernames, emails and phone numbers already used in this file (The backend has everything saved before)
+    usernames, emails, phones = set(), set(), set()
+    # Every appointment ID saved or imported so far, only read if the file has IDs in it
+    ids = None
+    for checked in checkInParallel(readRecords(file, format), batch_size, workers):
+        users = []
+        # Username to the line it was on, in case it has to be rejected after all
+        user_lines = {}
+        appointments = {}
+        # Username to the lines its appointments were on, the same way
+        appointment_lines = {}
+        for number, kind, record, problem in checked:
+            if problem is not None:
+                result.reject(number, problem)
+                continue
+            if kind=="user":
+                email = record["Email Address"].strip().lower()
+                phone = "".join(c for c in record["Phone Number"] if c.isdigit())
+                if record["Username"] in usernames or backend.usernameTaken(record["Username"]):
+                    result.reject(number, f"the username {record['Username']} is taken")
+                elif email in emails or backend.emailTaken(email):
+                    result.reject(number, f"the email {record['Email Address']} is taken")
+                elif phone in phones or backend.phoneTaken(phone):
+                    result.reject(number, f"the phone number {record['Phone Number']} is taken")
+                else:
+                    usernames.add(record["Username"])
+                    emails.add(email)
+                    phones.add(phone)
+                    users.append(record)
+                    user_lines[record["Username"]] = number
+                continue
+            username = record.pop("Username")
+            if username not in usernames and not backend.usernameTaken(username):
+                result.reject(number, f"there is no user called {username}")
+                continue
+            if "ID" in record:
+                if ids is None:
+                    ids = {i["ID"] for name, saved in backend.allAppointments() for i in saved if "ID" in i}
+                if record["ID"] in ids:
+                    result.reject(number, f"there is already an appointment with the ID {record['ID']}")
+                    continue
+                ids.add(record["ID"])
+            appointments.setdefault(username, []).append(record)
+            appointment_lines.setdefault(username, []).append(number)
+        # Users first, so the batch's appointments can be for them
+        if users:
+            taken = writeManyUsers(users)
+            # Only if another program took a username since it was checked
+            for user in taken:
+                result.reject(user_lines[user["Username"]], f"the username {user['Username']} is taken")
+                for appointment, number in zip(appointments.pop(user["Username"], []), appointment_lines.get(user["Username"], [])):
+                    result.reject(number, "the user was not imported")
+                    if ids is not None:
+                        ids.discard(appointment.get("ID"))
+            result.users += len(users)-len(taken)
+        if appointments:
+            writeManyAppointments(appointments)
+            result.appointments += sum(len(i) for i in appointments.values())
+        result.batches += 1
+    return result
+
+"""
+Go through every user and then every appointment as records (The same records importRecords reads), one at a time
+"""
+def exportRecords(users = True, appointments = True):
+    backend = getBackend()
+    if users:
+        for user in backend.allUsers():
+            yield user
+    if appointments:
+        for username, user_appointments in backend.allAppointments():
+            for appointment in user_appointments:
+                yield dict({"Username": username}, **appointment)
+
+"""
+Write records as JSON lines as they come, so nothing has to be in memory all at once; gives back how many were written
+"""
+def writeJSONLines(records, file: str):
+    count = 0
+    handle = sys.stdout if file=="-" else open(file, 'w', encoding="utf-8")
+    try:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    return count
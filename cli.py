@@ -0,0 +1,281 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# The command line version of the program (python project.py --cli ...); never imports Qt so it starts fast and needs no screen
+
+import sys
+import json
+import argparse
+from validation import isValidDate, isValidTime, validateSignUp
+from scheduler import bookAppointments
+from storage import getBackend, retryTransaction, findAppointment, deleteAppointment, shardAppointments
+
+"""
+Print an error and give back the exit code for a failed command
+"""
+def fail(message: str):
+    print(f"Error: {message}", file=sys.stderr)
+    return 1
+
+"""
+Check one appointment request the same way the booking page does; gives back what is wrong with it (None if nothing)
+"""
+def checkAppointment(appointment: dict):
+    if not appointment.get("Reasons"):
+        return "at least 1 reason is needed"
+    if not isValidDate(appointment.get("Date", "")):
+        return f"{appointment.get('Date')} is not a valid date"
+    if not isValidTime(appointment.get("Time", "")):
+        return f"{appointment.get('Time')} is not a valid time"
+    return None
+
+"""
+Print where each appointment request ended up; gives back the exit code
+"""
+def printPlacements(placements: list):
+    code = 0
+    for placement in placements:
+        if placement.appointment is None:
+            print(f"{placement.username}: no free time left, pick another date")
+            code = 1
+        else:
+            merged = " (merged with an existing appointment)" if placement.merged else ""
+            print(f"{placement.username}: booked {placement.appointment['Date']} {placement.appointment['Time']}{merged}")
+    return code
+
+"""
+Book an appointment for a user
+"""
+def book(args):
+    if getBackend().getUser(args.username) is None:
+        return fail(f"there is no user called {args.username}")
+    appointment = {"Date": args.date, "Time": args.time, "Reasons": [i.lower() for i in args.reasons]}
+    problem = checkAppointment(appointment)
+    if problem is not None:
+        return fail(problem)
+    return printPlacements(bookAppointments(args.username, [appointment]))
+
+"""
+Print a user's appointments
+"""
+def listAppointments(args):
+    appointments = getBackend().getAppointments(args.username) or []
+    if args.json:
+        print(json.dumps(appointments, indent=4))
+        return 0
+    for appointment in appointments:
+        print(f"Date: {appointment['Date']}, Time: {appointment['Time']}, Reasons: {appointment['Reasons']}, ID: {appointment.get('ID')}")
+    return 0
+
+"""
+Delete an appointment by its ID, or a user's appointment on a date (And at a time, if one is given)
+"""
+def delete(args):
+    if args.id is not None:
+        found = findAppointment(args.id)
+        if found is None:
+            return fail(f"there is no appointment with the ID {args.id}")
+        deleteAppointment(args.id)
+        print(f"Deleted {found[1]['Date']} {found[1]['Time']}")
+        return 0
+    if args.username is None or args.date is None:
+        return fail("give a username and a date, or --id")
+    def deleteFrom(transaction):
+        for appointment in transaction.appointments:
+            if appointment["Date"]==args.date and (args.time is None or appointment["Time"]==args.time):
+                transaction.delete(appointment)
+                return appointment
+        transaction.rollback()
+        return None
+    appointment = retryTransaction(args.username, deleteFrom)
+    if appointment is None:
+        return fail(f"{args.username} has no appointment on {args.date}")
+    print(f"Deleted {appointment['Date']} {appointment['Time']}")
+    return 0
+
+"""
+Book every appointment request in a JSON file ([{"Username": ..., "Date": ..., "Time": ..., "Reasons": [...]}, ...]),
+with one write per user
+"""
+def importAppointments(args):
+    with open(args.file, 'r') as f:
+        requests = json.load(f)
+    by_user = {}
+    code = 0
+    for i in range(len(requests)):
+        request = requests[i]
+        username = request.get("Username")
+        appointment = {"Date": request.get("Date", ""), "Time": request.get("Time", ""), "Reasons": [r.lower() for r in request.get("Reasons", [])]}
+        problem = "there is no user with that name" if getBackend().getUser(username) is None else checkAppointment(appointment)
+        if problem is not None:
+            print(f"Request {i+1} ({username}): {problem}", file=sys.stderr)
+            code = 1
+            continue
+        by_user.setdefault(username, []).append(appointment)
+    for username in by_user:
+        code = printPlacements(bookAppointments(username, by_user[username])) or code
+    return code
+
+"""
+Check sign up details the same way the sign up pages do
+"""
+def validate(args):
+    data = {"First Name": args.first_name, "Last Name": args.last_name, "Email Address": args.email,
+            "Phone Number": args.phone, "Postal Code": args.postal_code}
+    if args.username is not None:
+        data["Username"] = args.username
+    if args.password is not None:
+        data["Password"] = args.password
+    errors = validateSignUp(data).errors
+    if args.username is not None and "Username" not in errors and getBackend().usernameTaken(args.username):
+        errors["Username"] = "Username is taken."
+    for field in errors:
+        print(f"{field}: {errors[field]}")
+    if not errors:
+        print("Valid")
+    return 1 if errors else 0
+
+"""
+Import users and appointments from a CSV or JSON lines file in batches (See bulk.py)
+"""
+def bulkImport(args):
+    # Imported here so the other commands don't have to
+    from bulk import importRecords
+    result = importRecords(args.file, args.format, args.batch, args.workers)
+    for number, problem in result.rejected:
+        print(f"Line {number}: {problem}", file=sys.stderr)
+    print(f"Imported {result.users} users and {result.appointments} appointments in {result.batches} batches ({len(result.rejected)} rejected)")
+    return 1 if result.rejected else 0
+
+"""
+Write every user and appointment to a JSON lines file (- for the screen), one record at a time
+"""
+def export(args):
+    from bulk import exportRecords, writeJSONLines
+    count = writeJSONLines(exportRecords(users=not args.appointments_only, appointments=not args.users_only), args.file)
+    if args.file!="-":
+        print(f"Exported {count} records to {args.file}")
+    return 0
+
+"""
+Split appointments.json into an appointments/ directory of buckets (Used from then on instead of appointments.json)
+"""
+def shard(args):
+    users = shardAppointments(buckets=args.buckets)
+    print(f"Moved {users} users' appointments into {args.buckets} buckets in appointments/ (appointments.json is kept as a backup)")
+    return 0
+
+"""
+Print the nearest hospital sites to a postal code
+"""
+def nearest(args):
+    from postal import nearestSites
+    found = nearestSites(args.postal_code, args.count)
+    if found is None:
+        return fail(f"{args.postal_code} is not a valid postal code")
+    if not found:
+        return fail("there are no sites in sites.json")
+    for nearby in found:
+        print(f"{nearby.site.name}: {nearby.distance:.1f} km")
+    return 0
+
+"""
+Work out the nearest site of every user at once (e.g. after a site opens or closes) and write them as JSON lines
+"""
+def assignSites(args):
+    from postal import nearestSitesMany, getSiteIndex
+    from bulk import writeJSONLines
+    if not getSiteIndex().sites:
+        return fail("there are no sites in sites.json")
+    users = [(user["Username"], user.get("Postal Code", "")) for user in getBackend().allUsers()]
+    found = nearestSitesMany([code for username, code in users], 1)
+    # Users with a postal code that isn't valid (anymore) have no site
+    counts = {}
+    def records():
+        for (username, code), nearby in zip(users, found):
+            site = nearby[0].site.name if nearby else None
+            counts[site] = counts.get(site, 0) + 1
+            yield {"Username": username, "Postal Code": code, "Site": site, "Distance": round(nearby[0].distance, 3) if nearby else None}
+    writeJSONLines(records(), args.file)
+    if args.file!="-":
+        for site in sorted(counts, key=lambda i: (i is None, i or "")):
+            print(f"{site if site is not None else 'No site (Postal code not valid)'}: {counts[site]} users")
+    return 0
+
+"""
+The command line arguments
+"""
+def makeParser():
+    parser = argparse.ArgumentParser(prog="project.py --cli", description="HABS without the window")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("book", help="book an appointment")
+    command.add_argument("username")
+    command.add_argument("date", help="YYYY-MM-DD")
+    command.add_argument("time", help="HH:MM (24h)")
+    command.add_argument("reasons", nargs="+", help="symptoms, e.g. rash nausea")
+    command.set_defaults(function=book)
+
+    command = commands.add_parser("list", help="list a user's appointments")
+    command.add_argument("username")
+    command.add_argument("--json", action="store_true", help="print them as JSON")
+    command.set_defaults(function=listAppointments)
+
+    command = commands.add_parser("delete", help="delete an appointment")
+    command.add_argument("username", nargs="?")
+    command.add_argument("date", nargs="?", help="YYYY-MM-DD")
+    command.add_argument("time", nargs="?", help="HH:MM, if the date isn't enough")
+    command.add_argument("--id", help="the appointment's ID (From list)")
+    command.set_defaults(function=delete)
+
+    command = commands.add_parser("import", help="book every appointment request in a JSON file")
+    command.add_argument("file")
+    command.set_defaults(function=importAppointments)
+
+    command = commands.add_parser("validate", help="check sign up details")
+    command.add_argument("--first-name", default="")
+    command.add_argument("--last-name", default="")
+    command.add_argument("--email", default="")
+    command.add_argument("--phone", default="")
+    command.add_argument("--postal-code", default="")
+    command.add_argument("--username")
+    command.add_argument("--password")
+    command.set_defaults(function=validate)
+
+    command = commands.add_parser("bulk-import", help="import users and appointments from a CSV or JSON lines file")
+    command.add_argument("file", help="a .csv file with a header row, or JSON lines (- to read from the keyboard)")
+    command.add_argument("--format", choices=["csv", "jsonl"], help="the file's format (From its name by default)")
+    command.add_argument("--batch", type=int, default=1000, help="records saved with each write (1000 by default)")
+    command.add_argument("--workers", type=int, help="processes that check the records (One per CPU by default, 1 for none)")
+    command.set_defaults(function=bulkImport)
+
+    command = commands.add_parser("export", help="write every user and appointment as JSON lines")
+    command.add_argument("file", help="the file to write (- for the screen)")
+    command.add_argument("--users-only", action="store_true")
+    command.add_argument("--appointments-only", action="store_true")
+    command.set_defaults(function=export)
+
+    command = commands.add_parser("shard", help="split appointments.json into one file per bucket of users")
+    command.add_argument("--buckets", type=int, default=64, help="how many bucket files to make (64 by default)")
+    command.set_defaults(function=shard)
+
+    command = commands.add_parser("nearest", help="list the nearest hospital sites (From sites.json) to a postal code")
+    command.add_argument("postal_code")
+    command.add_argument("--count", type=int, default=1, help="how many sites to list (1 by default)")
+    command.set_defaults(function=nearest)
+
+    command = commands.add_parser("assign-sites", help="write the nearest hospital site of every user as JSON lines")
+    command.add_argument("file", help="the file to write (- for the screen)")
+    command.set_defaults(function=assignSites)
+    return parser
+
+"""
+Run a command; gives back the exit code
+"""
+def main(argv: list = None):
+    args = makeParser().parse_args(argv)
+    try:
+        return args.function(args)
+    except (OSError, ValueError) as error:
+        return fail(str(error))
+    finally:
+        getBackend().close()
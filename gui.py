@@ -0,0 +1,1363 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# The program's window and every page (This is the only part of the program that uses Qt)
+
+from datetime import datetime
+from calendar import monthrange
+from collections import OrderedDict
+from PySide6 import QtCore, QtGui, QtWidgets
+from assets import registerAsset, getAsset
+from validation import isValidUsername, isValidPassword, isValidField, validateSignUp, validateAppointment
+from postal import nearestSites
+from triage import getSymptomCatalog
+from scheduler import bookAppointments, editAppointment
+from storage import writeFileJSON, readFileJSON_Appointment, getBackend, addAppointmentListener, updateCredentials, deleteAppointmentById, ConflictError
+from metrics import timed
+
+"""
+Read qss file (Kept in memory after the first time)
+"""
+def readQSS(file: str):
+    return getAsset(file)
+
+# The stylesheets are loaded with the other assets when the program starts
+for stylesheet in ["main.qss", "calender.qss", "symptoms.qss", "view.qss"]:
+    registerAsset(stylesheet)
+
+"""
+The signals a background task uses to send its result back to the GUI thread
+"""
+class TaskSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+
+"""
+Runs a function on the thread pool so reading and writing files doesn't freeze the window
+"""
+class Task(QtCore.QRunnable):
+    def __init__(self, function, *args):
+        super().__init__()
+        # Python keeps the task alive (See running_tasks), so Qt shouldn't delete it
+        self.setAutoDelete(False)
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as error:
+            self.signals.failed.emit(error)
+            return
+        self.signals.finished.emit(result)
+
+# Tasks that haven't finished yet, so they aren't garbage collected while they run
+running_tasks = set()
+
+"""
+Run a function in the background while the page shows that it's busy, then call finished with
+the result (Or failed with the error) back on the GUI thread
+"""
+def runInBackground(page: QtWidgets.QWidget, function, args = (), finished = None, failed = None):
+    # Busy state: the page can't be clicked and the cursor shows that something is happening
+    page.setEnabled(False)
+    QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+    task = Task(function, *args)
+    running_tasks.add(task)
+
+    def done():
+        running_tasks.discard(task)
+        QtWidgets.QApplication.restoreOverrideCursor()
+        page.setEnabled(True)
+
+    def onFinished(result):
+        done()
+        if finished is not None:
+            finished(result)
+
+    def onFailed(error):
+        done()
+        if failed is not None:
+            failed(error)
+        else:
+            print(f"Error: {error}")
+
+    task.signals.finished.connect(onFinished)
+    task.signals.failed.connect(onFailed)
+    QtCore.QThreadPool.globalInstance().start(task)
+    return task
+
+"""
+Checks a text field with the same check the page uses when the form is sent (See validation.FIELD_CHECKS).
+Never says Invalid, so the user can always keep typing (Half of a date isn't a date yet)
+"""
+class FieldValidator(QtGui.QValidator):
+    def __init__(self, field: str, parent: QtCore.QObject = None):
+        super().__init__(parent)
+        self.field = field
+
+    def validate(self, text: str, position: int):
+        state = QtGui.QValidator.Acceptable if isValidField(self.field, text) else QtGui.QValidator.Intermediate
+        return state, text, position
+
+"""
+Check a text field while the user types; the field's valid property (Styled in main.qss) is false while what
+is in it is wrong (An empty field isn't marked, since the user hasn't started on it)
+"""
+def validateWhileTyping(line_edit: QtWidgets.QLineEdit, field: str):
+    line_edit.setValidator(FieldValidator(field, line_edit))
+    def update(text):
+        valid = not text or line_edit.hasAcceptableInput()
+        if line_edit.property("valid")!=valid:
+            line_edit.setProperty("valid", valid)
+            # Apply the stylesheet again so the new property value is used
+            line_edit.style().unpolish(line_edit)
+            line_edit.style().polish(line_edit)
+    line_edit.textChanged.connect(update)
+
+"""
+The main window of the program; all widgets will be displayed on this window
+"""
+class Window(QtWidgets.QMainWindow):
+    """
+    Initialize the main window
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+        # Styling the pages
+        self.setStyleSheet(readQSS("main.qss"))
+        # Set window title
+        self.setWindowTitle("HABS")
+        # Set window size
+        self.setGeometry(0, 0, 800, 400)
+        # Every page is kept in the page stack, which is the main frame/widget
+        self.pages = PageStack()
+        self.setCentralWidget(self.pages)
+        # Load the first page of the program - the log in page
+        self.pages.open(LogIn)
+
+"""
+Keeps one of each page for the whole session and switches between them, instead of building a
+new page (And deleting the old one) every time the user goes somewhere
+"""
+class PageStack(QtWidgets.QStackedWidget):
+    """
+    Initialize the empty page stack
+    """
+    def __init__(self):
+        super().__init__()
+        # Page class to the one page of that class
+        self.pages = {}
+
+    """
+    Switch to a page, building it the first time. The page's reset function gets the arguments,
+    so it can show the new data and clear whatever was left on it from last time
+    """
+    @timed(labels=lambda self, page_class, *args: {"page": page_class.__name__})
+    def open(self, page_class, *args):
+        page = self.pages.get(page_class)
+        if page is None:
+            page = self.pages[page_class] = page_class()
+            self.addWidget(page)
+        page.reset(*args)
+        self.setCurrentWidget(page)
+        return page
+
+    """
+    Switch to a page that isn't one of the kept pages (The month pages are kept by the month cache)
+    """
+    @timed(labels=lambda self, page: {"page": type(page).__name__})
+    def showWidget(self, page: QtWidgets.QWidget):
+        if self.indexOf(page)==-1:
+            self.addWidget(page)
+        self.setCurrentWidget(page)
+
+"""
+The log in page of the program
+"""
+class LogIn(QtWidgets.QFrame):
+    """
+    Initialize the log in page
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Set the payout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # Different elements of the log in page
+        self.error = QtWidgets.QLabel("Username or Password is incorrect")
+        self.header = QtWidgets.QLabel("Log In", alignment=QtCore.Qt.AlignCenter)
+        self.sign_up = QtWidgets.QPushButton("Sign Up")
+        self.log_in = QtWidgets.QPushButton("Continue")
+        self.username = QtWidgets.QLineEdit(placeholderText = "Username")
+        self.password = QtWidgets.QLineEdit(placeholderText = "Password")
+        self.password.setEchoMode(QtWidgets.QLineEdit.Password)
+
+        # Add all of the elements to the log in page
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.username)
+        self.layout.addWidget(self.password)
+        self.layout.addWidget(self.log_in)
+        self.layout.addWidget(self.sign_up)
+
+        # Make the two buttons do something
+        self.sign_up.clicked.connect(self.signUp)
+        self.log_in.clicked.connect(self.logIn)
+
+    """
+    Clear the page every time it's opened
+    """
+    def reset(self):
+        self.error.setParent(None)
+        self.username.clear()
+        self.password.clear()
+
+    """
+    Changes the current page to the sign up page
+    """
+    def signUp(self):
+        # Change the displayed frame to the sign up page
+        self.parent().open(SignUp)
+    
+    """
+    Changes the current page to the dashboard of the user
+    """
+    def logIn(self):
+        # Reset the error message if it was previously displayed
+        self.error.setParent(None)
+        # Verify if the username if valid and that the password matches the username (In the background, in case the users need loading)
+        runInBackground(self, lambda username, password: getBackend().verifyUser(username, password),
+                        (self.username.text(), self.password.text()), self.loggedIn)
+
+    """
+    Go to the dashboard once the username and password were checked
+    """
+    def loggedIn(self, data: dict):
+        if data is None:
+            self.layout.addWidget(self.error)
+            return False
+        # Change the displayed frame to the dashboard, using a copy of the users data so the pages can't change the store by accident
+        self.parent().open(DashBoard, dict(data))
+
+"""
+The sign up page for the program
+"""
+class SignUp(QtWidgets.QFrame):
+    """
+    Initialize the sign up page
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Set the layout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # Create all the elements that is needed for the sign up page
+        self.header = QtWidgets.QLabel("Sign Up", alignment=QtCore.Qt.AlignCenter)
+        self.log_in = QtWidgets.QPushButton("Log In")
+        self.continu = QtWidgets.QPushButton("Continue")
+        self.first_name = QtWidgets.QLineEdit(placeholderText = "First Name")
+        self.last_name = QtWidgets.QLineEdit(placeholderText = "Last Name")
+        self.address = QtWidgets.QLineEdit(placeholderText = "Address (Number Road)")
+        self.postal_code = QtWidgets.QLineEdit(placeholderText = "Postal Code")
+        self.email_address = QtWidgets.QLineEdit(placeholderText = "Email Address")
+        self.phone_number = QtWidgets.QLineEdit(placeholderText = "Phone Number")
+        self.error_label = QtWidgets.QLabel("1 or more fields are wrong.", alignment=QtCore.Qt.AlignCenter)
+
+        # Check the fields while the user types
+        validateWhileTyping(self.first_name, "First Name")
+        validateWhileTyping(self.last_name, "Last Name")
+        validateWhileTyping(self.postal_code, "Postal Code")
+        validateWhileTyping(self.email_address, "Email Address")
+        validateWhileTyping(self.phone_number, "Phone Number")
+
+        # Add all the elements to the sign up page
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.first_name)
+        self.layout.addWidget(self.last_name)
+        self.layout.addWidget(self.address)
+        self.layout.addWidget(self.postal_code)
+        self.layout.addWidget(self.email_address)
+        self.layout.addWidget(self.phone_number)
+        self.layout.addWidget(self.continu)
+        self.layout.addWidget(self.log_in)
+
+        # Makes buttons do stuff
+        self.continu.clicked.connect(self.continuFunc)
+        self.log_in.clicked.connect(self.logIn)
+
+    """
+    Clear the page every time it's opened
+    """
+    def reset(self):
+        self.error_label.setParent(None)
+        for field in [self.first_name, self.last_name, self.address, self.postal_code, self.email_address, self.phone_number]:
+            field.clear()
+
+    """
+    Change the page to the log in page
+    """
+    def logIn(self):
+        # Set the log in page as the main page
+        self.parent().open(LogIn)
+
+    """
+    Change the page to the next sign up page
+    """
+    def continuFunc(self):
+        # Reset the error label
+        self.error_label.setText("")
+        self.error_label.setParent(None)
+        # Get all the inputed information into a variables
+        self.data = {"First Name": self.first_name.text(), "Last Name": self.last_name.text(), "Email Address": self.email_address.text(), 
+                "Phone Number": self.phone_number.text(), "Address": self.address.text(), "Postal Code": self.postal_code.text()}
+        # Check every field once, showing the error message of each field that isn't valid
+        result = validateSignUp(self.data)
+        # Exit the function and do nothing if one the checks fail
+        if not result.valid:
+            self.error_label.setText(result.message())
+            self.layout.addWidget(self.error_label)
+            return False
+        # Set the new main page to the next sign up page
+        self.parent().open(SignUp1, self.data)
+
+"""
+The next sign up page
+"""
+class SignUp1(SignUp):
+    """
+    Initialize the seconds sign up page
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Remove all previously displayed things (It inherits form SignUp, that's why)
+        self.address.setParent(None)
+        self.postal_code.setParent(None)
+        self.first_name.setParent(None)
+        self.last_name.setParent(None)
+        self.continu.setParent(None)
+        self.log_in.setParent(None)
+        self.email_address.setParent(None)
+        self.phone_number.setParent(None)
+
+        # Create all the variales and elements
+        self.data = {}
+        self.old_username = None
+        self.username = QtWidgets.QLineEdit(placeholderText = "Username")
+        self.password = QtWidgets.QLineEdit(placeholderText = "Password (8 characters, 1 number, 1 upper case, 1 special character)")
+        self.continu = QtWidgets.QPushButton("Continue")
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        validateWhileTyping(self.username, "Username")
+        validateWhileTyping(self.password, "Password")
+
+        # Add all the elements to the frame
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.username)
+        self.layout.addWidget(self.password)
+        self.layout.addWidget(self.continu)
+        self.layout.addWidget(self.cancel_btn)
+
+        # Make the button do something
+        self.continu.clicked.connect(self.continuFunc)
+        self.cancel_btn.clicked.connect(self.cancel)
+
+    """
+    Show the page for the data from the first sign up page (Or the settings page)
+    """
+    def reset(self, data: dict):
+        self.data = data
+        # If the user already has a username they came from settings and are changing their credentials
+        self.old_username = data.get("Username")
+        self.error_label.setParent(None)
+        self.username.clear()
+        self.password.clear()
+    
+    """
+    Cancel the sign up process and bring the user back to the log in page
+    """
+    def cancel(self):
+        self.parent().open(LogIn)
+
+    """
+    Go to the users dashboard
+    """
+    def continuFunc(self):
+        # Reset any error labels
+        self.error_label.setParent(None)
+        # Store the given username and password
+        self.data["Username"] = self.username.text()
+        self.data["Password"] = self.password.text()
+        # Verify the username and the password
+        if not self.verifyUsername():
+            self.error_label.setText("Username is not valid")
+            self.layout.addWidget(self.error_label)
+            return False
+        elif not self.verifyPassword():
+            self.error_label.setText("Password is not valid")
+            self.layout.addWidget(self.error_label)
+            return False
+        # Save the data
+        try:
+            if self.old_username is None:
+                writeFileJSON(self.data)
+            else:
+                updateCredentials(self.old_username, self.data["Username"], self.data["Password"])
+        except ConflictError:
+            # Someone else took the username at the same time
+            self.error_label.setText("Username is not valid")
+            self.layout.addWidget(self.error_label)
+            return False
+        # Set current window to the log in page
+        self.parent().open(LogIn)
+    
+    """
+    Verify the username
+    """
+    def verifyUsername(self):
+        # Get the given username
+        txt = self.username.text()
+        # Check if that username already exists (Keeping your own username is fine)
+        if txt!=self.old_username and getBackend().usernameTaken(txt):
+            # It exsists; invalid
+            return False
+        # Check if the username doesn't contain any special charatcers that can cause problems
+        return isValidUsername(txt)
+    
+    """
+    Verify the password
+    """
+    def verifyPassword(self):
+        # Verify the pass word - 8 characters long, 1 special character, 1 uppercase letter and 1 digit (Minimum)
+        return isValidPassword(self.password.text())
+
+"""
+The users dashboard
+"""
+class DashBoard(QtWidgets.QFrame):
+    """
+    Initialize the user's dashboard
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Set the layout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # Create all elements and variables
+        self.data = {}
+        self.header = QtWidgets.QLabel("", alignment=QtCore.Qt.AlignCenter)
+        self.user_calender = QtWidgets.QPushButton("View Appointments")
+        self.user_bookings = QtWidgets.QPushButton("Book an Appointment")
+        self.log_out = QtWidgets.QPushButton("Log Out")
+        self.settings = QtWidgets.QPushButton("Settings")
+
+        # Add all the elements to the main page
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.user_bookings)
+        self.layout.addWidget(self.user_calender)
+        self.layout.addWidget(self.settings)
+        self.layout.addWidget(self.log_out)
+
+        # Make the buttons do something
+        self.user_bookings.clicked.connect(self.bookings)
+        self.user_calender.clicked.connect(self.viewAppointments)
+        self.log_out.clicked.connect(self.logOut)
+        self.settings.clicked.connect(self.setting)
+
+    """
+    Show the dashboard for a user
+    """
+    def reset(self, data: dict):
+        self.data = data
+        self.header.setText(f"Welcome, {self.data.get('First Name')} {self.data.get('Last Name')}!")
+
+    """
+    Go to the user's settings page
+    """
+    def setting(self):
+        # Change the main window to the settings window
+        self.parent().open(Settings, self.data)
+
+    """
+    The log out function
+    """
+    def logOut(self):
+        # Change current window to the log in page
+        self.parent().open(LogIn)
+
+    """
+    The booking page for the user
+    """
+    def bookings(self):
+        # Change the main window to the booking window (With empty fields)
+        self.parent().open(Booking, self.data)
+
+    """
+    The calendar of the user
+    """
+    def viewAppointments(self):
+        # Change main frame to apointment view
+        self.parent().open(ViewAppointments, self.data)
+
+"""
+A widget to display a month
+"""
+class Month(QtWidgets.QWidget):
+    """
+    Initialize the month given
+    """
+    @timed
+    def __init__(self, date: str, data: dict):
+        super().__init__()
+
+        self.setStyleSheet(readQSS("calender.qss"))
+
+        # Set the layout of the widget
+        self.layout = QtWidgets.QGridLayout(self)
+
+        # All variables and elements
+        self.data = data
+        self.month_names = {1: "January", 2: "February", 3: "March", 4: "April", 5: "May", 6: "June", 7: "July", 
+                       8:" August", 9: "September", 10: "October", 11: "November", 12: "December"}
+        self.day_names = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+        self.days_in_month = 0
+        self.header = QtWidgets.QLabel("")
+        self.date = date.strip().split("-")
+        self.month = self.date[1]
+        self.year = self.date[0]
+
+        self.days_in_month = monthrange(int(self.year), int(self.month))
+
+        self.header.setText(f'{self.month_names.get(int(self.month))} {self.year}')
+        self.header.setAlignment(QtCore.Qt.AlignCenter)
+        self.left_btn = QtWidgets.QPushButton("<")
+        self.right_btn = QtWidgets.QPushButton(">")
+        self.back_btn = QtWidgets.QPushButton("Back")
+
+        # Add all the elements to the calender page
+        self.layout.addWidget(self.left_btn, 0, 0)
+        self.layout.addWidget(self.right_btn, 0, 6)
+        self.layout.addWidget(self.header, 0, 3)
+        for i in range(7):
+            self.layout.addWidget(QtWidgets.QLabel(self.day_names[i], alignment=QtCore.Qt.AlignCenter), 1, i)
+
+        # Make the buttons do something
+        self.left_btn.clicked.connect(self.left)
+        self.right_btn.clicked.connect(self.right)
+        self.back_btn.clicked.connect(self.back)
+
+        # Get this month's appointments once and group them by date, so each day only gets its own
+        month_str = f'{int(self.year):04d}-{int(self.month):02d}'
+        self.appointments = {}
+        for appointment in getBackend().getAppointmentsBetween(self.data["Username"], f'{month_str}-01', f'{month_str}-{self.days_in_month[1]:02d}'):
+            self.appointments.setdefault(appointment["Date"], []).append(appointment)
+
+        # Set current row
+        row = 2
+        for i in range(1, self.days_in_month[1]+1):
+            # Format the current day the loop is on
+            str = f'{self.year}-{self.month}-{i}'
+            # Create the day object with only that day's appointments
+            day = Day(str, i, self.data, self.appointments.get(f'{month_str}-{i:02d}', []))
+            # Previous day
+            pre_str = datetime(int(self.year), int(self.month), i).weekday()
+            # Check if the previous day was saturday
+            if pre_str==6:
+                # Move on to the next row
+                row += 1
+            # Add the day object to the frame
+            self.layout.addWidget(day, row, (day.day+1)%7)
+        self.layout.addWidget(self.back_btn, row+1, 3)
+
+    """
+    Move to the next month
+    """
+    def right(self):
+        # Check if the month is december
+        if int(self.month)==12:
+            # Increase the year and set the month to january
+            self.showMonth(int(self.year)+1, 1)
+        else:
+            # Increase the month by 1
+            self.showMonth(int(self.year), int(self.month)+1)
+
+    """
+    Move to the previous month
+    """
+    def left(self):
+        # Check if the month is january
+        if int(self.month)==1:
+            # Decrease the year by 1 and set the month to december
+            self.showMonth(int(self.year)-1, 12)
+        else:
+            # Decreaste the month by 1
+            self.showMonth(int(self.year), int(self.month)-1)
+
+    """
+    Change the main frame to another month; this page stays in the month cache instead of being deleted
+    """
+    def showMonth(self, year: int, month: int):
+        page = month_cache.get(self.data, year, month)
+        self.parent().showWidget(page)
+        # Build the months on either side once the new page is on screen
+        month_cache.prefetch(self.data, year, month)
+
+    """
+    Go to the user's dashboard
+    """
+    def back(self):
+        # Set the current frame to the appointments page (This month stays in the month cache)
+        self.parent().open(ViewAppointments, self.data)
+        # Resize window
+        self.window().resize(800, 400)
+
+"""
+Keeps the most recently used month pages so flipping back and forth doesn't rebuild them
+"""
+class MonthCache(QtCore.QObject):
+    # Appointments can be saved from a background thread, so the pages get thrown away through a signal on the GUI thread
+    appointments_changed = QtCore.Signal(str)
+
+    """
+    Initialize the cache with the number of month pages to keep
+    """
+    def __init__(self, size = 12):
+        super().__init__()
+        self.size = size
+        self.pages = OrderedDict()
+        # Throw away a user's pages when their appointments change
+        self.appointments_changed.connect(self.invalidate)
+        addAppointmentListener(lambda username, appointments: self.appointments_changed.emit(username))
+
+    """
+    Get the page for a user's month, building it if it isn't cached
+    """
+    def get(self, data: dict, year: int, month: int):
+        key = (data["Username"], year, month)
+        if key in self.pages:
+            self.pages.move_to_end(key)
+        else:
+            self.pages[key] = Month(f'{year}-{month}', data)
+            # Remove the least recently used pages (Unless one is on screen right now)
+            while len(self.pages)>self.size:
+                self.drop(self.pages.popitem(last=False)[1])
+        return self.pages[key]
+
+    """
+    Build the months before and after a month in the background, once the event loop is free
+    """
+    def prefetch(self, data: dict, year: int, month: int):
+        before = (year-1, 12) if month==1 else (year, month-1)
+        after = (year+1, 1) if month==12 else (year, month+1)
+        for y, m in (before, after):
+            if (data["Username"], y, m) not in self.pages:
+                QtCore.QTimer.singleShot(0, lambda y=y, m=m: self.get(data, y, m))
+
+    """
+    Forget every cached page of a user
+    """
+    def invalidate(self, username: str):
+        for key in [i for i in self.pages if i[0]==username]:
+            self.drop(self.pages.pop(key))
+
+    """
+    Delete a page that was removed from the cache, unless it is the one being shown
+    """
+    def drop(self, page):
+        stack = page.parent()
+        if stack is not None:
+            if stack.currentWidget() is page:
+                return
+            stack.removeWidget(page)
+        page.deleteLater()
+
+# The month pages of this session
+month_cache = MonthCache()
+
+"""
+The day object
+"""
+class Day(QtWidgets.QWidget):
+    """
+    Initialize a day using user data and the appointments on that day
+    """
+    def __init__(self, date: str, day_num: int, data: dict, appointments: list):
+        super().__init__()
+
+        # Set the layout of the widget
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # All variables and elements
+        self.date = ""
+        self.day_names = {0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday", 4: "Friday", 5: "Saturday", 6: "Sunday"}
+        self.data = data
+        self.date = date.strip().split("-")
+        self.day_num = day_num
+        self.day = datetime(int(self.date[0]), int(self.date[1]), self.day_num).weekday()
+        self.label = QtWidgets.QLabel(str(self.day_num), alignment=QtCore.Qt.AlignCenter)
+        self.appointments = appointments
+
+        # Add elements to the day widget
+        self.layout.addWidget(self.label)
+
+        # Highlight the day if there is an appointment on it
+        if self.appointments:
+            self.label.setStyleSheet("background-color: green;")
+
+"""
+The booking page for the user
+"""
+class Booking(QtWidgets.QFrame):
+    """
+    Initialize the object
+    """
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Set the layout
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # All variables and elements
+        self.data = {}
+        self.symptoms_selected = []
+        self.header = QtWidgets.QLabel("Book an Appointment", alignment=QtCore.Qt.AlignCenter)
+        self.site_label = QtWidgets.QLabel("", alignment=QtCore.Qt.AlignCenter)
+        self.back = QtWidgets.QPushButton("Back")
+        self.date = QtWidgets.QLineEdit(placeholderText="Prefered Date (YYYY-MM-DD)")
+        self.time = QtWidgets.QLineEdit(placeholderText="Prefered Time 24h (HH:MM)")
+        self.reason = QtWidgets.QPushButton("Reasons for Appointment")
+        self.book = QtWidgets.QPushButton("Book Appointment")
+        self.error_label = QtWidgets.QLabel("1 or more fields are wrong.", alignment=QtCore.Qt.AlignCenter)
+        validateWhileTyping(self.date, "Date")
+        validateWhileTyping(self.time, "Time")
+
+        # Add them to the frame
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.site_label)
+        self.layout.addWidget(self.date)
+        self.layout.addWidget(self.time)
+        self.layout.addWidget(self.reason)
+        self.layout.addWidget(self.book)
+        self.layout.addWidget(self.back)
+
+        # Make the buttons do stuff
+        self.book.clicked.connect(self.bookAppointment)
+        self.back.clicked.connect(self.goBack)
+        self.reason.clicked.connect(self.viewSymptoms)
+
+    """
+    Show the page for a user; parent_data ([Date, Time]) and symptoms_selected are what they
+    already filled in, when they come back from the symptom page
+    """
+    def reset(self, data: dict, parent_data: list = None, symptoms_selected: list = None):
+        self.data = data
+        self.error_label.setParent(None)
+        self.date.setText(parent_data[0] if parent_data else "")
+        self.time.setText(parent_data[1] if parent_data else "")
+        self.symptoms_selected = list(symptoms_selected or [])
+        # The hospital site closest to the user (Only if there are sites in sites.json)
+        try:
+            nearby = nearestSites(data.get("Postal Code", ""))
+        except (OSError, ValueError, KeyError, TypeError):
+            # The page still opens without the suggestion if sites.json can't be used
+            nearby = None
+        self.site_label.setText(f"Closest site: {nearby[0].site.name} ({nearby[0].distance:.1f} km)" if nearby else "")
+        self.site_label.setVisible(bool(nearby))
+
+    """
+    Open the symptom select page
+    """
+    def viewSymptoms(self):
+        self.parent().open(Symptoms, self.data, [self.date.text(), self.time.text()], self.symptoms_selected)
+
+    """
+    Go to use dashboard
+    """
+    def goBack(self):
+        # Change main frame to user dashboard
+        self.parent().open(DashBoard, self.data)
+
+    """
+    Book an appointment
+    """
+    def bookAppointment(self):
+        # Reset error label
+        self.error_label.setParent(None)
+        self.error_label.setText("1 or more fields are wrong.")
+        # Check if the fields' input are valid
+        reasons = []
+        for i in self.symptoms_selected:
+            if i:
+                reasons.append(i)
+        if self.verifyFields():
+            appointment = {
+                "Date": self.date.text(),
+                "Time": self.time.text(),
+                "Reasons": reasons
+            }
+            # Read the user's appointments once and save them with one write (Trying again if another kiosk changed them first)
+            runInBackground(self, bookAppointments, (self.data["Username"], [appointment]), self.booked, self.bookingFailed)
+        else:
+            # Error message
+            self.layout.addWidget(self.error_label)
+
+    """
+    Show why the booking didn't go through
+    """
+    def bookingFailed(self, error: Exception):
+        if isinstance(error, ConflictError):
+            self.error_label.setText("Your appointments are being changed somewhere else, please try again.")
+        # Otherwise the time isn't a real time (e.g. 25:00)
+        self.layout.addWidget(self.error_label)
+
+    """
+    Go back to the dashboard once the appointment is saved
+    """
+    def booked(self, placements: list):
+        # Every time is taken
+        if placements[0].appointment is None:
+            self.error_label.setText("There are no free times left, please pick another date.")
+            self.layout.addWidget(self.error_label)
+            return
+        # Set dashboard as main frame
+        self.parent().open(DashBoard, self.data)
+
+    """
+    Check if the fields are completed
+    """
+    def verifyFields(self):
+        # The date (Valid and not in the past), the time and the reasons, each checked once
+        return validateAppointment({"Date": self.date.text(), "Time": self.time.text(), "Reasons": self.symptoms_selected}).valid
+
+"""
+Gives the user the option to select from a list of symptoms
+"""
+class Symptoms(QtWidgets.QFrame):
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        self.setStyleSheet(readQSS("symptoms.qss"))
+
+        # Set the layout of the frame and make it scrollable
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        self.scroll_area = QtWidgets.QScrollArea()
+        self.scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.scroll_area.setWidgetResizable(True)
+
+        # Variables and elements
+        self.data = {}
+        self.parent_data = []
+        self.catalog = None
+        self.checkbox_list = []
+        self.back_btn = QtWidgets.QPushButton("Back")
+
+        # Prepare all the ckeckboxes
+        self.buildCheckboxes()
+
+        self.layout.addWidget(self.scroll_area)
+        self.layout.addWidget(self.back_btn)
+
+        # Make button do stuff
+        self.back_btn.clicked.connect(self.back)
+
+    """
+    Make a checkbox for every symptom in the catalog
+    """
+    def buildCheckboxes(self):
+        self.catalog = getSymptomCatalog()
+        self.symptom_list = self.catalog.categories
+        self.central_widget = QtWidgets.QWidget()
+        self.qvbox = QtWidgets.QVBoxLayout()
+        self.checkbox_list = []
+        for i in self.symptom_list:
+            temp = []
+            for j in self.symptom_list[i]:
+                temp.append(QtWidgets.QCheckBox(j.capitalize()))
+            self.checkbox_list.append({QtWidgets.QLabel(i.upper()): temp})
+
+        # Add all checkboxes to the main frame
+        for i in self.checkbox_list:
+            self.qvbox.addWidget(list(i.keys())[0])
+            for j in i[list(i.keys())[0]]:
+                self.qvbox.addWidget(j)
+
+        self.central_widget.setLayout(self.qvbox)
+        # The scroll area deletes the old checkboxes
+        self.scroll_area.setWidget(self.central_widget)
+
+    """
+    Show the page with the symptoms the user already selected checked
+    """
+    def reset(self, data: dict, parent_data: list, symptoms_selected: list):
+        self.data = data
+        self.parent_data = parent_data
+        # The checkboxes only have to be made again if symptoms.json changed
+        if getSymptomCatalog() is not self.catalog:
+            self.buildCheckboxes()
+        # Get previous user inputs
+        selected = set(symptoms_selected or [])
+        for i in self.checkbox_list:
+            for j in i[list(i.keys())[0]]:
+                j.setChecked(j.text().lower() in selected)
+        self.scroll_area.verticalScrollBar().setValue(0)
+
+    """
+    Go back to the booking page
+    """
+    def back(self):
+        # This is to keep all the old data they inputted
+        self.parent().open(Booking, self.data, self.parent_data, self.getChecked())
+
+    """
+    Get every selected checkbox
+    """
+    def getChecked(self):
+        checked = []
+        for i in self.checkbox_list:
+            for j in i[list(i.keys())[0]]:
+                if j.isChecked():
+                    checked.append(j.text().lower())
+        return checked
+        
+"""
+A user's appointments for the appointment list. Rows are only turned into text when the list shows
+them, and they're given to the list a page at a time, so even a very long history opens straight away
+"""
+class AppointmentModel(QtCore.QAbstractListModel):
+    # How many rows the list gets at a time (It asks for more as the user scrolls down)
+    page_size = 200
+
+    def __init__(self):
+        super().__init__()
+        # The appointments as they came from the storage
+        self.appointments = []
+        # Positions in self.appointments in the order they're shown (Sorted by date and time)
+        self.order = []
+        # How many rows the list has been given so far
+        self.loaded = 0
+        self.newest_first = False
+
+    """
+    Show a new list of appointments
+    """
+    def setAppointments(self, appointments: list):
+        self.beginResetModel()
+        self.appointments = appointments or []
+        self.sortRows()
+        self.endResetModel()
+
+    """
+    Work out the order of the rows and start again from the first page
+    """
+    def sortRows(self):
+        appointments = self.appointments
+        self.order = sorted(range(len(appointments)), key=lambda i: (appointments[i]["Date"], appointments[i]["Time"]), reverse=self.newest_first)
+        self.loaded = min(self.page_size, len(self.order))
+
+    """
+    Sort the rows by date (Qt's sort function; there is only one column)
+    """
+    def sort(self, column: int = 0, order = QtCore.Qt.AscendingOrder):
+        self.beginResetModel()
+        self.newest_first = order==QtCore.Qt.DescendingOrder
+        self.sortRows()
+        self.endResetModel()
+
+    """
+    The number of rows the list has been given
+    """
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    """
+    Check if there are rows the list hasn't been given yet
+    """
+    def canFetchMore(self, parent = QtCore.QModelIndex()):
+        return not parent.isValid() and self.loaded<len(self.order)
+
+    """
+    Give the list the next page of rows
+    """
+    def fetchMore(self, parent = QtCore.QModelIndex()):
+        count = min(self.page_size, len(self.order)-self.loaded)
+        self.beginInsertRows(QtCore.QModelIndex(), self.loaded, self.loaded+count-1)
+        self.loaded += count
+        self.endInsertRows()
+
+    """
+    The text of a row (Only made when the row is on screen)
+    """
+    def data(self, index: QtCore.QModelIndex, role = QtCore.Qt.DisplayRole):
+        if role!=QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        appointment = self.appointmentAt(index.row())
+        return f"Date: {appointment['Date']}, Time: {appointment['Time']}, Reasons: {appointment['Reasons']}"
+
+    """
+    Get the appointment in a row
+    """
+    def appointmentAt(self, row: int):
+        return self.appointments[self.order[row]]
+
+    """
+    Take a row out of the list; gives back where its appointment is, so it can be put back
+    """
+    def removeAppointment(self, row: int):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        position = self.order.pop(row)
+        self.loaded -= 1
+        self.endRemoveRows()
+        return position
+
+    """
+    Put a row taken out with removeAppointment back where it was
+    """
+    def restoreAppointment(self, row: int, position: int):
+        row = min(row, self.loaded)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.order.insert(row, position)
+        self.loaded += 1
+        self.endInsertRows()
+
+"""
+Displays all the user's appointments
+"""
+class ViewAppointments(QtWidgets.QFrame):
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        self.setStyleSheet(readQSS("view.qss"))
+
+        # Variables and elements
+        self.data = {}
+
+        # Set the layout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        self.header = QtWidgets.QLabel("Your Appointments", alignment=QtCore.Qt.AlignCenter)
+        self.back = QtWidgets.QPushButton("Back")
+        self.sort_btn = QtWidgets.QPushButton("Newest First")
+        # The list only draws the rows that are on screen, and every row is the same height so it doesn't have to measure them
+        self.model = AppointmentModel()
+        self.appointments = QtWidgets.QListView()
+        self.appointments.setUniformItemSizes(True)
+        self.appointments.setModel(self.model)
+        self.delete_appointment = QtWidgets.QPushButton("Delete Appointment")
+        self.user_calendar = QtWidgets.QPushButton("Calendar")
+        self.edit_appointment = QtWidgets.QPushButton("Edit")
+        self.error_label = QtWidgets.QLabel("No appointment selected")
+
+        # Add elements to the frame
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.sort_btn)
+        self.layout.addWidget(self.appointments)
+        self.layout.addWidget(self.delete_appointment)
+        self.layout.addWidget(self.user_calendar)
+        self.layout.addWidget(self.edit_appointment)
+        self.layout.addWidget(self.back)
+
+        # Make the buttons do things
+        self.back.clicked.connect(self.goBack)
+        self.sort_btn.clicked.connect(self.sortAppointments)
+        self.delete_appointment.clicked.connect(self.deleteAppointment)
+        self.user_calendar.clicked.connect(self.calendar)
+        self.edit_appointment.clicked.connect(self.edit)
+
+    """
+    Show a user's appointments
+    """
+    def reset(self, data: dict):
+        self.data = data
+        self.error_label.setParent(None)
+        self.model.setAppointments([])
+        # Load in all the appointments
+        self.loadAppointments()
+
+    """
+    Opens the edit page
+    """
+    def edit(self):
+        self.error_label.setParent(None)
+        selected = self.appointments.currentIndex()
+        if not selected.isValid():
+            self.error_label.setText("No appointment selected")
+            self.layout.addWidget(self.error_label)
+            return
+        self.parent().open(Edit, self.data, self.model.appointmentAt(selected.row()), [], [])
+
+    """
+    Goess back to the user's dashboard
+    """
+    def goBack(self):
+        self.parent().open(DashBoard, self.data)
+
+    """
+    Loads all of the user's appointments
+    """
+    def loadAppointments(self):
+        # Read them in the background and fill the list once they're ready
+        runInBackground(self, readFileJSON_Appointment, (self.data["Username"],), self.showAppointments)
+
+    """
+    Put the loaded appointments into the list
+    """
+    def showAppointments(self, appointments: list):
+        self.model.setAppointments(appointments)
+
+    """
+    Switch between showing the oldest and the newest appointments first
+    """
+    def sortAppointments(self):
+        newest_first = not self.model.newest_first
+        self.model.sort(0, QtCore.Qt.DescendingOrder if newest_first else QtCore.Qt.AscendingOrder)
+        self.sort_btn.setText("Oldest First" if newest_first else "Newest First")
+
+    """
+    Shows the user's appointments in the form of a calendar
+    """
+    def calendar(self):
+        today = datetime.today()
+        month = month_cache.get(self.data, today.year, today.month)
+        self.parent().showWidget(month)
+        month_cache.prefetch(self.data, today.year, today.month)
+
+    """
+    Deletes a selected appointment
+    """
+    def deleteAppointment(self):
+        self.error_label.setParent(None)
+        selected = self.appointments.currentIndex()
+        if selected.isValid():
+            row = selected.row()
+            appointment = self.model.appointmentAt(row)
+            # The row goes away straight away, and comes back if the delete doesn't go through
+            position = self.model.removeAppointment(row)
+            runInBackground(self, deleteAppointmentById, (self.data["Username"], appointment["ID"]),
+                            failed=lambda error: self.deleteFailed(row, position, error))
+
+    """
+    Put the row back and show why the appointment wasn't deleted
+    """
+    def deleteFailed(self, row: int, position: int, error: Exception):
+        self.model.restoreAppointment(row, position)
+        if isinstance(error, ConflictError):
+            self.error_label.setText("Your appointments are being changed somewhere else, please try again.")
+        else:
+            self.error_label.setText("The appointment couldn't be deleted, please try again.")
+        self.layout.addWidget(self.error_label)
+
+"""
+The symptom select page when the user wants to edit an appointment
+"""
+class Symptoms1(Symptoms):
+    @timed
+    def __init__(self):
+        super().__init__()
+        
+        # All elements and variabl
+        self.appointment = {}
+
+    """
+    Show the page for the appointment being edited
+    """
+    def reset(self, data: dict, parent_data: list, symptoms_selected: list, appointment: dict):
+        super().reset(data, parent_data, symptoms_selected)
+        self.appointment = appointment
+
+    """
+    Go back to the previous page
+    """
+    def back(self):
+        self.parent().open(Edit, self.data, self.appointment, self.getChecked(), self.parent_data)
+
+"""
+Edit page for an appointment
+"""
+class Edit(QtWidgets.QFrame):
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # Set the layout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # All elements and variables
+        self.data = {}
+        self.appointment = {}
+        self.symptoms_selected = []
+        self.error_label = QtWidgets.QLabel("1 or more fields empty")
+        self.date = QtWidgets.QLineEdit(placeholderText="Date (YY-MM-DD)")
+        self.time = QtWidgets.QLineEdit(placeholderText="Time (HH:MM)")
+        self.symptoms_btn = QtWidgets.QPushButton("Reasons")
+        self.back_btn = QtWidgets.QPushButton("Save and Back")
+        validateWhileTyping(self.date, "Date")
+        validateWhileTyping(self.time, "Time")
+
+        # Add elements to the fram
+        self.layout.addWidget(self.date)
+        self.layout.addWidget(self.time)
+        self.layout.addWidget(self.symptoms_btn)
+        self.layout.addWidget(self.back_btn)
+
+        # Make button do stuff
+        self.back_btn.clicked.connect(self.back) 
+        self.symptoms_btn.clicked.connect(self.viewSymptoms)
+
+    """
+    Show an appointment (The one from the row picked in the appointment list); parent_data ([Date, Time])
+    and symptoms are what the user already changed, when they come back from the symptom page
+    """
+    def reset(self, data: dict, appointment: dict, symptoms: list, parent_data: list):
+        self.data = data
+        self.appointment = appointment
+        self.error_label.setParent(None)
+        
+        # Fill the text edits with the appointment details
+        if parent_data:
+            self.date.setText(parent_data[0])
+            self.time.setText(parent_data[1])
+        else:
+            self.date.setText(self.appointment["Date"])
+            self.time.setText(self.appointment["Time"])
+
+        if symptoms:
+            self.symptoms_selected = symptoms
+        else:
+            self.symptoms_selected = []
+            for i in self.appointment["Reasons"]:
+                self.symptoms_selected.append(i)
+
+    """
+    Let the user select symptoms
+    """
+    def viewSymptoms(self):
+        self.parent().open(Symptoms1, self.data, [self.date.text(), self.time.text()], self.symptoms_selected, self.appointment)
+
+    """
+    Go back to the users appointment dashboard
+    """
+    def back(self):
+        # Reset error label
+        self.error_label.setParent(None)
+        self.error_label.setText("1 or more fields empty")
+
+        if self.verifyFields():
+            # Get the data from the text fields
+            appointment_date = self.date.text().split("-")
+            appointment_date = datetime(int(appointment_date[0]), int(appointment_date[1]), int(appointment_date[2])).strftime("%Y-%m-%d")
+            appointment_time = self.time.text()
+
+            # Format all data
+            new_appointment = {
+                "Date": appointment_date,
+                "Time": appointment_time,
+                "Reasons": self.symptoms_selected
+            }
+
+            # Replace the old appointment (Found by its ID) with the new appointment and save it with one write, if the new
+            # time isn't taken by someone else. The slot index is checked in the background too, since it may need building
+            runInBackground(self, editAppointment, (self.data["Username"], self.appointment, new_appointment), self.saved, self.saveFailed)
+        else:
+            # Error message
+            self.layout.addWidget(self.error_label)
+
+    """
+    Go back to the appointment list once the appointment is saved
+    """
+    def saved(self, result):
+        if not result.saved:
+            free = result.free
+            self.error_label.setText(f"That time is taken. The next free time is {free[0]} {free[1]}" if free else "That time is taken.")
+            self.layout.addWidget(self.error_label)
+            return
+        # Change the main frame
+        self.parent().open(ViewAppointments, self.data)
+
+    """
+    Show that the appointment couldn't be saved
+    """
+    def saveFailed(self, error: Exception):
+        if isinstance(error, ConflictError):
+            self.error_label.setText("Your appointments are being changed somewhere else, please try again.")
+        else:
+            self.error_label.setText("The appointment couldn't be saved, please try again.")
+        self.layout.addWidget(self.error_label)
+
+    """
+    Check if the fields are completed
+    """
+    def verifyFields(self):
+        # The date (Valid and not in the past), the time and the reasons, each checked once
+        return validateAppointment({"Date": self.date.text(), "Time": self.time.text(), "Reasons": self.symptoms_selected}).valid
+
+"""
+The user's setting page
+"""
+class Settings(QtWidgets.QFrame):
+    @timed
+    def __init__(self):
+        super().__init__()
+
+        # All elements and variables
+        self.data = {}
+        self.header = QtWidgets.QLabel("Settings", alignment=QtCore.Qt.AlignCenter)
+        self.change_credentials = QtWidgets.QPushButton("Change Username/Password")
+        self.back_btn = QtWidgets.QPushButton("Save and Back")
+
+        # Set the layout of the frame
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        # Add all elements to the frame
+        self.layout.addWidget(self.header)
+        self.layout.addWidget(self.change_credentials)
+        self.layout.addWidget(self.back_btn)
+
+        # Make buttons do stuff
+        self.change_credentials.clicked.connect(self.changeCredentials)
+        self.back_btn.clicked.connect(self.back)
+
+    """
+    Show the settings of a user
+    """
+    def reset(self, data: dict):
+        self.data = data
+    
+    """
+    Change the page to the username and password page
+    """
+    def changeCredentials(self):
+        self.parent().open(SignUp1, self.data)
+
+    """
+    Go back to the user's dashboard
+    """
+    def back(self):
+        self.parent().open(DashBoard, self.data)
+
+"""
+Start the window (Called by project.py)
+"""
+def main():
+    # Create the app
+    app = QtWidgets.QApplication([])
+    
+    # Create the main frame
+    window = Window()
+    # Show the window
+    window.show()
+
+    # Run until the user closes the window
+    return app.exec()
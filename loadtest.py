@@ -0,0 +1,315 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Pretends to be many patients using kiosks at once, to see how many one data directory can serve (python loadtest.py --help)
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import multiprocessing
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# The data files copied into the temporary directory when no directory is given
+DATA_FILES = ["data.json", "appointments.json", "symptoms.json", "postal_codes.csv"]
+
+"""
+What the patients did: how long each step took and everything that went wrong
+"""
+class LoadResult:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Step name to the seconds each time it took
+        self.latencies = {}
+        # Data that wasn't what it should have been after a step
+        self.integrity_errors = []
+        # Steps that raised an error
+        self.failures = []
+
+    """
+    Time one step of a patient
+    """
+    def step(self, name: str, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            seconds = time.perf_counter()-start
+            with self.lock:
+                self.latencies.setdefault(name, []).append(seconds)
+
+    """
+    Note that the data was wrong after a step
+    """
+    def integrityError(self, username: str, message: str):
+        with self.lock:
+            self.integrity_errors.append(f"{username}: {message}")
+
+    """
+    Note that a step raised an error
+    """
+    def failure(self, username: str, error: Exception):
+        with self.lock:
+            self.failures.append(f"{username}: {type(error).__name__}: {error}")
+
+    """
+    Add what another process's patients did
+    """
+    def merge(self, other: dict):
+        for name in other["latencies"]:
+            self.latencies.setdefault(name, []).extend(other["latencies"][name])
+        self.integrity_errors.extend(other["integrity_errors"])
+        self.failures.extend(other["failures"])
+
+    """
+    Everything in a form that can be sent between processes
+    """
+    def toDict(self):
+        return {"latencies": self.latencies, "integrity_errors": self.integrity_errors, "failures": self.failures}
+
+"""
+Sign up the way the two sign up pages do (SignUp.continuFunc then SignUp1.continuFunc)
+"""
+def signUp(patient: dict):
+    from validation import validateSignUp, isValidUsername, isValidPassword
+    from storage import getBackend, writeFileJSON
+    result = validateSignUp(patient)
+    if not result.valid:
+        raise ValueError(f"sign up details aren't valid: {result.errors}")
+    if getBackend().usernameTaken(patient["Username"]) or not isValidUsername(patient["Username"]) or not isValidPassword(patient["Password"]):
+        raise ValueError("username or password isn't valid")
+    writeFileJSON(dict(patient))
+
+"""
+Log in the way LogIn.logIn does; gives back the user's data (None if the username or password is wrong)
+"""
+def logIn(username: str, password: str):
+    from storage import getBackend
+    return getBackend().verifyUser(username, password)
+
+"""
+Book an appointment with the same calls as Booking.bookAppointment; gives back where it was placed
+"""
+def book(username: str, appointment: dict):
+    from validation import validateAppointment
+    from scheduler import bookAppointments
+    result = validateAppointment(appointment)
+    if not result.valid:
+        raise ValueError(f"appointment isn't valid: {result.errors}")
+    return bookAppointments(username, [appointment])[0]
+
+"""
+Load a user's appointments the way ViewAppointments.loadAppointments does
+"""
+def listAppointments(username: str):
+    from storage import readFileJSON_Appointment
+    return readFileJSON_Appointment(username) or []
+
+"""
+Change an appointment's reasons with the same call as Edit.back (Keeping the same date and time, so it's always saved)
+"""
+def edit(username: str, appointment: dict, reasons: list):
+    from scheduler import editAppointment
+    return editAppointment(username, appointment, {"Date": appointment["Date"], "Time": appointment["Time"], "Reasons": reasons})
+
+"""
+Delete an appointment with the same call as ViewAppointments.deleteAppointment
+"""
+def delete(username: str, appointment: dict):
+    from storage import deleteAppointmentById
+    return deleteAppointmentById(username, appointment["ID"])
+
+"""
+Make up a patient's sign up details (Unique to this run and patient number)
+"""
+def makePatient(run: str, number: int):
+    return {"First Name": "Load", "Last Name": f"Patient{number}", "Email Address": f"load{run}_{number}@example.com",
+            "Phone Number": f"9{int(run, 16)%1000:03d}{number%1000000:06d}", "Address": f"{number} Test St",
+            "Postal Code": "L6E1W7", "Username": f"load{run}_{number}", "Password": f"Load{number}$pass"}
+
+"""
+One patient's whole visit: sign up, log in, then book, list, edit, list and delete an appointment a few times,
+checking after every step that the data is what it should be
+"""
+def runPatient(result: LoadResult, patient: dict, rounds: int, symptoms: list, rng: random.Random):
+    username = patient["Username"]
+    try:
+        result.step("sign up", signUp, patient)
+        if result.step("log in", logIn, username, patient["Password"]) is None:
+            result.integrityError(username, "couldn't log in after signing up")
+            return
+        for i in range(rounds):
+            before = {a["ID"] for a in listAppointments(username)}
+            appointment = {"Date": (date.today()+timedelta(days=rng.randint(1, 60))).isoformat(),
+                           "Time": f"{rng.randint(8, 16):02d}:{rng.choice([0, 15, 30, 45]):02d}",
+                           "Reasons": rng.sample(symptoms, min(len(symptoms), 2))}
+            placement = result.step("book", book, username, appointment)
+            appointments = result.step("list", listAppointments, username)
+            new = [a for a in appointments if a.get("ID") not in before]
+            if placement.appointment is None:
+                # No free time; nothing should have been saved
+                if new:
+                    result.integrityError(username, "an appointment was saved when there was no free time")
+                continue
+            if placement.merged:
+                # Merged into an appointment already on that date, so there is nothing new to edit or delete
+                continue
+            if len(new)!=1:
+                result.integrityError(username, f"booking added {len(new)} appointments instead of 1")
+                continue
+            booked = new[0]
+            if (booked["Date"], booked["Time"])!=(placement.appointment["Date"], placement.appointment["Time"]):
+                result.integrityError(username, f"booked at {booked['Date']} {booked['Time']}, should be {placement.appointment['Date']} {placement.appointment['Time']}")
+
+            reasons = rng.sample(symptoms, min(len(symptoms), 1))
+            if not result.step("edit", edit, username, booked, reasons).saved:
+                result.integrityError(username, f"edit of {booked['ID']} at the same time wasn't saved")
+            edited = [a for a in result.step("list", listAppointments, username) if a.get("ID")==booked["ID"]]
+            if len(edited)!=1 or edited[0]["Reasons"]!=reasons or edited[0]["Date"]!=booked["Date"]:
+                result.integrityError(username, f"edit of {booked['ID']} wasn't saved right: {edited}")
+
+            result.step("delete", delete, username, booked)
+            if any(a.get("ID")==booked["ID"] for a in listAppointments(username)):
+                result.integrityError(username, f"{booked['ID']} is still there after deleting it")
+        # Whatever is left (Bookings merged into each other) still has to have IDs
+        if any(a.get("ID") is None for a in listAppointments(username)):
+            result.integrityError(username, "an appointment has no ID")
+    except Exception as error:
+        result.failure(username, error)
+
+"""
+Run some of the patients on a number of threads, each starting at its own time (So the whole run keeps to the rate)
+"""
+def runPatients(directory: str, numbers: list, run: str, threads: int, rounds: int, start: float, rate: float, seed: int):
+    os.chdir(directory)
+    from triage import getSymptomCatalog
+    from storage import getBackend
+    symptoms = sorted(getSymptomCatalog().severity) or ["rash"]
+    result = LoadResult()
+    def patient(number):
+        if rate>0:
+            delay = start + number/rate - time.time()
+            if delay>0:
+                time.sleep(delay)
+        runPatient(result, makePatient(run, number), rounds, symptoms, random.Random(seed*1000003+number))
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(patient, numbers))
+    getBackend().close()
+    return result.toDict()
+
+"""
+Check every user's appointments once the patients are done: no slot (Or day, if days have a limit) can have more
+appointments than it holds, e.g. because two kiosks booked the same time. Only slots with one of this run's
+appointments in them are checked, so old data isn't blamed on the run. Gives back a message for each one that's over
+"""
+def checkSlots(directory: str, run: str):
+    os.chdir(directory)
+    from storage import openBackend
+    from scheduler import SlotIndex
+    # A backend of its own, since the patients' one may be closed
+    backend = openBackend()
+    try:
+        slots = SlotIndex()
+        for username, appointments in backend.allAppointments():
+            slots.setUser(username, appointments)
+    finally:
+        backend.close()
+    ours = set()
+    for username in slots.user_slots:
+        if username.startswith(f"load{run}_"):
+            ours.update(slots.user_slots[username])
+    errors = []
+    for slot in sorted(ours):
+        if slots.counts[slot]>slots.slot_capacity:
+            errors.append(f"{slot:%Y-%m-%d %H:%M} is double booked ({slots.counts[slot]} appointments)")
+        elif slots.day_capacity is not None and slots.day_counts[slot.date()]>slots.day_capacity:
+            errors.append(f"{slot:%Y-%m-%d} has {slots.day_counts[slot.date()]} appointments")
+    return errors
+
+"""
+Summarize how long a step took (In milliseconds)
+"""
+def summarize(times: list):
+    ms = sorted(i*1000 for i in times)
+    percentile = lambda p: ms[min(len(ms)-1, int(len(ms)*p))]
+    return {"count": len(ms), "p50_ms": statistics.median(ms), "p99_ms": percentile(0.99), "max_ms": ms[-1]}
+
+"""
+The command line arguments
+"""
+def makeParser():
+    parser = argparse.ArgumentParser(description="Pretend to be many HABS patients at once, without a window")
+    parser.add_argument("--patients", type=int, default=100, help="how many patients to simulate (100 by default)")
+    parser.add_argument("--threads", type=int, default=8, help="patients at once in each process (8 by default)")
+    parser.add_argument("--processes", type=int, default=1, help="processes to split the patients between, like separate kiosks (1 by default)")
+    parser.add_argument("--rounds", type=int, default=3, help="book/edit/delete rounds per patient (3 by default)")
+    parser.add_argument("--rate", type=float, default=0, help="patients started per second (As fast as possible by default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", help="the data directory to use; it IS changed (A temporary copy of the data files by default)")
+    parser.add_argument("--output", help="write the report as JSON here too")
+    return parser
+
+"""
+Run the patients and print the report; gives back the exit code (1 if anything went wrong)
+"""
+def main(argv: list = None):
+    args = makeParser().parse_args(argv)
+    directory = args.directory
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="habs-load-")
+        source = os.path.dirname(os.path.abspath(__file__))
+        for file in DATA_FILES:
+            shutil.copy(os.path.join(source, file), os.path.join(directory, file))
+        if os.path.isdir(os.path.join(source, "appointments")):
+            shutil.copytree(os.path.join(source, "appointments"), os.path.join(directory, "appointments"),
+                            ignore=shutil.ignore_patterns("*.lock"))
+    directory = os.path.abspath(directory)
+    # Usernames from this run can't clash with an earlier run on the same directory
+    run = f"{random.Random().getrandbits(24):06x}"
+
+    numbers = list(range(args.patients))
+    shares = [numbers[i::args.processes] for i in range(args.processes)]
+    result = LoadResult()
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        if args.processes==1:
+            result.merge(runPatients(directory, numbers, run, args.threads, args.rounds, start, args.rate, args.seed))
+        else:
+            with multiprocessing.Pool(args.processes) as pool:
+                for part in pool.starmap(runPatients, [(directory, share, run, args.threads, args.rounds, start, args.rate, args.seed) for share in shares]):
+                    result.merge(part)
+        seconds = time.perf_counter()-started
+        for error in checkSlots(directory, run):
+            result.integrityError("all users", error)
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    operations = sum(len(i) for i in result.latencies.values())
+    report = {"patients": args.patients, "threads": args.threads, "processes": args.processes, "rounds": args.rounds,
+              "rate": args.rate, "storage": os.environ.get("HABS_STORAGE", "json"), "seconds": seconds, "operations": operations,
+              "operations_per_second": operations/seconds if seconds else 0.0, "patients_per_second": args.patients/seconds if seconds else 0.0,
+              "steps": {name: summarize(times) for name, times in result.latencies.items()},
+              "integrity_errors": len(result.integrity_errors), "failures": len(result.failures),
+              "examples": (result.integrity_errors+result.failures)[:20]}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    print(f"{args.patients} patients, {operations} steps in {seconds:.2f} s ({report['operations_per_second']:.1f} steps/s)")
+    for name, step in report["steps"].items():
+        print(f"{name:<10} {step['count']:7d}   p50 {step['p50_ms']:9.3f} ms   p99 {step['p99_ms']:9.3f} ms   max {step['max_ms']:9.3f} ms")
+    print(f"Integrity errors: {report['integrity_errors']}, failures: {report['failures']}")
+    for example in report["examples"]:
+        print(f"  {example}")
+    return 1 if result.integrity_errors or result.failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
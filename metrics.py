@@ -0,0 +1,198 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Counts and times calls to the slow parts of the program, to find out where the time goes on a kiosk
+
+import os
+import sys
+import json
+import time
+import atexit
+import bisect
+import functools
+import tempfile
+import threading
+
+# Where to write the metrics; nothing is timed unless this is set (HABS_METRICS=metrics.prom, or project.py --metrics FILE)
+METRICS_FILE = os.environ.get("HABS_METRICS")
+# The upper bound of each histogram bucket, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+"""
+The number of calls, the time they took (Bucketed) and the number that raised an error, for one function
+"""
+class Histogram:
+    def __init__(self):
+        # One more bucket than BUCKETS for anything slower (+Inf)
+        self.counts = [0]*(len(BUCKETS)+1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    """
+    Add one call that took some number of seconds
+    """
+    def observe(self, seconds: float, error = False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+"""
+Every histogram of this program, by function name and labels
+"""
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (name, ((label, value), ...)) to its histogram
+        self.histograms = {}
+
+    """
+    Add one call of a function
+    """
+    def observe(self, name: str, labels: tuple, seconds: float, error = False):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            histogram.observe(seconds, error)
+
+    """
+    Get a copy of every histogram, so they can be written out without holding the lock
+    """
+    def snapshot(self):
+        with self.lock:
+            copies = {}
+            for key, histogram in self.histograms.items():
+                copy = copies[key] = Histogram()
+                copy.counts, copy.count, copy.sum, copy.errors = list(histogram.counts), histogram.count, histogram.sum, histogram.errors
+            return copies
+
+    """
+    Forget every call
+    """
+    def clear(self):
+        with self.lock:
+            self.histograms = {}
+
+    """
+    The metrics in the Prometheus text format
+    """
+    def prometheus(self):
+        histograms = self.snapshot()
+        lines = ["# HELP habs_function_seconds Time spent in a function of the program",
+                 "# TYPE habs_function_seconds histogram"]
+        for (name, labels), histogram in sorted(histograms.items()):
+            label_text = "".join(f',{label}="{escapeLabel(value)}"' for label, value in labels)
+            series = f'function="{escapeLabel(name)}"{label_text}'
+            total = 0
+            for i in range(len(BUCKETS)):
+                total += histogram.counts[i]
+                lines.append(f'habs_function_seconds_bucket{{{series},le="{BUCKETS[i]}"}} {total}')
+            lines.append(f'habs_function_seconds_bucket{{{series},le="+Inf"}} {histogram.count}')
+            lines.append(f"habs_function_seconds_sum{{{series}}} {histogram.sum!r}")
+            lines.append(f"habs_function_seconds_count{{{series}}} {histogram.count}")
+        lines.append("# HELP habs_function_errors_total Calls to a function of the program that raised an error")
+        lines.append("# TYPE habs_function_errors_total counter")
+        for (name, labels), histogram in sorted(histograms.items()):
+            label_text = "".join(f',{label}="{escapeLabel(value)}"' for label, value in labels)
+            lines.append(f'habs_function_errors_total{{function="{escapeLabel(name)}"{label_text}}} {histogram.errors}')
+        return "\n".join(lines) + "\n"
+
+    """
+    The metrics as JSON lines, one line per function (And labels)
+    """
+    def jsonLines(self):
+        now = time.time()
+        lines = []
+        for (name, labels), histogram in sorted(self.snapshot().items()):
+            lines.append(json.dumps({"time": now, "function": name, "labels": dict(labels), "count": histogram.count,
+                                     "errors": histogram.errors, "sum_seconds": histogram.sum,
+                                     "buckets": dict(zip([str(i) for i in BUCKETS]+["+Inf"], histogram.counts))}))
+        return "".join(i+"\n" for i in lines)
+
+    """
+    Write the metrics to a file: in the Prometheus format if it ends in .prom or .txt (Replacing what was there),
+    otherwise as JSON lines added to the end, so every dump is kept
+    """
+    def dump(self, file: str):
+        if os.path.splitext(file)[1] not in (".prom", ".txt"):
+            with open(file, 'a') as f:
+                f.write(self.jsonLines())
+            return
+        text = self.prometheus()
+        # Write it next to the file and swap it in, so a scraper never reads half of it
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file)), prefix=os.path.basename(file)+".", suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write(text)
+            os.replace(temp, file)
+        except BaseException:
+            os.remove(temp)
+            raise
+
+"""
+Escape a label value for the Prometheus format
+"""
+def escapeLabel(value: str):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# The metrics of this program
+registry = Registry()
+
+"""
+Check if calls are being timed
+"""
+def metricsEnabled():
+    return METRICS_FILE is not None
+
+"""
+Time every call to a function, as @timed or @timed(name=..., labels=...). labels is a function that gets the
+same arguments and gives back a dictionary of labels (e.g. which page is being opened). When metrics are off the
+function is given back as it was, so it costs nothing
+"""
+def timed(function = None, name: str = None, labels = None):
+    if function is None:
+        return lambda function: timed(function, name, labels)
+    if METRICS_FILE is None:
+        return function
+    metric_name = name or function.__qualname__
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = function(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            label_values = tuple(sorted(labels(*args, **kwargs).items())) if labels is not None else ()
+            registry.observe(metric_name, label_values, time.perf_counter()-start, error)
+    return wrapper
+
+"""
+Write the metrics to the metrics file (If metrics are on)
+"""
+def dumpMetrics():
+    if METRICS_FILE is not None:
+        try:
+            registry.dump(METRICS_FILE)
+        except OSError as error:
+            print(f"Error: could not write the metrics to {METRICS_FILE} ({error})", file=sys.stderr)
+
+"""
+Write the metrics every few seconds (HABS_METRICS_INTERVAL), so they can be read while the program runs
+"""
+def dumpPeriodically(interval: float):
+    stop = threading.Event()
+    def run():
+        while not stop.wait(interval):
+            dumpMetrics()
+    threading.Thread(target=run, name="habs-metrics", daemon=True).start()
+    return stop
+
+if METRICS_FILE is not None:
+    # Always written when the program ends
+    atexit.register(dumpMetrics)
+    if os.environ.get("HABS_METRICS_INTERVAL"):
+        dumpPeriodically(float(os.environ["HABS_METRICS_INTERVAL"]))
@@ -0,0 +1,20 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Packages the program can use if they are installed, imported the first time they're needed
+
+# NumPy makes big batches faster (Severity scoring and nearest sites), but everything works without it. It takes
+# longer to import than a small batch takes to work out, so it's only imported for the first big batch
+numpy = None
+
+"""
+Import NumPy the first time it's needed (None if it isn't installed)
+"""
+def importNumpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            module = False
+        numpy = module
+    return numpy or None
@@ -0,0 +1,279 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# The postal code areas from postal_codes.csv, loaded once and kept in memory
+
+import csv
+import json
+import math
+import heapq
+from collections import namedtuple
+from assets import registerAsset, getAsset
+from metrics import timed
+from optional import importNumpy
+
+# Batches of nearest site lookups this big are worked out with NumPy, if it is installed
+NUMPY_BATCH = 1000
+# The mean radius of the Earth in kilometres
+EARTH_RADIUS = 6371.0088
+
+# One row of postal_codes.csv; the code is the first 3 symbols of a postal code (The FSA)
+PostalArea = namedtuple("PostalArea", ["code", "place", "province", "latitude", "longitude"])
+# One hospital site from sites.json
+Site = namedtuple("Site", ["name", "postal_code", "latitude", "longitude"])
+# A site and how far away it is in kilometres
+NearbySite = namedtuple("NearbySite", ["site", "distance"])
+
+"""
+Every postal code area by its first 3 symbols
+"""
+class PostalIndex:
+    """
+    Read the postal code file once (Or take what toCache gave back, from the asset cache)
+    """
+    def __init__(self, file = "postal_codes.csv", cached: list = None):
+        self.file = file
+        self.areas = {}
+        if cached is not None:
+            for row in cached:
+                self.areas[row[0]] = PostalArea(row[0], row[1], row[2], float(row[3]), float(row[4]))
+            return
+        with open(file, encoding="windows-1252", newline="") as f:
+            csvReader = csv.reader(f, delimiter="|")
+            # Skip the header row
+            next(csvReader, None)
+            for row in csvReader:
+                if len(row)<5:
+                    continue
+                self.areas[row[0]] = PostalArea(row[0], row[1], row[2], float(row[3]), float(row[4]))
+
+    """
+    Every area as plain JSON data, for the asset cache
+    """
+    def toCache(self):
+        return [list(area) for area in self.areas.values()]
+
+    """
+    Get the area a postal code is in (None if the postal code is not valid)
+    """
+    def lookup(self, code: str):
+        code = normalizePostalCode(code)
+        if len(code)!=6:
+            return None
+        return self.areas.get(code[:3])
+
+    """
+    Make sure that the postal code is 6 symbols and the first 3 are a real area
+    """
+    def isValid(self, code: str):
+        return self.lookup(code) is not None
+
+# The postal code index is an asset, so it's loaded once and again only when postal_codes.csv changes
+registerAsset("postal_codes.csv", PostalIndex)
+
+"""
+Get the postal code index
+"""
+def getPostalIndex():
+    return getAsset("postal_codes.csv")
+
+"""
+Upper case a postal code and take the spaces out
+"""
+def normalizePostalCode(code: str):
+    return code.upper().replace(" ", "")
+
+"""
+Make sure that the first 3 symbols the postal code are valid
+"""
+@timed
+def isValidPostalCode(code: str):
+    return getPostalIndex().isValid(code)
+
+"""
+Check a whole batch of postal codes at once; gives back True or False for each one in order
+"""
+@timed
+def validatePostalCodes(codes):
+    index = getPostalIndex()
+    return [index.isValid(code) for code in codes]
+
+"""
+The distance in kilometres between two points on the Earth (Along the surface)
+"""
+def haversine(latitude1: float, longitude1: float, latitude2: float, longitude2: float):
+    latitude1, longitude1, latitude2, longitude2 = map(math.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = math.sin((latitude2-latitude1)/2)**2 + math.cos(latitude1)*math.cos(latitude2)*math.sin((longitude2-longitude1)/2)**2
+    return 2*EARTH_RADIUS*math.asin(min(1.0, math.sqrt(a)))
+
+"""
+A point on the Earth as a point on a sphere of radius 1 (The straight line between two of these gets longer
+exactly when the distance along the surface does, so the tree can use plain x, y, z)
+"""
+def toPoint(latitude: float, longitude: float):
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (math.cos(latitude)*math.cos(longitude), math.cos(latitude)*math.sin(longitude), math.sin(latitude))
+
+"""
+Every hospital site from sites.json in a KD-tree, so the nearest ones to a postal code are found without
+measuring the distance to every site. sites.json looks like {"sites": [{"Name": ..., "Postal Code": ...}]};
+a site's Latitude and Longitude can be given too, otherwise the middle of its postal code area is used
+"""
+class SiteIndex:
+    """
+    Read the site file once and build the tree (No file means no sites)
+    """
+    def __init__(self, file = "sites.json"):
+        self.file = file
+        self.sites = []
+        try:
+            with open(file, 'r') as f:
+                sites = list(json.load(f)["sites"])
+        except FileNotFoundError:
+            sites = []
+        except (ValueError, KeyError, TypeError):
+            # A broken file gives no sites instead of stopping every page that shows them
+            print(f"Error: The file {file} doesn't have a list of sites.")
+            sites = []
+        postal_index = getPostalIndex()
+        for site in sites:
+            # A bad site is left out, so one typo doesn't hide every other site
+            try:
+                self.sites.append(self.readSite(site, postal_index))
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                print(f"Error: Skipped a site in {file}: {error}")
+        self.points = [toPoint(site.latitude, site.longitude) for site in self.sites]
+        self.tree = self.build(list(range(len(self.sites))), 0)
+        # (Postal code area, count) to its nearest sites, since every postal code in an area gives the same answer
+        self.nearest_by_area = {}
+
+    """
+    Turn one site from the file into a Site; raises ValueError (Or KeyError) if it has no name or no place
+    """
+    def readSite(self, site: dict, postal_index):
+        if "Latitude" in site and "Longitude" in site:
+            latitude, longitude = float(site["Latitude"]), float(site["Longitude"])
+        else:
+            area = postal_index.lookup(site.get("Postal Code", ""))
+            if area is None:
+                raise ValueError(f"the site {site.get('Name')} has no coordinates and its postal code isn't valid")
+            latitude, longitude = area.latitude, area.longitude
+        return Site(str(site["Name"]), normalizePostalCode(site.get("Postal Code", "")), latitude, longitude)
+
+    """
+    Build the tree for some of the sites: each node is (site, axis it splits on, smaller side, bigger side)
+    """
+    def build(self, sites: list, axis: int):
+        if not sites:
+            return None
+        sites.sort(key=lambda i: self.points[i][axis])
+        middle = len(sites)//2
+        return (sites[middle], axis, self.build(sites[:middle], (axis+1)%3), self.build(sites[middle+1:], (axis+1)%3))
+
+    """
+    Find the nearest sites to a point on the Earth; gives back up to count NearbySites, nearest first
+    """
+    def nearest(self, latitude: float, longitude: float, count: int = 1):
+        if count<1:
+            return []
+        point = toPoint(latitude, longitude)
+        # The count nearest sites found so far, as (-squared distance, site) so the farthest is on top
+        best = []
+        def search(node):
+            if node is None:
+                return
+            site, axis, smaller, bigger = node
+            distance = sum((a-b)**2 for a, b in zip(point, self.points[site]))
+            if len(best)<count:
+                heapq.heappush(best, (-distance, site))
+            elif distance<-best[0][0]:
+                heapq.heapreplace(best, (-distance, site))
+            difference = point[axis]-self.points[site][axis]
+            search(smaller if difference<0 else bigger)
+            # The other side can only have something nearer if the splitting plane is nearer than the farthest found
+            if len(best)<count or difference**2<-best[0][0]:
+                search(bigger if difference<0 else smaller)
+        search(self.tree)
+        return [NearbySite(self.sites[site], haversine(latitude, longitude, self.sites[site].latitude, self.sites[site].longitude))
+                for distance, site in sorted(best, reverse=True)]
+
+    """
+    Find the nearest sites to a postal code (Worked out once per postal code area); gives back None if the postal code is not valid
+    """
+    def nearestTo(self, code: str, count: int = 1):
+        area = getPostalIndex().lookup(code)
+        if area is None:
+            return None
+        key = (area.code, count)
+        found = self.nearest_by_area.get(key)
+        if found is None:
+            found = self.nearest_by_area[key] = self.nearest(area.latitude, area.longitude, count)
+        return list(found)
+
+    """
+    Find the nearest sites to many postal codes at once; gives back a list of NearbySites (Or None) for each one in order
+    """
+    def nearestToMany(self, codes, count: int = 1):
+        codes = list(codes)
+        if len(codes)>=NUMPY_BATCH and self.sites and count>=1 and importNumpy() is not None:
+            return self.nearestToManyNumpy(codes, count)
+        return [self.nearestTo(code, count) for code in codes]
+
+    """
+    The NumPy version of nearestToMany: the distance from every postal code area in the batch to every site is
+    worked out at once, and each area's nearest sites are picked from its row
+    """
+    def nearestToManyNumpy(self, codes: list, count: int):
+        numpy = importNumpy()
+        postal_index = getPostalIndex()
+        areas = [postal_index.lookup(code) for code in codes]
+        # Each area once, however many postal codes are in it
+        rows = {}
+        for area in areas:
+            if area is not None and area.code not in rows:
+                rows[area.code] = area
+        if not rows:
+            return [None]*len(codes)
+        latitudes = numpy.radians(numpy.array([area.latitude for area in rows.values()]))[:, None]
+        longitudes = numpy.radians(numpy.array([area.longitude for area in rows.values()]))[:, None]
+        site_latitudes = numpy.radians(numpy.array([site.latitude for site in self.sites]))[None, :]
+        site_longitudes = numpy.radians(numpy.array([site.longitude for site in self.sites]))[None, :]
+        a = numpy.sin((site_latitudes-latitudes)/2)**2 + numpy.cos(latitudes)*numpy.cos(site_latitudes)*numpy.sin((site_longitudes-longitudes)/2)**2
+        distances = 2*EARTH_RADIUS*numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
+        count = min(count, len(self.sites))
+        if count<len(self.sites):
+            order = numpy.argpartition(distances, count-1, axis=1)[:, :count]
+        else:
+            order = numpy.broadcast_to(numpy.arange(len(self.sites)), distances.shape)
+        # Sort only the picked sites of each row, nearest first
+        order = numpy.take_along_axis(order, numpy.argsort(numpy.take_along_axis(distances, order, axis=1), axis=1), axis=1)
+        picked = numpy.take_along_axis(distances, order, axis=1)
+        nearest = {}
+        for row, code in enumerate(rows):
+            nearest[code] = [NearbySite(self.sites[site], float(distance)) for site, distance in zip(order[row].tolist(), picked[row].tolist())]
+        return [list(nearest[area.code]) if area is not None else None for area in areas]
+
+# The sites are an asset too, loaded again only when sites.json changes (Or is made)
+# The sites without coordinates are placed using the postal code areas
+registerAsset("sites.json", SiteIndex, depends=["postal_codes.csv"])
+
+"""
+Get the site index
+"""
+def getSiteIndex():
+    return getAsset("sites.json")
+
+"""
+Find the nearest hospital sites to a postal code; gives back up to count NearbySites, nearest first
+(None if the postal code is not valid)
+"""
+@timed
+def nearestSites(code: str, count: int = 1):
+    return getSiteIndex().nearestTo(code, count)
+
+"""
+Find the nearest hospital sites to a whole batch of postal codes at once (e.g. every user, after a site opens or
+closes); gives back the NearbySites (Or None) for each one in order
+"""
+@timed
+def nearestSitesMany(codes, count: int = 1):
+    return getSiteIndex().nearestToMany(codes, count)
@@ -0,0 +1,349 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Deciding when appointments happen; doesn't use Qt so it can run without the program's window
+
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime, timedelta, date
+from triage import getSymptomCatalog
+from storage import getBackend, addAppointmentListener, retryTransaction
+from metrics import timed
+
+# Where an appointment request ended up: the saved appointment, its severity and whether it was merged into another one
+# (The appointment is None if there was no free time for it)
+Placement = namedtuple("Placement", ["username", "appointment", "severity", "merged"])
+# Whether an edit was saved, and if not (Because the new time is taken) the next free date and time (None if there is none)
+EditResult = namedtuple("EditResult", ["saved", "free"])
+
+"""
+Change appointment date based on symptom severity
+"""
+def rescheduleDate(appointment_date: str, severity: int, today: date = None):
+    # Get current and appoitnment date and format it
+    if today is None:
+        today = date.today()
+    current_date = datetime(today.year, today.month, today.day)
+    appointment_date = parseDate(appointment_date)
+    # Find the days between the two
+    day_difference = abs((appointment_date - current_date).days)
+
+    # Decide whether to reschedual the appointment
+    if day_difference+(severity*2)>20:
+        day_difference -= (11-severity)
+        return (appointment_date - timedelta(days=day_difference)).strftime("%Y-%m-%d")
+    return appointment_date.strftime("%Y-%m-%d")
+
+"""
+Turn a YYYY-MM-DD date into a datetime (The month and day can be 1 digit too)
+"""
+def parseDate(text: str):
+    try:
+        # Much faster than strptime, but only takes 2 digit months and days
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%d")
+
+"""
+Merge the reasons of two appointments together (Keeps the order and drops repeats)
+"""
+def mergeReasons(old: list, new: list):
+    return list(dict.fromkeys(old+new))
+
+"""
+Add an appointment to a list of appointments, merging it with one on the same date if there is one.
+Gives back the new list and whether it was merged
+"""
+def mergeAppointment(appointments: list, appointment: dict):
+    appointments = list(appointments or [])
+    for i in range(len(appointments)):
+        # Check if the two appointments are the same
+        if appointment["Date"]==appointments[i]["Date"]:
+            appointments[i] = dict(appointments[i], Reasons=mergeReasons(appointments[i]["Reasons"], appointment["Reasons"]))
+            return appointments, True
+    appointments.append(appointment)
+    return appointments, False
+
+"""
+Place one appointment request into a user's appointments; gives back the new list and the placement
+"""
+@timed
+def schedule(appointment: dict, appointments: list, username: str = None, today: date = None, slots = None):
+    book = {username: list(appointments or [])}
+    placement = scheduleMany([(username, appointment)], book, today, slots)[0]
+    return book[username], placement
+
+"""
+Place a whole batch of appointment requests at once. requests is a list of (username, appointment)
+and book is a dictionary of username to appointments, which gets updated with every placement.
+With a SlotIndex, new appointments are moved to the next free time and take that time up.
+Gives back one Placement per request, in order
+"""
+@timed
+def scheduleMany(requests: list, book: dict, today: date = None, slots = None):
+    if today is None:
+        today = date.today()
+    requests = list(requests)
+    # Score every request in one pass instead of one at a time
+    severities = getSymptomCatalog().scoreMany([i[1] for i in requests])["max"]
+    # Date to position in that user's list, built the first time a user comes up, so merging doesn't scan the list
+    by_date = {}
+    # Lots of requests share a date and severity, so only work each new date out once
+    new_dates = {}
+    placements = []
+    for (username, appointment), severity in zip(requests, severities):
+        severity = int(severity)
+        key = (appointment["Date"], severity)
+        if key not in new_dates:
+            new_dates[key] = rescheduleDate(appointment["Date"], severity, today)
+        appointment = dict(appointment, Date=new_dates[key])
+        appointments = book[username] = book.get(username) or []
+        if username not in by_date:
+            by_date[username] = {}
+            for i in range(len(appointments)):
+                by_date[username].setdefault(appointments[i]["Date"], i)
+        position = by_date[username].get(appointment["Date"])
+        if position is not None:
+            # Merge the reasons together
+            old = appointments[position]
+            appointments[position] = dict(old, Reasons=mergeReasons(old["Reasons"], appointment["Reasons"]))
+            placements.append(Placement(username, appointments[position], severity, True))
+        else:
+            if slots is not None:
+                # Move it to the first time that isn't full
+                free = slots.nextFree(appointment["Date"], appointment["Time"])
+                if free is None:
+                    placements.append(Placement(username, None, severity, False))
+                    continue
+                appointment["Date"], appointment["Time"] = free
+                slots.reserve(username, free[0], free[1])
+            by_date[username].setdefault(appointment["Date"], len(appointments))
+            appointments.append(appointment)
+            placements.append(Placement(username, appointment, severity, False))
+    return placements
+
+"""
+Book appointment requests for one user with one read and one write (Starting over if someone else
+changed their appointments first). Gives back one Placement per request; nothing is saved if none
+of them found a free time
+"""
+@timed
+def bookAppointments(username: str, appointments: list, today: date = None):
+    def place(transaction, slots):
+        book = {username: transaction.appointments}
+        placements = scheduleMany([(username, i) for i in appointments], book, today, slots)
+        if any(i.appointment is not None for i in placements):
+            transaction.replace(book[username])
+        else:
+            transaction.rollback()
+        return placements
+    return retryBooking(username, place)
+
+"""
+Change an appointment (Found by its ID) to a new date, time and reasons, one booking at a time like bookAppointments.
+Moving it to a time someone else has taken isn't saved; the result has the next free time instead (Keeping the same
+time is always fine). Raises ValueError if the new time isn't a real time
+"""
+@timed
+def editAppointment(username: str, appointment: dict, new_appointment: dict):
+    def move(transaction, slots):
+        try:
+            moved = slots.slotOf(new_appointment["Date"], new_appointment["Time"])!=slots.slotOf(appointment["Date"], appointment["Time"])
+        except ValueError:
+            moved = True
+        if moved and not slots.isFree(new_appointment["Date"], new_appointment["Time"]):
+            transaction.rollback()
+            return EditResult(False, slots.nextFree(new_appointment["Date"], new_appointment["Time"]))
+        transaction.editById(appointment["ID"], new_appointment)
+        return EditResult(True, None)
+    return retryBooking(username, move)
+
+"""
+Run operation(transaction, slots) on a user's appointments like retryTransaction, with only one booking at a time
+across every program using the same data, so two kiosks can't both take the last place in a slot. The slot index
+is checked against the storage (And made again if another program changed any appointments) before every try.
+Times the operation reserves only stay taken once they're saved: a try that couldn't save gives them back first
+"""
+def retryBooking(username: str, operation, attempts = 5):
+    def attempt(transaction):
+        slots = getSlotIndex()
+        # The user's slots go back to what is saved, so an earlier try's reservations don't count as taken
+        slots.setUser(username, transaction.appointments)
+        return operation(transaction, slots)
+    with booking_lock, getBackend().bookingLock():
+        try:
+            return retryTransaction(username, attempt, attempts)
+        except BaseException:
+            # Nothing was saved, so nothing stays reserved (A save puts the saved slots in through the listener)
+            getSlotIndex().setUser(username, getBackend().getAppointments(username) or [])
+            raise
+
+"""
+Every taken appointment time across all users, so finding a free time doesn't mean going through
+everyone's appointments. Times are grouped into slots of slot_minutes; each slot can hold
+slot_capacity appointments and each day day_capacity (None means no limit)
+"""
+class SlotIndex:
+    def __init__(self, slot_capacity = 1, day_capacity = None, slot_minutes = 15, horizon_days = 365):
+        self.slot_capacity = slot_capacity
+        self.day_capacity = day_capacity
+        self.step = timedelta(minutes=slot_minutes)
+        # How far ahead to look for a free time before giving up
+        self.horizon = timedelta(days=horizon_days)
+        # Slot start to the number of appointments in it
+        self.counts = {}
+        # Date to the number of appointments on it
+        self.day_counts = {}
+        # Every full slot, kept sorted so the next free one can be found with a binary search
+        self.full = []
+        # Username to the slots their appointments are in
+        self.user_slots = {}
+        # Bookings are saved from background threads
+        self.lock = threading.RLock()
+        # The backend's appointmentsVersion when this was built
+        self.version = None
+
+    """
+    Get the start of the slot a date and time are in (ValueError if they aren't a real date and time)
+    """
+    def slotOf(self, appointment_date: str, time: str):
+        hour, minute = time.strip().split(":")
+        moment = parseDate(appointment_date.strip()) + timedelta(hours=int(hour), minutes=int(minute))
+        if not (0<=int(hour)<24 and 0<=int(minute)<60):
+            raise ValueError(f"{time} is not a real time")
+        minutes = (moment.hour*60 + moment.minute)//(self.step.seconds//60)*(self.step.seconds//60)
+        return moment.replace(hour=minutes//60, minute=minutes%60)
+
+    """
+    Take up a slot
+    """
+    def add(self, slot: datetime):
+        self.counts[slot] = self.counts.get(slot, 0)+1
+        day = slot.date()
+        self.day_counts[day] = self.day_counts.get(day, 0)+1
+        if self.counts[slot]==self.slot_capacity:
+            insort(self.full, slot)
+
+    """
+    Free up a slot
+    """
+    def remove(self, slot: datetime):
+        if self.counts.get(slot, 0)==self.slot_capacity:
+            del self.full[bisect_left(self.full, slot)]
+        self.counts[slot] -= 1
+        if not self.counts[slot]:
+            del self.counts[slot]
+        day = slot.date()
+        self.day_counts[day] -= 1
+        if not self.day_counts[day]:
+            del self.day_counts[day]
+
+    """
+    Replace all the slots a user takes up with the ones from their appointments
+    """
+    def setUser(self, username: str, appointments: list):
+        with self.lock:
+            self.replaceUser(username, appointments)
+
+    """
+    Swap a user's slots (Call with the lock held)
+    """
+    def replaceUser(self, username: str, appointments: list):
+        for slot in self.user_slots.pop(username, []):
+            self.remove(slot)
+        for appointment in appointments or []:
+            try:
+                self.reserve(username, appointment["Date"], appointment["Time"])
+            except (KeyError, ValueError):
+                # An old appointment with a broken date or time doesn't take up a slot
+                pass
+
+    """
+    Take up the slot for a user's appointment
+    """
+    def reserve(self, username: str, appointment_date: str, time: str):
+        slot = self.slotOf(appointment_date, time)
+        with self.lock:
+            self.add(slot)
+            self.user_slots.setdefault(username, []).append(slot)
+
+    """
+    Check if the day is full
+    """
+    def dayFull(self, day: date):
+        return self.day_capacity is not None and self.day_counts.get(day, 0)>=self.day_capacity
+
+    """
+    Check if there is room for one more appointment at a date and time
+    """
+    def isFree(self, appointment_date: str, time: str):
+        slot = self.slotOf(appointment_date, time)
+        with self.lock:
+            return not self.dayFull(slot.date()) and self.counts.get(slot, 0)<self.slot_capacity
+
+    """
+    Find the first date and time at or after the given one that has room. Gives back the time
+    that was asked for if its slot has room, otherwise the start of the next free slot
+    (None if nothing is free within the horizon)
+    """
+    def nextFree(self, appointment_date: str, time: str):
+        start = self.slotOf(appointment_date, time)
+        with self.lock:
+            return self.findFree(start, time)
+
+    """
+    The search for nextFree (Call with the lock held)
+    """
+    def findFree(self, start: datetime, time: str):
+        candidate = start
+        while candidate-start<=self.horizon:
+            if self.dayFull(candidate.date()):
+                # Skip to the start of the next day
+                candidate = datetime(candidate.year, candidate.month, candidate.day)+timedelta(days=1)
+                continue
+            i = bisect_left(self.full, candidate)
+            if i<len(self.full) and self.full[i]==candidate:
+                # Walk past the run of full slots starting here
+                while i<len(self.full) and self.full[i]==candidate:
+                    candidate += self.step
+                    i += 1
+                continue
+            if candidate==start:
+                hour, minute = time.strip().split(":")
+                return candidate.strftime("%Y-%m-%d"), f"{int(hour):02d}:{int(minute):02d}"
+            return candidate.strftime("%Y-%m-%d"), candidate.strftime("%H:%M")
+        return None
+
+# The slot index for everyone's appointments, built the first time it's needed
+slot_index = None
+slot_index_lock = threading.Lock()
+# Only one booking at a time in this program (The backend's booking lock is for other programs)
+booking_lock = threading.RLock()
+
+"""
+Get the slot index, building it from every stored appointment the first time and again whenever another
+program changed any appointments since (This program's changes keep it up to date as they happen)
+"""
+def getSlotIndex():
+    global slot_index
+    with slot_index_lock:
+        backend = getBackend()
+        # Read before building, so a change made while building is noticed next time
+        version = backend.appointmentsVersion()
+        if slot_index is None or slot_index.version!=version:
+            index = SlotIndex()
+            for username, appointments in backend.allAppointments():
+                index.setUser(username, appointments)
+            index.version = version
+            slot_index = index
+    return slot_index
+
+"""
+Keep the slot index up to date when someone's appointments change (Nothing to do until it's built)
+"""
+def slotsChanged(username: str, appointments: list):
+    index = slot_index
+    if index is not None:
+        index.setUser(username, appointments)
+
+addAppointmentListener(slotsChanged)
@@ -0,0 +1,2238 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Everything that reads or writes the data files lives here so the pages don't have to
+
+import os
+import re
+import copy
+import json
+import mmap
+import time
+import uuid
+import random
+import hashlib
+import stat
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager, ExitStack, nullcontext
+from metrics import timed
+
+# Locking files between programs only works where fcntl exists (Not on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# The permissions new files don't get (Read once, because reading it means changing it for a moment)
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+# Functions to call with the username and their new appointments whenever someone's appointments change
+appointment_listeners = []
+
+"""
+Call a function with the username and their new appointments every time a user's appointments change
+"""
+def addAppointmentListener(listener):
+    appointment_listeners.append(listener)
+
+"""
+Let everyone listening know that a user's appointments changed
+"""
+def appointmentsChanged(username: str, appointments: list):
+    for listener in appointment_listeners:
+        listener(username, appointments)
+
+"""
+Deletes an appointment from the user's appointments
+"""
+@timed
+def deleteApointmentJSON(appointment: list, username: str):
+    with AppointmentTransaction(username) as transaction:
+        if "ID" in appointment:
+            transaction.deleteById(appointment["ID"])
+        else:
+            transaction.delete(appointment)
+
+"""
+Find an appointment by its ID; gives back (username, appointment), or None if there's no such appointment
+"""
+def findAppointment(appointment_id: str):
+    return getBackend().getAppointment(appointment_id)
+
+"""
+Replace the appointment with an ID (It keeps the same ID)
+"""
+def editAppointment(appointment_id: str, appointment: dict):
+    return getBackend().editAppointment(appointment_id, appointment)
+
+"""
+Delete the appointment with an ID
+"""
+def deleteAppointment(appointment_id: str):
+    return getBackend().deleteAppointment(appointment_id)
+
+"""
+Make a new appointment ID (Unique across every program saving appointments)
+"""
+def newAppointmentId():
+    return uuid.uuid4().hex
+
+"""
+Give every appointment that doesn't have an ID a new one; gives back whether any were missing
+"""
+def assignIds(appointments: list):
+    missing = False
+    for appointment in appointments or []:
+        if "ID" not in appointment:
+            appointment["ID"] = newAppointmentId()
+            missing = True
+    return missing
+
+"""
+Appointment ID to the user the appointment belongs to and its position in their list, so an
+appointment can be found without going through anyone's appointments
+"""
+class AppointmentIndex:
+    def __init__(self, appointments: dict = None):
+        # ID to (username, position)
+        self.records = {}
+        # Username to the IDs of their appointments, so a user's entries can be replaced
+        self.user_ids = {}
+        for username in appointments or {}:
+            self.setUser(username, appointments[username])
+
+    """
+    Replace a user's entries with the ones for their new appointments
+    """
+    def setUser(self, username: str, appointments: list):
+        for appointment_id in self.user_ids.pop(username, []):
+            self.records.pop(appointment_id, None)
+        ids = []
+        for position in range(len(appointments or [])):
+            appointment_id = appointments[position].get("ID")
+            if appointment_id is not None:
+                self.records[appointment_id] = (username, position)
+                ids.append(appointment_id)
+        self.user_ids[username] = ids
+
+    """
+    Get (username, position) for an ID (None if there is no such appointment)
+    """
+    def find(self, appointment_id: str):
+        return self.records.get(appointment_id)
+
+"""
+Function to save a user's appointments (A single appointment is saved as a list of one)
+"""
+@timed
+def writeFileJSON_Appointment(appointment: list, username: str):
+    if isinstance(appointment, dict):
+        appointment = [appointment]
+    getBackend().setAppointments(username, appointment)
+    appointmentsChanged(username, appointment)
+
+"""
+Function to read a user's appointments
+"""
+@timed
+def readFileJSON_Appointment(username: str):
+    return getBackend().getAppointments(username)
+
+"""
+Add appointments to many users at once (A dictionary of username to new appointments), with as few writes as the storage can
+"""
+@timed
+def writeManyAppointments(appointments: dict):
+    updated = getBackend().addAppointments(appointments)
+    for username in updated:
+        appointmentsChanged(username, updated[username])
+    return updated
+
+"""
+Save many new users at once; gives back the users that weren't added because their username is taken
+"""
+@timed
+def writeManyUsers(users: list):
+    return getBackend().addUsers(users)
+
+"""
+Change a user's username and/or password; their appointments move to the new username with them. Gives back the
+user's new data (None if there is no such user)
+"""
+@timed
+def updateCredentials(old_username: str, username: str, password: str):
+    backend = getBackend()
+    user = backend.updateCredentials(old_username, username, password)
+    if user is not None and username!=old_username:
+        appointmentsChanged(old_username, [])
+        appointmentsChanged(username, backend.getAppointments(username) or [])
+    return user
+
+"""
+Delete one of a user's appointments (Found by its ID) with one write; nothing happens if it was already deleted
+somewhere else
+"""
+@timed
+def deleteAppointmentById(username: str, appointment_id: str):
+    def deleteFrom(transaction):
+        if transaction.findById(appointment_id) is not None:
+            transaction.deleteById(appointment_id)
+    return retryTransaction(username, deleteFrom)
+
+"""
+A user's appointments, read once and changed in memory. Nothing is saved until commit(), which
+saves everything with a single write; rollback() (or an error inside a with block) throws the
+changes away without touching the storage
+"""
+class AppointmentTransaction:
+    def __init__(self, username: str, backend = None):
+        self.username = username
+        self.backend = backend if backend is not None else getBackend()
+        self.appointments = self.backend.getAppointments(username) or []
+        # What the appointments were when they were read, so commit() can tell if someone else changed them since
+        self.original = copy.deepcopy(self.appointments)
+        # Appointment ID to position in self.appointments, made the first time an ID is looked up
+        self.positions = None
+        self.changed = False
+        self.done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if error_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    """
+    Add an appointment to the end
+    """
+    def add(self, appointment: dict):
+        appointment.setdefault("ID", newAppointmentId())
+        self.appointments.append(appointment)
+        self.positions = None
+        self.changed = True
+
+    """
+    Add an appointment, merging its reasons into an appointment on the same date if there is one;
+    gives back whether it was merged
+    """
+    def merge(self, appointment: dict):
+        # Imported here because the scheduler uses this module
+        from scheduler import mergeAppointment
+        self.appointments, merged = mergeAppointment(self.appointments, appointment)
+        self.positions = None
+        self.changed = True
+        return merged
+
+    """
+    Replace an appointment with a new one in the same place (The new one keeps the old one's ID)
+    """
+    def edit(self, old: dict, new: dict):
+        if "ID" in old:
+            return self.editById(old["ID"], new)
+        self.appointments[self.appointments.index(old)] = new
+        self.changed = True
+
+    """
+    Remove an appointment
+    """
+    def delete(self, appointment: dict):
+        if "ID" in appointment:
+            return self.deleteById(appointment["ID"])
+        self.appointments.remove(appointment)
+        self.positions = None
+        self.changed = True
+
+    """
+    Get the position of the appointment with an ID (None if it isn't one of the user's)
+    """
+    def findById(self, appointment_id: str):
+        if self.positions is None:
+            self.positions = {}
+            for i in range(len(self.appointments)):
+                self.positions[self.appointments[i].get("ID")] = i
+        return self.positions.get(appointment_id)
+
+    """
+    Replace the appointment with an ID (KeyError if it isn't one of the user's)
+    """
+    def editById(self, appointment_id: str, new: dict):
+        position = self.findById(appointment_id)
+        if position is None:
+            raise KeyError(appointment_id)
+        self.appointments[position] = dict(new, ID=appointment_id)
+        self.changed = True
+
+    """
+    Remove the appointment with an ID (KeyError if it isn't one of the user's)
+    """
+    def deleteById(self, appointment_id: str):
+        position = self.findById(appointment_id)
+        if position is None:
+            raise KeyError(appointment_id)
+        del self.appointments[position]
+        self.positions = None
+        self.changed = True
+
+    """
+    Replace all of the appointments
+    """
+    def replace(self, appointments: list):
+        self.appointments = list(appointments)
+        self.positions = None
+        self.changed = True
+
+    """
+    Save every change with one write (ConflictError if someone else changed the user's appointments first)
+    """
+    def commit(self):
+        if self.done:
+            return
+        self.done = True
+        if self.changed:
+            self.backend.setAppointments(self.username, self.appointments, expected=self.original)
+            appointmentsChanged(self.username, self.appointments)
+
+    """
+    Throw the changes away
+    """
+    def rollback(self):
+        self.done = True
+        self.appointments = []
+
+"""
+Run operation on a fresh AppointmentTransaction and commit it, starting over with the newest
+appointments if someone else changed them first. Gives back what operation gave back
+"""
+def retryTransaction(username: str, operation, attempts = 5, backend = None):
+    for attempt in range(attempts):
+        transaction = AppointmentTransaction(username, backend)
+        result = operation(transaction)
+        try:
+            transaction.commit()
+            return result
+        except ConflictError:
+            # Wait a little (Longer each time) so the programs don't keep running into each other
+            time.sleep(random.uniform(0, 0.01*2**attempt))
+    raise ConflictError(f"{username}'s appointments kept changing, gave up after {attempts} tries")
+
+"""
+Someone else changed the data between reading it and saving it
+"""
+class ConflictError(Exception):
+    pass
+
+"""
+An advisory lock on file + ".lock" so only one program writes the file at a time. The lock
+file also keeps a version number for the file that goes up by one with every save
+"""
+class FileLock:
+    def __init__(self, file: str):
+        self.path = file + ".lock"
+        self.version = 0
+
+    def __enter__(self):
+        self.handle = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        self.handle.seek(0)
+        text = self.handle.read().strip()
+        self.version = int(text) if text.isdigit() else 0
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        self.handle.close()
+        return False
+
+    """
+    Count one more save of the file
+    """
+    def bump(self):
+        self.version += 1
+        self.handle.seek(0)
+        self.handle.truncate()
+        self.handle.write(str(self.version))
+        self.handle.flush()
+
+"""
+Get the save count of a file from its lock file without locking it (0 if it was never saved with a lock)
+"""
+def readLockVersion(file: str):
+    try:
+        with open(file + ".lock", "r") as f:
+            text = f.read().strip()
+    except FileNotFoundError:
+        return 0
+    return int(text) if text.isdigit() else 0
+
+"""
+Make a temporary file next to a file, to be swapped in for it; gives back (handle, path). A temporary file can only be
+read by its owner, so it gets the permissions the file has (Or the ones a new file would get), and other accounts on
+a shared data directory can still read the file after the swap
+"""
+def temporaryFileFor(file: str):
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file)), prefix=os.path.basename(file)+".", suffix=".tmp")
+    try:
+        mode = stat.S_IMODE(os.stat(file).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    try:
+        os.chmod(temp, mode)
+    except BaseException:
+        os.close(handle)
+        os.remove(temp)
+        raise
+    return handle, temp
+
+"""
+Write JSON to a temporary file next to the real one and swap it in, so nobody ever reads half a file
+"""
+def writeJSONAtomic(data, file: str, ensure_ascii = True):
+    handle, temp = temporaryFileFor(file)
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=ensure_ascii, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, file)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+"""
+Read any JSON file with a given file path (Optional)
+"""
+@timed
+def readFileJSON(file = "data.json"):
+    try:
+        # Open the file and load the data into a variable, then return the data
+        with open(file, 'r') as f:
+            data = json.load(f)
+        return data
+    # Exception for file not found and incorrect JSON format
+    except FileNotFoundError:
+        print(f"Error: The file {file} was not found.")
+        return None
+    except json.JSONDecodeError:
+        print(f"Error: The file {file} contains invalid JSON.")
+        return None
+
+"""
+Writes data to a given JSON file
+"""
+@timed
+def writeFileJSON(data: dict, file = None):
+    # Without a file the user goes to whatever storage backend is being used
+    if file is None:
+        getBackend().addUser(data)
+    else:
+        # The user store already has the file in memory, so just add to it
+        getUserStore(file).add(data)
+
+"""
+Keeps every user from a data file in memory with lookups by username, email and phone number
+"""
+class UserStore:
+    """
+    Load the users from the given file (No file means the users only live in memory)
+    """
+    def __init__(self, file = "data.json"):
+        self.file = file
+        self.users = []
+        self.by_username = {}
+        self.by_email = {}
+        self.by_phone = {}
+        self.mtime = None
+        # The save count from the lock file when the users were last read or saved
+        self.version = None
+        # Pages look users up from background threads
+        self.lock = threading.RLock()
+        self.load()
+
+    """
+    (Re)load the whole file and rebuild the lookups
+    """
+    def load(self):
+        d = readFileJSON(self.file) if self.file is not None else None
+        # Make sure loaded data is in correct format
+        if not (isinstance(d, dict) and isinstance(d.get("users"), list)):
+            d = {"users": []}
+        self.data = d
+        self.users = d["users"]
+        self.by_username = {}
+        self.by_email = {}
+        self.by_phone = {}
+        for user in self.users:
+            self.index(user)
+        self.mtime = self.getMtime()
+
+    """
+    Get the last time the file was changed (None if it doesn't exist)
+    """
+    def getMtime(self):
+        if self.file is None:
+            return None
+        try:
+            return os.stat(self.file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    """
+    Reload the file only if something else changed it since we last read it
+    """
+    def refresh(self):
+        if self.getMtime()!=self.mtime:
+            self.load()
+
+    """
+    Add a user to the lookups
+    """
+    def index(self, user: dict):
+        if user.get("Username") is not None:
+            self.by_username[user["Username"]] = user
+        if user.get("Email Address"):
+            self.by_email[user["Email Address"].strip().lower()] = user
+        if user.get("Phone Number"):
+            self.by_phone[normalizePhone(user["Phone Number"])] = user
+
+    """
+    Remove a user from the lookups
+    """
+    def unindex(self, user: dict):
+        if self.by_username.get(user.get("Username")) is user:
+            del self.by_username[user["Username"]]
+        email = (user.get("Email Address") or "").strip().lower()
+        if self.by_email.get(email) is user:
+            del self.by_email[email]
+        phone = normalizePhone(user.get("Phone Number") or "")
+        if self.by_phone.get(phone) is user:
+            del self.by_phone[phone]
+
+    """
+    Get the user data for a username (None if there is no such user)
+    """
+    def get(self, username: str):
+        with self.lock:
+            self.refresh()
+            return self.by_username.get(username)
+
+    """
+    Check if the username exists and the password matches; returns the user data if it does
+    """
+    def verify(self, username: str, password: str):
+        user = self.get(username)
+        if user is not None and user.get("Password")==password:
+            return user
+        return None
+
+    """
+    Check if a username is already used
+    """
+    def usernameTaken(self, username: str):
+        with self.lock:
+            self.refresh()
+            return username in self.by_username
+
+    """
+    Check if an email address is already used
+    """
+    def emailTaken(self, email: str):
+        with self.lock:
+            self.refresh()
+            return email.strip().lower() in self.by_email
+
+    """
+    Check if a phone number is already used
+    """
+    def phoneTaken(self, phone: str):
+        with self.lock:
+            self.refresh()
+            return normalizePhone(phone) in self.by_phone
+
+    """
+    Add a new user and save the file
+    """
+    def add(self, data: dict):
+        with self.locked() as lock:
+            # Another program could have taken the username since it was checked
+            if data.get("Username") in self.by_username:
+                raise ConflictError(f"The username {data.get('Username')} is already taken")
+            self.users.append(data)
+            self.index(data)
+            self.save(lock)
+
+    """
+    Add many new users and save the file once; gives back the users that weren't added because their username is taken
+    """
+    def addMany(self, users: list):
+        with self.locked() as lock:
+            taken = []
+            added = []
+            for data in users:
+                if data.get("Username") in self.by_username:
+                    taken.append(data)
+                    continue
+                self.users.append(data)
+                self.index(data)
+                added.append(data)
+            if added:
+                self.save(lock, added)
+            return taken
+
+    """
+    Iterate over a copy of every user
+    """
+    def all(self):
+        with self.lock:
+            self.refresh()
+            users = list(self.users)
+        for user in users:
+            yield dict(user)
+
+    """
+    Change the username and/or password of an existing user and save the file. A new username calls
+    move(old username, username) first, while the file is still locked, so nobody can take the username in between
+    """
+    def updateCredentials(self, old_username: str, username: str, password: str, move = None):
+        with self.locked() as lock:
+            user = self.by_username.get(old_username)
+            if user is None:
+                return None
+            if username!=old_username and username in self.by_username:
+                raise ConflictError(f"The username {username} is already taken")
+            if username!=old_username and move is not None:
+                move(old_username, username)
+            del self.by_username[old_username]
+            self.unindex(user)
+            user["Username"] = username
+            user["Password"] = password
+            self.index(user)
+            self.save(lock)
+            return user
+
+    """
+    Lock the file against other programs and make sure the users in memory are the newest ones
+    """
+    @contextmanager
+    def locked(self):
+        if self.file is None:
+            with self.lock:
+                yield None
+            return
+        with self.lock, FileLock(self.file) as lock:
+            # Someone else saved since we last read it
+            if lock.version!=self.version:
+                self.mtime = None
+            self.refresh()
+            self.version = lock.version
+            yield lock
+
+    """
+    Write every user back to the file (Call inside locked()). When the only change is new users at the end (added),
+    only they are encoded and the rest of the file is copied as it is
+    """
+    def save(self, lock = None, added: list = None):
+        if self.file is None:
+            return
+        if not (added and self.appendUsers(added)):
+            writeJSONAtomic(self.data, self.file, ensure_ascii=False)
+        self.mtime = self.getMtime()
+        if lock is not None:
+            lock.bump()
+            self.version = lock.version
+
+    """
+    Write new users onto the end of the user list in the file; gives back False if the file isn't laid out the
+    way writeJSONAtomic writes it, or the users were the first ones (Then the whole file has to be written)
+    """
+    def appendUsers(self, added: list):
+        tail = b"\n    ]\n}"
+        if list(self.data)[-1:]!=["users"] or len(self.users)<=len(added):
+            return False
+        try:
+            with open(self.file, 'rb') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return False
+        if not text.endswith(b"}" + tail):
+            return False
+        new = b"".join(b",\n        " + json.dumps(i, ensure_ascii=False, indent=4).replace("\n", "\n        ").encode("utf-8") for i in added)
+        writeBytesAtomic([text[:-len(tail)], new, tail], self.file)
+        return True
+
+"""
+Write pieces of a file to a temporary file next to the real one and swap it in
+"""
+def writeBytesAtomic(pieces: list, file: str):
+    handle, temp = temporaryFileFor(file)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            for piece in pieces:
+                f.write(piece)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, file)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+"""
+Get the last time a file was changed and its size, to tell if it changed since it was read (None if it doesn't exist)
+"""
+def fileVersion(file: str):
+    try:
+        stat = os.stat(file)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+"""
+Get only the digits of a phone number
+"""
+def normalizePhone(phone: str):
+    return "".join(c for c in phone if c.isdigit())
+
+# One store per data file, created the first time it's needed
+user_stores = {}
+
+"""
+Get the user store for a data file, loading it the first time
+"""
+def getUserStore(file = "data.json"):
+    if file not in user_stores:
+        user_stores[file] = UserStore(file)
+    return user_stores[file]
+
+"""
+Keeps appointments.json in memory and saves changes by appending them to a journal file
+instead of rewriting the whole file. Every journal line replaces one user's list, so replaying
+a line twice is harmless. Once the journal gets big it is folded back into appointments.json
+in the background. Several programs can share the journal: every change is appended with the
+appointments.json lock held, after reading the lines the other programs appended since
+"""
+class AppointmentJournal:
+    """
+    Load the snapshot and replay the journal on top of it
+    """
+    def __init__(self, file = "appointments.json", threshold = 1024*1024):
+        self.file = file
+        self.journal_file = file + ".journal"
+        # A journal left over from a compaction that didn't finish (Older versions of the program made these)
+        self.old_file = file + ".journal.old"
+        self.threshold = threshold
+        self.lock = threading.RLock()
+        self.compaction = None
+        self.state = {}
+        # The journal opened for appending, and how much of it is in the state
+        self.journal = None
+        self.position = 0
+        # The save count from the lock file when the state was last brought up to date, the snapshot it was read from,
+        # and how many times other programs were seen to have saved (See changes)
+        self.count = None
+        self.snapshot_version = None
+        self.changes = 0
+        # The file lock while this program holds it (See locked)
+        self.file_lock = None
+
+        with self.locked():
+            leftover = os.path.exists(self.old_file)
+        # A compaction didn't finish last time, so finish it now before anything else happens
+        if leftover:
+            self.compact(wait=True)
+
+    """
+    Lock the journal against other programs and bring the state up to date with what they saved. Holding it
+    again in the same thread is fine
+    """
+    @contextmanager
+    def locked(self):
+        with self.lock:
+            if self.file_lock is not None:
+                yield self.file_lock
+                return
+            with FileLock(self.file) as lock:
+                self.file_lock = lock
+                try:
+                    if self.journal is None or lock.version!=self.count:
+                        self.sync()
+                        self.count = lock.version
+                    yield lock
+                finally:
+                    self.file_lock = None
+
+    """
+    Read what other programs saved (Call with the file lock held): only the new journal lines, unless the snapshot
+    was written again (Another program compacted) and everything is read again
+    """
+    def sync(self):
+        try:
+            size = os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            size = None
+        if self.journal is None or size is None or size<self.position or fileVersion(self.file)!=self.snapshot_version:
+            self.reload()
+        elif size>self.position:
+            # A new dictionary, so anything made from the old one (e.g. an ID index) is made again
+            self.state = dict(self.state)
+            self.position = self.replay(self.journal_file, self.position)
+        else:
+            return
+        self.changes += 1
+
+    """
+    Read the snapshot and replay the journals on top of it (Call with the file lock held)
+    """
+    def reload(self):
+        if self.journal is not None:
+            self.journal.close()
+        self.snapshot_version = fileVersion(self.file)
+        state = readFileJSON(self.file) if self.snapshot_version is not None else {}
+        self.state = state if isinstance(state, dict) else {}
+        self.replay(self.old_file)
+        self.journal = open(self.journal_file, "ab")
+        self.position = self.replay(self.journal_file)
+
+    """
+    Apply the records in a journal file from a position to the state; gives back where the last whole record ends. A
+    half written last line from a crash is cut off (With the file lock held), so the next record starts on its own line
+    """
+    def replay(self, file: str, position: int = 0):
+        if not os.path.exists(file):
+            return 0
+        with open(file, "rb") as f:
+            f.seek(position)
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except json.JSONDecodeError:
+                    record = None
+                if record is None:
+                    # Everything before it is still good
+                    os.truncate(file, position)
+                    break
+                position += len(line)
+                # A user with no list was removed (See remove)
+                if record["appointments"] is None:
+                    self.state.pop(record["user"], None)
+                else:
+                    self.state[record["user"]] = record["appointments"]
+        return position
+
+    """
+    Read what other programs saved, if they saved anything since the state was last brought up to date
+    """
+    def refresh(self):
+        with self.lock:
+            if readLockVersion(self.file)!=self.count:
+                with self.locked():
+                    pass
+
+    """
+    Get a copy of a user's appointments (None if they have none)
+    """
+    def get(self, username: str):
+        with self.lock:
+            self.refresh()
+            return copy.deepcopy(self.state.get(username))
+
+    """
+    Replace a user's appointments and append the change to the journal
+    """
+    def set(self, username: str, appointments: list):
+        # Lists in the state are never changed in place, so other threads can keep a shallow copy of it
+        appointments = copy.deepcopy(appointments)
+        self.append(username, appointments)
+
+    """
+    Remove a user's appointments altogether (Their name is left out of the next snapshot)
+    """
+    def remove(self, username: str):
+        self.append(username, None)
+
+    """
+    Append one user's change to the journal and apply it to the state (None removes the user)
+    """
+    def append(self, username: str, appointments: list):
+        line = (json.dumps({"user": username, "appointments": appointments}, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.locked() as lock:
+            self.journal.write(line)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.position += len(line)
+            if appointments is None:
+                self.state.pop(username, None)
+            else:
+                self.state[username] = appointments
+            lock.bump()
+            self.count = lock.version
+            start_compaction = self.position>=self.threshold
+        if start_compaction:
+            self.compact()
+
+    """
+    Fold the journal into a new snapshot; runs in a background thread unless wait is True
+    """
+    def compact(self, wait = False):
+        with self.lock:
+            if self.compaction is None or not self.compaction.is_alive():
+                self.compaction = threading.Thread(target=self.writeSnapshot, daemon=True)
+                self.compaction.start()
+            compaction = self.compaction
+        if wait:
+            compaction.join()
+
+    """
+    Write the snapshot and empty the journal, with the file lock held so no program appends in between (Another
+    program may have compacted first, then there's nothing to do)
+    """
+    def writeSnapshot(self):
+        with self.locked() as lock:
+            leftover = os.path.exists(self.old_file)
+            if self.position<self.threshold and not leftover:
+                return
+            writeJSONAtomic(self.state, self.file)
+            # Only once the snapshot is there: replaying the journals on top of it again after a crash is harmless
+            if leftover:
+                os.remove(self.old_file)
+            self.journal.truncate(0)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.position = 0
+            self.snapshot_version = fileVersion(self.file)
+            lock.bump()
+            self.count = lock.version
+
+    """
+    Wait for any running compaction and close the journal
+    """
+    def close(self):
+        if self.compaction is not None:
+            self.compaction.join()
+        with self.lock:
+            self.journal.close()
+
+"""
+appointments.json mapped into memory with the byte span of every user's list, so reading one user's
+appointments only decodes their part of the file. The spans are found with one pass of a regular
+expression over the file (It's always written with an indent of 4, so every user starts a line
+with exactly 4 spaces and nothing else does), and saving a user only rewrites their span and
+moves the spans after it instead of looking through the file again
+"""
+class AppointmentFile:
+    # A user's name at the start of a line with 4 spaces (JSON strings can't have a real new line in them).
+    # Starting with the new line instead of ^ lets the search jump straight to the next candidate
+    key_pattern = re.compile(rb'\n    "([^"\\\n]*(?:\\.[^"\\\n]*)*)": ')
+    id_pattern = re.compile(rb'"ID": ')
+    date_pattern = re.compile(rb'"Date": ')
+
+    def __init__(self, file = "appointments.json"):
+        self.file = file
+        # The inode/mtime/size of the mapped file, so a file swapped in by another program is noticed
+        self.version = None
+        self.handle = None
+        self.data = b""
+        # Username to (start, end) of their list in the file
+        self.spans = {}
+        # The whole file parsed, only for files not written the usual way (Then spans isn't used)
+        self.parsed = None
+
+    """
+    Get the inode, mtime and size of the file (None if there is no file)
+    """
+    def getVersion(self):
+        try:
+            stat = os.stat(self.file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    """
+    Map the file again if it changed since it was last mapped
+    """
+    def refresh(self):
+        version = self.getVersion()
+        if version!=self.version or version is None:
+            self.load(version)
+
+    """
+    Make sure the file is mapped again next time (Another program saved it)
+    """
+    def forget(self):
+        self.version = None
+
+    """
+    Map the file and find every user's span
+    """
+    def load(self, version):
+        self.close()
+        self.version = version
+        self.parsed = None
+        self.data = b""
+        self.spans = {}
+        if version is None or version[2]==0:
+            return
+        self.map()
+        spans = self.scan()
+        if spans is None:
+            # Not laid out the usual way (e.g. edited by hand), so parse all of it like before
+            self.parsed = readFileJSON(self.file) or {}
+        else:
+            self.spans = spans
+
+    """
+    Find the span of every user's list; None if the file isn't laid out the way writeJSONAtomic writes it
+    """
+    def scan(self):
+        data = self.data
+        if data[:1]!=b"{":
+            return None
+        keys = list(self.key_pattern.finditer(data))
+        if not keys:
+            return {} if data[:].strip()==b"{}" else None
+        spans = {}
+        for i in range(len(keys)):
+            start = keys[i].end()
+            end = keys[i+1].start() if i+1<len(keys) else data.rfind(b"}")
+            # Step back over the comma and new line between this user and the next
+            while end>start and data[end-1:end] in (b" ", b"\n", b"\r", b"\t", b","):
+                end -= 1
+            key = keys[i].group(1)
+            # Only names with escapes in them (e.g. \u00e9) need the JSON decoder
+            spans[json.loads(b'"'+key+b'"') if b"\\" in key else key.decode("ascii")] = (start, end)
+        return spans
+
+    """
+    Get a user's appointments (None if they have none), decoding only their part of the file
+    """
+    def get(self, username: str):
+        self.refresh()
+        if self.parsed is not None:
+            return copy.deepcopy(self.parsed.get(username))
+        span = self.spans.get(username)
+        if span is None:
+            return None
+        try:
+            return json.loads(self.data[span[0]:span[1]])
+        except json.JSONDecodeError:
+            # The layout wasn't what it looked like; fall back to parsing the whole file
+            self.parsed = readFileJSON(self.file) or {}
+            return copy.deepcopy(self.parsed.get(username))
+
+    """
+    Save a user's appointments by writing the file again with only their span changed (Call with the file lock held)
+    """
+    def set(self, username: str, appointments: list):
+        self.refresh()
+        if self.parsed is not None:
+            self.parsed[username] = copy.deepcopy(appointments)
+            writeJSONAtomic(self.parsed, self.file)
+            self.forget()
+            return
+        value = encodeAppointments(appointments)
+        data = self.data
+        if username in self.spans:
+            start, end = self.spans[username]
+            before, after = b"", b""
+        elif self.spans:
+            # A new user goes after the last one
+            start = end = max(i[1] for i in self.spans.values())
+            before, after = b",\n    " + json.dumps(username).encode("ascii") + b": ", b""
+        else:
+            start, end = 0, len(data)
+            before, after = b"{\n    " + json.dumps(username).encode("ascii") + b": ", b"\n}"
+        handle, temp = temporaryFileFor(self.file)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(data[:start])
+                f.write(before)
+                f.write(value)
+                f.write(after)
+                f.write(data[end:])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.file)
+        except BaseException:
+            os.remove(temp)
+            raise
+        # Every span after the changed one moves by the change in length; the ones before it stay where they were
+        shift = len(before)+len(value)+len(after)-(end-start)
+        spans = {}
+        for name in self.spans:
+            span = self.spans[name]
+            spans[name] = (span[0]+shift, span[1]+shift) if span[0]>=end and name!=username else span
+        spans[username] = (start+len(before), start+len(before)+len(value))
+        self.close()
+        self.version = self.getVersion()
+        self.map()
+        self.spans = spans
+
+    """
+    Save many users' appointments with one write: the file is copied over with only their spans changed and new users
+    added after the last one (Call with the file lock held)
+    """
+    def setMany(self, updates: dict):
+        self.refresh()
+        if not updates:
+            return
+        if self.parsed is not None:
+            for username in updates:
+                self.parsed[username] = copy.deepcopy(updates[username])
+            writeJSONAtomic(self.parsed, self.file)
+            self.forget()
+            return
+        data = self.data
+        existing = sorted(self.spans.items(), key=lambda i: i[1][0])
+        spans = {}
+        handle, temp = temporaryFileFor(self.file)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                # How far the old file has been copied, and how much longer the new file is up to there
+                position = 0
+                shift = 0
+                for username, (start, end) in existing:
+                    if username not in updates:
+                        # Users that didn't change are copied over along with everything around them
+                        spans[username] = (start+shift, end+shift)
+                        continue
+                    value = encodeAppointments(updates[username])
+                    f.write(data[position:start])
+                    f.write(value)
+                    spans[username] = (start+shift, start+shift+len(value))
+                    shift += len(value)-(end-start)
+                    position = end
+                # Up to the end of the last user
+                last = existing[-1][1][1] if existing else 0
+                f.write(data[position:last])
+                offset = last+shift
+                position = last
+                if not existing:
+                    f.write(b"{")
+                    offset = 1
+                for username in updates:
+                    if username in self.spans:
+                        continue
+                    key = (b",\n    " if spans else b"\n    ") + json.dumps(username).encode("ascii") + b": "
+                    value = encodeAppointments(updates[username])
+                    f.write(key)
+                    f.write(value)
+                    spans[username] = (offset+len(key), offset+len(key)+len(value))
+                    offset += len(key)+len(value)
+                f.write(data[position:] if existing else b"\n}")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.file)
+        except BaseException:
+            os.remove(temp)
+            raise
+        self.close()
+        self.version = self.getVersion()
+        self.map()
+        self.spans = spans
+
+    """
+    Take a user out of the file altogether (Call with the file lock held). It's rare, so the whole file is written again
+    """
+    def remove(self, username: str):
+        self.refresh()
+        if username not in (self.parsed if self.parsed is not None else self.spans):
+            return
+        d = readFileJSON(self.file) or {}
+        d.pop(username, None)
+        writeJSONAtomic(d, self.file)
+        self.forget()
+
+    """
+    Get the names of the users in the file, in the order they're in
+    """
+    def usernames(self):
+        self.refresh()
+        if self.parsed is not None:
+            return list(self.parsed)
+        return [i[0] for i in sorted(self.spans.items(), key=lambda i: i[1][0])]
+
+    """
+    Map the file into memory (Windows can't replace a file that is mapped, so there it's read instead)
+    """
+    def map(self):
+        self.handle = open(self.file, "rb")
+        if os.name=="nt":
+            self.data = self.handle.read()
+            self.handle.close()
+            self.handle = None
+        else:
+            self.data = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    """
+    Find which user has the appointment with an ID, by searching the file for it (None if no one does)
+    """
+    def findId(self, appointment_id: str):
+        self.refresh()
+        if self.parsed is not None:
+            for username in self.parsed:
+                if any(i.get("ID")==appointment_id for i in self.parsed[username]):
+                    return username
+            return None
+        position = self.data.find(b'"ID": ' + json.dumps(appointment_id).encode("ascii"))
+        if position==-1:
+            return None
+        for username in self.spans:
+            if self.spans[username][0]<=position<self.spans[username][1]:
+                return username
+        return None
+
+    """
+    Check if any appointment in the file doesn't have an ID yet, without parsing it (Every appointment has a date,
+    and a key can't show up inside a JSON string because the quotes would be escaped)
+    """
+    def missingIds(self):
+        self.refresh()
+        if self.parsed is not None:
+            return any("ID" not in i for appointments in self.parsed.values() for i in appointments)
+        ids = sum(1 for i in self.id_pattern.finditer(self.data))
+        return ids<sum(1 for i in self.date_pattern.finditer(self.data))
+
+    """
+    Let go of the mapped file
+    """
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+"""
+Encode a user's appointments the way they look inside the whole file (JSON strings can't have a real new line, so this is safe)
+"""
+def encodeAppointments(appointments: list):
+    return json.dumps(appointments, indent=4).replace("\n", "\n    ").encode("ascii")
+
+"""
+Everything the program needs from its storage. Each backend keeps users and appointments
+in its own way; the pages only ever talk to one of these through getBackend().
+"""
+class Backend:
+    """
+    Get the user data for a username (None if there is no such user)
+    """
+    def getUser(self, username: str):
+        raise NotImplementedError
+
+    """
+    Check if the username exists and the password matches; returns the user data if it does
+    """
+    def verifyUser(self, username: str, password: str):
+        user = self.getUser(username)
+        if user is not None and user.get("Password")==password:
+            return user
+        return None
+
+    """
+    Check if a username is already used
+    """
+    def usernameTaken(self, username: str):
+        return self.getUser(username) is not None
+
+    """
+    Check if an email address is already used
+    """
+    def emailTaken(self, email: str):
+        raise NotImplementedError
+
+    """
+    Check if a phone number is already used
+    """
+    def phoneTaken(self, phone: str):
+        raise NotImplementedError
+
+    """
+    Save a new user
+    """
+    def addUser(self, data: dict):
+        raise NotImplementedError
+
+    """
+    Save many new users at once; gives back the users that weren't added because their username is taken
+    """
+    def addUsers(self, users: list):
+        taken = []
+        for data in users:
+            try:
+                self.addUser(data)
+            except ConflictError:
+                taken.append(data)
+        return taken
+
+    """
+    Go through every user
+    """
+    def allUsers(self):
+        raise NotImplementedError
+
+    """
+    Change the username and/or password of an existing user; their appointments move to the new username with them
+    """
+    def updateCredentials(self, old_username: str, username: str, password: str):
+        raise NotImplementedError
+
+    """
+    Move a user's appointments to a new username (Anything left under the new username is replaced)
+    """
+    def moveAppointments(self, old_username: str, username: str):
+        raise NotImplementedError
+
+    """
+    Get a user's appointments (None if they have none)
+    """
+    def getAppointments(self, username: str):
+        raise NotImplementedError
+
+    """
+    Replace a user's appointments. With expected, ConflictError is raised instead if the saved
+    appointments aren't what the caller read anymore
+    """
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        raise NotImplementedError
+
+    """
+    Add appointments to the end of many users' appointments at once, with as few writes as the backend can
+    (A dictionary of username to new appointments); gives back each of those users' appointments afterwards
+    """
+    def addAppointments(self, appointments: dict):
+        raise NotImplementedError
+
+    """
+    Find an appointment by its ID; gives back (username, appointment), or None if there's no such appointment
+    """
+    def getAppointment(self, appointment_id: str):
+        raise NotImplementedError
+
+    """
+    Replace the appointment with an ID (KeyError if there's no such appointment)
+    """
+    def editAppointment(self, appointment_id: str, appointment: dict):
+        found = self.getAppointment(appointment_id)
+        if found is None:
+            raise KeyError(appointment_id)
+        return retryTransaction(found[0], lambda transaction: transaction.editById(appointment_id, appointment), backend=self)
+
+    """
+    Delete the appointment with an ID (KeyError if there's no such appointment)
+    """
+    def deleteAppointment(self, appointment_id: str):
+        found = self.getAppointment(appointment_id)
+        if found is None:
+            raise KeyError(appointment_id)
+        return retryTransaction(found[0], lambda transaction: transaction.deleteById(appointment_id), backend=self)
+
+    """
+    Give every saved appointment without an ID one (Appointments saved before there were IDs)
+    """
+    def migrateIds(self):
+        for username, appointments in self.allAppointments():
+            original = copy.deepcopy(appointments)
+            if assignIds(appointments):
+                try:
+                    self.setAppointments(username, appointments, expected=original)
+                except ConflictError:
+                    # Another program changed (And so already migrated) them first
+                    pass
+
+    """
+    Get a user's appointments between two dates (YYYY-MM-DD, both included)
+    """
+    def getAppointmentsBetween(self, username: str, start: str, end: str):
+        appointments = self.getAppointments(username) or []
+        return [i for i in appointments if start<=i["Date"]<=end]
+
+    """
+    Get every appointment on a date for all users as a dictionary of username to appointments
+    """
+    def appointmentsOn(self, date: str):
+        raise NotImplementedError
+
+    """
+    Go through every user's appointments, giving back (username, appointments) pairs
+    """
+    def allAppointments(self):
+        raise NotImplementedError
+
+    """
+    A number that changes whenever another program changes any appointments (This program's own changes are sent
+    to the appointment listeners instead), so anything built from every appointment knows when to build itself again
+    """
+    def appointmentsVersion(self):
+        return 0
+
+    """
+    A lock every program using the same data takes while it books, so a free time can't be taken twice
+    """
+    def bookingLock(self):
+        return nullcontext()
+
+    """
+    Let go of any open files or connections
+    """
+    def close(self):
+        pass
+
+"""
+The original storage: users in data.json and appointments in appointments.json
+(Optionally with the appointment journal so changes don't rewrite the whole file)
+"""
+class JsonBackend(Backend):
+    def __init__(self, data_file = "data.json", appointments_file = "appointments.json", journal = False, threshold = 1024*1024):
+        self.users = getUserStore(data_file)
+        self.appointments_file = appointments_file
+        self.journal = AppointmentJournal(appointments_file, threshold) if journal else None
+        # Reads and writes of one user's appointments only touch that user's part of the file
+        self.appointment_file = AppointmentFile(appointments_file)
+        # The parsed appointment file, the mtime/size of the file it came from and the save count from its lock file
+        self.cache = None
+        self.cache_version = None
+        self.cache_count = None
+        # The ID index and the appointments it was made from (It's made again when the file is read again)
+        self.index = None
+        self.index_source = None
+        # How many times another program was seen to have saved the appointments (See appointmentsVersion)
+        self.changes = 0
+        self.lock = threading.RLock()
+
+    def getUser(self, username: str):
+        return self.users.get(username)
+
+    def emailTaken(self, email: str):
+        return self.users.emailTaken(email)
+
+    def phoneTaken(self, phone: str):
+        return self.users.phoneTaken(phone)
+
+    def addUser(self, data: dict):
+        self.users.add(data)
+
+    def addUsers(self, users: list):
+        return self.users.addMany(users)
+
+    def allUsers(self):
+        return self.users.all()
+
+    def updateCredentials(self, old_username: str, username: str, password: str):
+        return self.users.updateCredentials(old_username, username, password, self.moveAppointments)
+
+    def moveAppointments(self, old_username: str, username: str):
+        if self.journal is not None:
+            with self.lock, self.journal.locked():
+                appointments = self.journal.state.get(old_username)
+                if appointments is not None:
+                    self.journal.set(username, appointments)
+                    self.journal.remove(old_username)
+                    # Made again with the IDs under the new username when it's needed
+                    self.index_source = None
+            return
+        with self.lock, FileLock(self.appointments_file) as lock:
+            self.noticeVersion(lock.version)
+            appointments = self.appointment_file.get(old_username)
+            if appointments is None:
+                return
+            self.appointment_file.set(username, appointments)
+            self.appointment_file.remove(old_username)
+            lock.bump()
+            self.cache_count = lock.version
+            self.cache = None
+            self.index_source = None
+
+    """
+    Get the whole appointment file, only parsing it again if it changed since the last time
+    """
+    def loadAppointments(self):
+        with self.lock:
+            version = fileVersion(self.appointments_file)
+            if self.cache is None or version!=self.cache_version:
+                self.cache = readFileJSON(self.appointments_file) or {}
+                self.cache_version = version
+            return self.cache
+
+    def getAppointments(self, username: str):
+        if self.journal is not None:
+            return self.journal.get(username)
+        with self.lock:
+            return self.appointment_file.get(username)
+
+    """
+    Get every user's appointments and the ID index for them (Call with the lock held)
+    """
+    def indexedAppointments(self):
+        if self.journal is not None:
+            self.journal.refresh()
+        state = self.journal.state if self.journal is not None else self.loadAppointments()
+        if state is not self.index_source:
+            self.index = AppointmentIndex(state)
+            self.index_source = state
+        return state, self.index
+
+    def getAppointment(self, appointment_id: str):
+        with self.lock, (self.journal.lock if self.journal is not None else self.lock):
+            state, index = self.indexedAppointments()
+            found = index.find(appointment_id)
+            if found is None:
+                return None
+            username, position = found
+            return username, copy.deepcopy(state[username][position])
+
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        assignIds(appointments)
+        # In journal mode only the user's new list gets appended to the journal (Checked against what other programs
+        # appended first, with the file lock held)
+        if self.journal is not None:
+            with self.lock, self.journal.locked():
+                if expected is not None and (self.journal.state.get(username) or [])!=expected:
+                    raise ConflictError(f"{username}'s appointments changed")
+                self.journal.set(username, appointments)
+                self.updateIndex(self.journal.state, username)
+            return
+        with self.lock, FileLock(self.appointments_file) as lock:
+            # Another program saved since we last read the file, so read it again
+            self.noticeVersion(lock.version)
+            # Only this user's appointments matter; other users' changes are kept either way
+            if expected is not None and (self.appointment_file.get(username) or [])!=expected:
+                raise ConflictError(f"{username}'s appointments changed")
+            cached = self.cache is not None and self.cache_version==fileVersion(self.appointments_file)
+            # Only this user's part of the file changes; everyone else's bytes are copied over as they are
+            self.appointment_file.set(username, appointments)
+            lock.bump()
+            self.cache_count = lock.version
+            # Keep the whole parsed file (If something needed it) up to date instead of parsing it again
+            if cached:
+                self.cache[username] = copy.deepcopy(appointments)
+                self.cache_version = fileVersion(self.appointments_file)
+                self.updateIndex(self.cache, username)
+            else:
+                self.cache = None
+
+    """
+    Forget everything read from the appointment file if another program saved it since this one last did
+    (Call with the lock held, with the save count from the lock file)
+    """
+    def noticeVersion(self, version: int):
+        if version!=self.cache_count:
+            self.changes += 1
+            self.cache = None
+            self.appointment_file.forget()
+
+    def appointmentsVersion(self):
+        if self.journal is not None:
+            with self.lock:
+                self.journal.refresh()
+                return self.journal.changes
+        with self.lock:
+            version = readLockVersion(self.appointments_file)
+            self.noticeVersion(version)
+            self.cache_count = version
+            return self.changes
+
+    def bookingLock(self):
+        return FileLock(self.appointments_file + ".booking")
+
+    """
+    Write the whole appointment file and remember that the cache matches it (Call with the lock and the file lock held)
+    """
+    def saveAppointments(self, d: dict, lock: FileLock):
+        writeJSONAtomic(d, self.appointments_file)
+        lock.bump()
+        self.cache_version = fileVersion(self.appointments_file)
+        self.cache_count = lock.version
+
+    def addAppointments(self, appointments: dict):
+        updated = {}
+        if self.journal is not None:
+            with self.lock, self.journal.locked():
+                for username in appointments:
+                    updated[username] = copy.deepcopy(self.journal.state.get(username) or []) + [copy.deepcopy(i) for i in appointments[username]]
+                    assignIds(updated[username])
+                    self.journal.set(username, updated[username])
+                    self.updateIndex(self.journal.state, username)
+            return copy.deepcopy(updated)
+        with self.lock, FileLock(self.appointments_file) as lock:
+            self.noticeVersion(lock.version)
+            for username in appointments:
+                updated[username] = (self.appointment_file.get(username) or []) + [copy.deepcopy(i) for i in appointments[username]]
+                assignIds(updated[username])
+            # Every user's new list goes into the file in one write
+            self.appointment_file.setMany(updated)
+            lock.bump()
+            self.cache_count = lock.version
+            self.cache = None
+        return updated
+
+    """
+    Update a user's entries in the ID index, if the index is for these appointments (Otherwise it gets made again when needed)
+    """
+    def updateIndex(self, state: dict, username: str):
+        if state is self.index_source:
+            self.index.setUser(username, state[username])
+
+    """
+    Give every appointment without an ID one, with a single write
+    """
+    def migrateIds(self):
+        if self.journal is not None:
+            with self.lock, self.journal.locked():
+                for username in list(self.journal.state):
+                    appointments = copy.deepcopy(self.journal.state[username])
+                    if assignIds(appointments):
+                        self.setAppointments(username, appointments)
+            return
+        with self.lock:
+            if not self.appointment_file.missingIds():
+                return
+            with FileLock(self.appointments_file) as lock:
+                # Read it again in case another program migrated it first
+                self.cache = None
+                d = self.loadAppointments()
+                missing = False
+                for username in d:
+                    missing = assignIds(d[username]) or missing
+                if missing:
+                    self.saveAppointments(d, lock)
+
+    def appointmentsOn(self, date: str):
+        found = {}
+        for username, appointments in self.allAppointments():
+            same_day = [i for i in appointments if i["Date"]==date]
+            if same_day:
+                found[username] = same_day
+        return found
+
+    def allAppointments(self):
+        if self.journal is not None:
+            with self.journal.lock:
+                self.journal.refresh()
+                d = copy.deepcopy(self.journal.state)
+            return iter(d.items())
+        return self.streamAppointments()
+
+    """
+    Go through every user's appointments one user at a time, decoding only that user's part of the file
+    (So the whole file is never parsed or copied at once)
+    """
+    def streamAppointments(self):
+        with self.lock:
+            usernames = self.appointment_file.usernames()
+        for username in usernames:
+            with self.lock:
+                appointments = self.appointment_file.get(username)
+            # Users removed since the names were read are skipped
+            if appointments is not None:
+                yield username, appointments
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        with self.lock:
+            self.appointment_file.close()
+
+"""
+Keeps everything in dictionaries and never touches the disk; meant for tests
+"""
+class MemoryBackend(Backend):
+    def __init__(self, users: list = None, appointments: dict = None):
+        self.users = UserStore(None)
+        for user in users or []:
+            self.users.add(copy.deepcopy(user))
+        self.appointments = copy.deepcopy(appointments) if appointments else {}
+        for username in self.appointments:
+            assignIds(self.appointments[username])
+        self.index = AppointmentIndex(self.appointments)
+
+    def getUser(self, username: str):
+        return self.users.get(username)
+
+    def emailTaken(self, email: str):
+        return self.users.emailTaken(email)
+
+    def phoneTaken(self, phone: str):
+        return self.users.phoneTaken(phone)
+
+    def addUser(self, data: dict):
+        self.users.add(data)
+
+    def addUsers(self, users: list):
+        return self.users.addMany(users)
+
+    def allUsers(self):
+        return self.users.all()
+
+    def updateCredentials(self, old_username: str, username: str, password: str):
+        return self.users.updateCredentials(old_username, username, password, self.moveAppointments)
+
+    def moveAppointments(self, old_username: str, username: str):
+        if old_username in self.appointments:
+            self.appointments[username] = self.appointments.pop(old_username)
+            self.index.setUser(old_username, [])
+            self.index.setUser(username, self.appointments[username])
+
+    def getAppointments(self, username: str):
+        return copy.deepcopy(self.appointments.get(username))
+
+    def getAppointment(self, appointment_id: str):
+        found = self.index.find(appointment_id)
+        if found is None:
+            return None
+        username, position = found
+        return username, copy.deepcopy(self.appointments[username][position])
+
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        if expected is not None and (self.appointments.get(username) or [])!=expected:
+            raise ConflictError(f"{username}'s appointments changed")
+        assignIds(appointments)
+        self.appointments[username] = copy.deepcopy(appointments)
+        self.index.setUser(username, self.appointments[username])
+
+    def addAppointments(self, appointments: dict):
+        for username in appointments:
+            self.appointments.setdefault(username, []).extend([copy.deepcopy(i) for i in appointments[username]])
+            assignIds(self.appointments[username])
+            self.index.setUser(username, self.appointments[username])
+        return {username: copy.deepcopy(self.appointments[username]) for username in appointments}
+
+    def migrateIds(self):
+        # Done when the appointments are given to the backend
+        pass
+
+    def appointmentsOn(self, date: str):
+        found = {}
+        for username in self.appointments:
+            same_day = [i for i in self.appointments[username] if i["Date"]==date]
+            if same_day:
+                found[username] = copy.deepcopy(same_day)
+        return found
+
+    def allAppointments(self):
+        return iter(copy.deepcopy(self.appointments).items())
+
+"""
+Keeps users and appointments in an SQLite database with indexes on the columns we search by
+"""
+class SqliteBackend(Backend):
+    def __init__(self, file = "habs.db"):
+        self.file = file
+        # The connection is used from worker threads too, so guard it with a lock
+        self.connection = sqlite3.connect(file, check_same_thread=False)
+        self.lock = threading.RLock()
+        with self.lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    email TEXT,
+                    phone TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS users_email ON users (email);
+                CREATE INDEX IF NOT EXISTS users_phone ON users (phone);
+                CREATE TABLE IF NOT EXISTS appointments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS appointments_user ON appointments (username, position);
+                CREATE INDEX IF NOT EXISTS appointments_date ON appointments (date);
+            """)
+            # Databases made before appointments had IDs don't have the column yet (migrateIds fills it in)
+            columns = [i[1] for i in self.connection.execute("PRAGMA table_info(appointments)")]
+            if "appointment_id" not in columns:
+                self.connection.execute("ALTER TABLE appointments ADD COLUMN appointment_id TEXT")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS appointments_id ON appointments (appointment_id)")
+
+    """
+    Run a query and get every row back
+    """
+    def query(self, sql: str, parameters = ()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def getUser(self, username: str):
+        rows = self.query("SELECT data FROM users WHERE username = ?", (username,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def emailTaken(self, email: str):
+        return bool(self.query("SELECT 1 FROM users WHERE email = ?", (email.strip().lower(),)))
+
+    def phoneTaken(self, phone: str):
+        return bool(self.query("SELECT 1 FROM users WHERE phone = ?", (normalizePhone(phone),)))
+
+    def addUser(self, data: dict):
+        try:
+            with self.lock, self.connection:
+                self.insertUser(data)
+        except sqlite3.IntegrityError:
+            raise ConflictError(f"The username {data.get('Username')} is already taken")
+
+    def addUsers(self, users: list):
+        taken = []
+        # One transaction for all of them; a taken username only fails its own row
+        with self.lock, self.connection:
+            for data in users:
+                try:
+                    self.insertUser(data)
+                except sqlite3.IntegrityError:
+                    taken.append(data)
+        return taken
+
+    def allUsers(self):
+        for row in self.query("SELECT data FROM users ORDER BY rowid"):
+            yield json.loads(row[0])
+
+    """
+    Insert one user row, optionally replacing a user with the same username (The caller handles the transaction)
+    """
+    def insertUser(self, data: dict, replace = False):
+        self.connection.execute(f"INSERT {'OR REPLACE ' if replace else ''}INTO users (username, email, phone, data) VALUES (?, ?, ?, ?)",
+                                (data.get("Username"), (data.get("Email Address") or "").strip().lower(),
+                                 normalizePhone(data.get("Phone Number") or ""), json.dumps(data, ensure_ascii=False)))
+
+    def updateCredentials(self, old_username: str, username: str, password: str):
+        with self.lock, self.connection:
+            user = self.getUser(old_username)
+            if user is None:
+                return None
+            user["Username"] = username
+            user["Password"] = password
+            try:
+                self.connection.execute("UPDATE users SET username = ?, data = ? WHERE username = ?",
+                                        (username, json.dumps(user, ensure_ascii=False), old_username))
+            except sqlite3.IntegrityError:
+                raise ConflictError(f"The username {username} is already taken")
+            # In the same transaction, so the user and their appointments are never apart
+            if username!=old_username:
+                self.moveAppointments(old_username, username)
+            return user
+
+    def moveAppointments(self, old_username: str, username: str):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM appointments WHERE username = ?", (username,))
+            self.connection.execute("UPDATE appointments SET username = ? WHERE username = ?", (username, old_username))
+
+    def getAppointments(self, username: str):
+        rows = self.query("SELECT data FROM appointments WHERE username = ? ORDER BY position", (username,))
+        return [json.loads(i[0]) for i in rows] if rows else None
+
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        # Only this user's rows get replaced, all in one transaction
+        with self.lock, self.connection:
+            if expected is not None:
+                # Take the write lock before checking, so nobody can change the rows in between
+                self.connection.execute("BEGIN IMMEDIATE")
+                if (self.getAppointments(username) or [])!=expected:
+                    raise ConflictError(f"{username}'s appointments changed")
+            self.connection.execute("DELETE FROM appointments WHERE username = ?", (username,))
+            self.insertAppointments(username, appointments)
+
+    """
+    Insert a user's appointment rows, numbering them from start (The caller handles the transaction)
+    """
+    def insertAppointments(self, username: str, appointments: list, start = 0):
+        assignIds(appointments)
+        self.connection.executemany("INSERT INTO appointments (username, position, date, data, appointment_id) VALUES (?, ?, ?, ?, ?)",
+                                    [(username, i, a["Date"], json.dumps(a, ensure_ascii=False), a["ID"]) for i, a in enumerate(appointments, start)])
+
+    def addAppointments(self, appointments: dict):
+        # Every user's rows go in with one transaction
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for username in appointments:
+                start = self.connection.execute("SELECT COALESCE(MAX(position)+1, 0) FROM appointments WHERE username = ?", (username,)).fetchone()[0]
+                self.insertAppointments(username, [copy.deepcopy(i) for i in appointments[username]], start)
+        return {username: self.getAppointments(username) for username in appointments}
+
+    def getAppointment(self, appointment_id: str):
+        rows = self.query("SELECT username, data FROM appointments WHERE appointment_id = ?", (appointment_id,))
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def appointmentsVersion(self):
+        # SQLite changes this only when another connection saves something
+        return self.query("PRAGMA data_version")[0][0]
+
+    def bookingLock(self):
+        return FileLock(self.file + ".booking")
+
+    def migrateIds(self):
+        # The index on the ID column makes this quick when there's nothing to do
+        if self.query("SELECT 1 FROM appointments WHERE appointment_id IS NULL LIMIT 1"):
+            super().migrateIds()
+
+    def getAppointmentsBetween(self, username: str, start: str, end: str):
+        rows = self.query("SELECT data FROM appointments WHERE username = ? AND date BETWEEN ? AND ? ORDER BY position",
+                          (username, start, end))
+        return [json.loads(i[0]) for i in rows]
+
+    def appointmentsOn(self, date: str):
+        found = {}
+        for username, data in self.query("SELECT username, data FROM appointments WHERE date = ? ORDER BY username, position", (date,)):
+            found.setdefault(username, []).append(json.loads(data))
+        return found
+
+    def allAppointments(self):
+        # Rows come back grouped by user, so each user's list can be handed out as soon as it's done
+        username, appointments = None, []
+        for row in self.query("SELECT username, data FROM appointments ORDER BY username, position"):
+            if row[0]!=username and appointments:
+                yield username, appointments
+                appointments = []
+            username = row[0]
+            appointments.append(json.loads(row[1]))
+        if appointments:
+            yield username, appointments
+
+    """
+    Copy the users and appointments from the JSON files into the database in one transaction
+    """
+    def migrateFromJSON(self, data_file = "data.json", appointments_file = "appointments.json"):
+        users = readFileJSON(data_file) or {"users": []}
+        appointments = readFileJSON(appointments_file) or {}
+        with self.lock, self.connection:
+            # Like the JSON store, a repeated username in data.json keeps the last one
+            for user in users.get("users", []):
+                self.insertUser(user, replace=True)
+            for username in appointments:
+                self.insertAppointments(username, appointments[username])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+"""
+Keeps appointments in an appointments/ directory split into buckets: each user always goes in the
+same bucket file (Picked from a hash of their username), so saving one user only rewrites their
+bucket and programs saving different users don't wait for each other. manifest.json says how many
+buckets there are. Users are still in data.json
+"""
+class ShardedBackend(Backend):
+    def __init__(self, directory = "appointments", data_file = "data.json"):
+        self.users = getUserStore(data_file)
+        self.directory = directory
+        manifest = readFileJSON(os.path.join(directory, "manifest.json"))
+        if not manifest or manifest.get("layout")!="hash":
+            raise ValueError(f"{directory} has no manifest.json (Run: python project.py --cli shard)")
+        self.buckets = manifest["buckets"]
+        # One of each of these per bucket
+        self.files = [AppointmentFile(shardFile(directory, i)) for i in range(self.buckets)]
+        self.locks = [threading.RLock() for i in range(self.buckets)]
+        # The save count from each bucket's lock file, so a save by another program is noticed
+        self.counts = [None]*self.buckets
+        # How many times another program was seen to have saved a bucket (See appointmentsVersion)
+        self.changes = 0
+        # Each bucket's appointment ID index (None until it's needed) and the version of the bucket file it was built
+        # from, so getAppointment doesn't search every bucket
+        self.indexes = [None]*self.buckets
+        self.indexed = [None]*self.buckets
+
+    def getUser(self, username: str):
+        return self.users.get(username)
+
+    def emailTaken(self, email: str):
+        return self.users.emailTaken(email)
+
+    def phoneTaken(self, phone: str):
+        return self.users.phoneTaken(phone)
+
+    def addUser(self, data: dict):
+        self.users.add(data)
+
+    def addUsers(self, users: list):
+        return self.users.addMany(users)
+
+    def allUsers(self):
+        return self.users.all()
+
+    def updateCredentials(self, old_username: str, username: str, password: str):
+        return self.users.updateCredentials(old_username, username, password, self.moveAppointments)
+
+    def moveAppointments(self, old_username: str, username: str):
+        # Both buckets are locked (Always in the same order, so two programs can't wait on each other)
+        shards = sorted({self.shardOf(old_username), self.shardOf(username)})
+        with ExitStack() as stack:
+            locks = {}
+            for i in shards:
+                stack.enter_context(self.locks[i])
+                locks[i] = stack.enter_context(FileLock(self.files[i].file))
+                self.noticeVersion(i, locks[i].version)
+            old, new = self.shardOf(old_username), self.shardOf(username)
+            appointments = self.files[old].get(old_username)
+            if appointments is None:
+                return
+            self.files[new].set(username, appointments)
+            self.files[old].remove(old_username)
+            for i in shards:
+                locks[i].bump()
+                self.counts[i] = locks[i].version
+                # Renames are rare, so the indexes are just built again
+                self.indexes[i] = None
+
+    """
+    Get the bucket a user is in
+    """
+    def shardOf(self, username: str):
+        return shardOf(username, self.buckets)
+
+    def getAppointments(self, username: str):
+        i = self.shardOf(username)
+        with self.locks[i]:
+            return self.files[i].get(username)
+
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        assignIds(appointments)
+        i = self.shardOf(username)
+        # Only this user's bucket is locked and written
+        with self.locks[i], FileLock(self.files[i].file) as lock:
+            self.noticeVersion(i, lock.version)
+            if expected is not None and (self.files[i].get(username) or [])!=expected:
+                raise ConflictError(f"{username}'s appointments changed")
+            version = self.fileVersion(i)
+            self.files[i].set(username, appointments)
+            lock.bump()
+            self.counts[i] = lock.version
+            self.indexSaved(i, version, {username: appointments})
+
+    def addAppointments(self, appointments: dict):
+        by_shard = {}
+        for username in appointments:
+            by_shard.setdefault(self.shardOf(username), []).append(username)
+        updated = {}
+        # One write for each bucket that has any of the users in it
+        for i in by_shard:
+            with self.locks[i], FileLock(self.files[i].file) as lock:
+                self.noticeVersion(i, lock.version)
+                updates = {}
+                for username in by_shard[i]:
+                    updates[username] = (self.files[i].get(username) or []) + [copy.deepcopy(a) for a in appointments[username]]
+                    assignIds(updates[username])
+                version = self.fileVersion(i)
+                self.files[i].setMany(updates)
+                lock.bump()
+                self.counts[i] = lock.version
+                self.indexSaved(i, version, updates)
+            updated.update(updates)
+        return updated
+
+    """
+    Forget what was read from a bucket if another program saved it since this one last did (Call with the bucket's lock held)
+    """
+    def noticeVersion(self, i: int, version: int):
+        if version!=self.counts[i]:
+            self.changes += 1
+            self.files[i].forget()
+
+    def appointmentsVersion(self):
+        for i in range(self.buckets):
+            with self.locks[i]:
+                version = readLockVersion(self.files[i].file)
+                self.noticeVersion(i, version)
+                self.counts[i] = version
+        return self.changes
+
+    def bookingLock(self):
+        return FileLock(os.path.join(self.directory, "booking"))
+
+    """
+    Run a function on every bucket at once, giving back what it gave back for each bucket in order
+    """
+    def eachShard(self, function):
+        # Imported here so programs that never go through every bucket don't have to
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor() as pool:
+            return list(pool.map(function, range(self.buckets)))
+
+    """
+    Get every user's appointments in one bucket
+    """
+    def readShard(self, i: int):
+        with self.locks[i]:
+            self.files[i].refresh()
+            if self.files[i].parsed is not None:
+                return copy.deepcopy(self.files[i].parsed)
+            return {username: self.files[i].get(username) for username in self.files[i].spans}
+
+    """
+    Get the version of a bucket file as it is now (Call with the bucket's lock held)
+    """
+    def fileVersion(self, i: int):
+        self.files[i].refresh()
+        return self.files[i].version
+
+    """
+    Keep a bucket's ID index up to date after some of its users were saved; version is what fileVersion gave back
+    before the save. If the index was already behind, it's built again the next time it's needed
+    """
+    def indexSaved(self, i: int, version, updates: dict):
+        if self.indexes[i] is not None and self.indexed[i]==version:
+            for username in updates:
+                self.indexes[i].setUser(username, updates[username])
+            self.indexed[i] = self.files[i].version
+        else:
+            self.indexes[i] = None
+
+    """
+    Get a bucket's ID index, reading the bucket again only if it changed since the index was built
+    """
+    def indexShard(self, i: int):
+        with self.locks[i]:
+            version = self.fileVersion(i)
+            if self.indexes[i] is None or self.indexed[i]!=version:
+                self.indexes[i] = AppointmentIndex(self.readShard(i))
+                self.indexed[i] = version
+            return self.indexes[i]
+
+    """
+    Get (username, appointment) for an ID the index found, reading only that user's appointments (None if it's gone)
+    """
+    def appointmentAt(self, found: tuple, appointment_id: str):
+        username, position = found
+        appointments = self.getAppointments(username) or []
+        if position<len(appointments) and appointments[position].get("ID")==appointment_id:
+            return username, appointments[position]
+        for appointment in appointments:
+            if appointment.get("ID")==appointment_id:
+                return username, appointment
+        return None
+
+    def getAppointment(self, appointment_id: str):
+        # The indexes this program already has are tried first, so most lookups read one user's appointments
+        for index in self.indexes:
+            found = index.find(appointment_id) if index is not None else None
+            if found is not None:
+                appointment = self.appointmentAt(found, appointment_id)
+                if appointment is not None:
+                    return appointment
+                break
+        # Not there (Or the index was behind), so every index is brought up to date; only buckets that changed are read
+        for index in self.eachShard(self.indexShard):
+            found = index.find(appointment_id)
+            if found is not None:
+                return self.appointmentAt(found, appointment_id)
+        return None
+
+    def appointmentsOn(self, date: str):
+        found = {}
+        for username, appointments in self.allAppointments():
+            same_day = [i for i in appointments if i["Date"]==date]
+            if same_day:
+                found[username] = same_day
+        return found
+
+    def allAppointments(self):
+        for shard in self.eachShard(self.readShard):
+            yield from shard.items()
+
+    def migrateIds(self):
+        def migrate(i):
+            with self.locks[i]:
+                if not self.files[i].missingIds():
+                    return
+                with FileLock(self.files[i].file) as lock:
+                    d = readFileJSON(self.files[i].file) or {}
+                    if any([assignIds(d[username]) for username in d]):
+                        writeJSONAtomic(d, self.files[i].file)
+                        lock.bump()
+                        self.indexes[i] = None
+        self.eachShard(migrate)
+
+    def close(self):
+        for i in range(self.buckets):
+            with self.locks[i]:
+                self.files[i].close()
+
+"""
+Get the bucket a username goes in (The same in every program, unlike hash())
+"""
+def shardOf(username: str, buckets: int):
+    return int.from_bytes(hashlib.sha1(username.encode("utf-8")).digest()[:8], "big")%buckets
+
+"""
+Get the file name of a bucket
+"""
+def shardFile(directory: str, i: int):
+    return os.path.join(directory, f"{i:04d}.json")
+
+"""
+Split appointments.json into buckets in a directory, writing the manifest last so the sharded
+storage is only used once every bucket is there. appointments.json is left as it was (As a backup)
+"""
+def shardAppointments(appointments_file = "appointments.json", directory = "appointments", buckets = 64):
+    manifest_file = os.path.join(directory, "manifest.json")
+    if os.path.exists(manifest_file):
+        raise ValueError(f"{directory} is already sharded")
+    os.makedirs(directory, exist_ok=True)
+    # Nobody can save to appointments.json while it's being copied
+    with FileLock(appointments_file):
+        appointments = readFileJSON(appointments_file) if os.path.exists(appointments_file) else {}
+        shards = [{} for i in range(buckets)]
+        for username in appointments or {}:
+            assignIds(appointments[username])
+            shards[shardOf(username, buckets)][username] = appointments[username]
+        for i in range(buckets):
+            writeJSONAtomic(shards[i], shardFile(directory, i))
+        writeJSONAtomic({"layout": "hash", "buckets": buckets}, manifest_file)
+    return len(appointments or {})
+
+# The storage backend everything uses, picked the first time it's needed
+backend = None
+backend_lock = threading.Lock()
+
+"""
+Create the backend chosen with environment variables:
+HABS_STORAGE=json (default, or sharded if appointments/manifest.json exists), sharded, memory or sqlite,
+HABS_JOURNAL=1 for journal mode with JSON and HABS_DB for the SQLite file (habs.db by default)
+"""
+def backendFromEnvironment():
+    kind = os.environ.get("HABS_STORAGE") or ("sharded" if os.path.exists(os.path.join("appointments", "manifest.json")) else "json")
+    if kind=="sharded":
+        return ShardedBackend()
+    if kind=="memory":
+        return MemoryBackend()
+    if kind=="sqlite":
+        file = os.environ.get("HABS_DB", "habs.db")
+        new = not os.path.exists(file)
+        sqlite = SqliteBackend(file)
+        # The first time the database is made it gets everything from the JSON files
+        if new:
+            sqlite.migrateFromJSON()
+        return sqlite
+    return JsonBackend(journal=bool(os.environ.get("HABS_JOURNAL")))
+
+"""
+Create the backend chosen with environment variables, giving any appointments saved before there were IDs one
+"""
+def openBackend():
+    new_backend = backendFromEnvironment()
+    new_backend.migrateIds()
+    return new_backend
+
+"""
+Get the storage backend, creating it the first time
+"""
+def getBackend():
+    global backend
+    with backend_lock:
+        if backend is None:
+            backend = openBackend()
+    return backend
+
+"""
+Swap the storage backend (e.g. a MemoryBackend in tests); returns the old one
+"""
+def setBackend(new_backend: Backend):
+    global backend
+    old = backend
+    backend = new_backend
+    return old
@@ -0,0 +1,11 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Lets the tests import the program's modules and find its data files (python -m pytest)
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The modules open their data files (e.g. postal_codes.csv) from where the program runs
+os.chdir(ROOT)
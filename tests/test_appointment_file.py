@@ -0,0 +1,150 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for AppointmentFile saving users in place (Only their part of appointments.json is rewritten)
+
+import json
+import random
+import multiprocessing
+import pytest
+from storage import AppointmentFile, FileLock, writeJSONAtomic
+
+"""
+Make count made up appointments for a user (The reasons make each list a different length)
+"""
+def makeAppointments(username: str, count: int, rng: random.Random):
+    return [{"Date": f"2027-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "Time": f"{rng.randint(8, 16):02d}:00",
+             "Reasons": ["rash"]*rng.randint(1, 4), "ID": f"{username}-{i}-{rng.getrandbits(32):x}"} for i in range(count)]
+
+"""
+Make an appointments.json the usual way; gives back the file name and what is in it
+"""
+def makeFile(tmp_path, rng: random.Random, users: int = 6):
+    file = str(tmp_path/"appointments.json")
+    reference = {f"user{i}": makeAppointments(f"user{i}", rng.randint(0, 3), rng) for i in range(users)}
+    # A name that needs an escape in JSON
+    reference["Zoë"] = makeAppointments("Zoë", 2, rng)
+    writeJSONAtomic(reference, file)
+    return file, reference
+
+"""
+Check the file is exactly what writing the whole dictionary would give, and that both the open AppointmentFile
+and a new one read every user back right
+"""
+def checkFile(appointment_file: AppointmentFile, reference: dict):
+    with open(appointment_file.file) as f:
+        assert f.read() == json.dumps(reference, indent=4)
+    fresh = AppointmentFile(appointment_file.file)
+    for username in reference:
+        assert appointment_file.get(username) == reference[username]
+        assert fresh.get(username) == reference[username]
+    assert appointment_file.usernames() == list(reference)
+    assert fresh.parsed is None and appointment_file.parsed is None
+    fresh.close()
+
+"""
+Lists getting longer, shorter and empty, at the start, middle and end of the file, and new users added at the end
+"""
+def testSetChangesLengths(tmp_path):
+    rng = random.Random(1)
+    file, reference = makeFile(tmp_path, rng)
+    appointment_file = AppointmentFile(file)
+    for username, count in [("user0", 5), ("user3", 0), ("Zoë", 1), ("user5", 4), ("new", 2), ("user0", 1), ("new", 0), ("user3", 3)]:
+        reference[username] = makeAppointments(username, count, rng)
+        appointment_file.set(username, reference[username])
+        checkFile(appointment_file, reference)
+    appointment_file.close()
+
+"""
+Saving many users at once, some longer and some shorter, together with new users
+"""
+def testSetManyChangesLengths(tmp_path):
+    rng = random.Random(2)
+    file, reference = makeFile(tmp_path, rng)
+    appointment_file = AppointmentFile(file)
+    for updates in [{"user1": 4, "user4": 0, "added1": 2}, {"Zoë": 5, "user0": 0, "user5": 1, "added2": 1, "added3": 0}, {"added1": 0, "user1": 1}]:
+        updates = {username: makeAppointments(username, updates[username], rng) for username in updates}
+        reference.update(updates)
+        appointment_file.setMany(updates)
+        checkFile(appointment_file, reference)
+    appointment_file.close()
+
+"""
+Saves and removes in a random order, checking the file after each one
+"""
+@pytest.mark.parametrize("seed", range(5))
+def testInterleavedSetsAndRemoves(tmp_path, seed):
+    rng = random.Random(seed)
+    file, reference = makeFile(tmp_path, rng)
+    appointment_file = AppointmentFile(file)
+    names = list(reference) + ["extra1", "extra2"]
+    for step in range(40):
+        action = rng.choice(["set", "set", "setMany", "remove"])
+        if action=="set":
+            username = rng.choice(names)
+            reference[username] = makeAppointments(username, rng.randint(0, 5), rng)
+            appointment_file.set(username, reference[username])
+        elif action=="setMany":
+            updates = {username: makeAppointments(username, rng.randint(0, 5), rng) for username in rng.sample(names, 3)}
+            # New users go after the last one, in the order they were given
+            for username in updates:
+                reference[username] = updates[username]
+            appointment_file.setMany(updates)
+        else:
+            username = rng.choice(names)
+            reference.pop(username, None)
+            appointment_file.remove(username)
+        checkFile(appointment_file, reference)
+    appointment_file.close()
+
+"""
+The file starting out empty (Or not there at all)
+"""
+def testEmptyFile(tmp_path):
+    file = str(tmp_path/"appointments.json")
+    appointment_file = AppointmentFile(file)
+    appointment_file.set("first", makeAppointments("first", 2, random.Random(3)))
+    checkFile(appointment_file, {"first": appointment_file.get("first")})
+    writeJSONAtomic({}, file)
+    updates = {"a": makeAppointments("a", 1, random.Random(4)), "b": []}
+    appointment_file.setMany(updates)
+    checkFile(appointment_file, updates)
+    appointment_file.close()
+
+"""
+One writer process: adds appointments one at a time to its own user and to a user every writer shares, each time
+reading the list and saving it under the file lock (Like the backends do)
+"""
+def addAppointments(file: str, writer: int, count: int):
+    appointment_file = AppointmentFile(file)
+    rng = random.Random(writer)
+    for i in range(count):
+        for username in [f"writer{writer}", "shared"]:
+            with FileLock(file):
+                appointments = appointment_file.get(username) or []
+                appointment_file.set(username, appointments + makeAppointments(f"{username}-{writer}-{i}", 1, rng))
+    appointment_file.close()
+
+"""
+Writers in separate processes saving the same file at once: nobody's appointments are lost and the file is
+still laid out the usual way
+"""
+def testConcurrentWriters(tmp_path):
+    rng = random.Random(5)
+    file, reference = makeFile(tmp_path, rng)
+    writers, count = 4, 15
+    processes = [multiprocessing.Process(target=addAppointments, args=(file, writer, count)) for writer in range(writers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    with open(file) as f:
+        saved = json.load(f)
+    for username in reference:
+        assert saved[username] == reference[username]
+    for writer in range(writers):
+        assert len(saved[f"writer{writer}"]) == count
+    assert len(saved["shared"]) == writers*count
+    assert len({i["ID"] for i in saved["shared"]}) == writers*count
+    with open(file) as f:
+        assert f.read() == json.dumps(saved, indent=4)
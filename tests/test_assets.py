@@ -0,0 +1,57 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for loading assets again when their files change
+
+import os
+from assets import AssetRegistry
+
+"""
+Change a file and move its mtime on, so the change is seen even on file systems with coarse times
+"""
+def changeFile(file, text: str):
+    stat = os.stat(file)
+    file.write_text(text)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns+10**9))
+
+"""
+An asset built from another file is loaded again when that file changes, not only when its own file does
+"""
+def testDependencyChangeReloads(tmp_path):
+    codes, sites = tmp_path/"codes.csv", tmp_path/"sites.json"
+    codes.write_text("a")
+    sites.write_text("x")
+    loads = []
+    def loadSites(file):
+        loads.append(file)
+        return sites.read_text() + codes.read_text()
+    registry = AssetRegistry()
+    registry.register(str(sites), loadSites, depends=[str(codes)])
+    assert registry.get(str(sites)) == "xa"
+    assert registry.get(str(sites)) == "xa" and len(loads) == 1
+    changeFile(codes, "bb")
+    assert registry.get(str(sites)) == "xbb" and len(loads) == 2
+    changeFile(sites, "y")
+    assert registry.get(str(sites)) == "ybb" and len(loads) == 3
+
+"""
+A cached asset is only taken from the cache file if the files it is built from haven't changed either
+"""
+def testCacheChecksDependencies(tmp_path):
+    codes, sites, cache = tmp_path/"codes.csv", tmp_path/"sites.json", str(tmp_path/"cache.json")
+    codes.write_text("a")
+    sites.write_text("x")
+    # Like the real loaders, it takes back what was cached instead of reading the files
+    def loadSites(file, cached: str = None):
+        return "cached " + cached if cached is not None else sites.read_text() + codes.read_text()
+    registry = AssetRegistry()
+    registry.register(str(sites), loadSites, depends=[str(codes)])
+    registry.preload(cache)
+    fresh = AssetRegistry()
+    fresh.register(str(sites), loadSites, depends=[str(codes)])
+    fresh.loadCache(cache)
+    assert fresh.get(str(sites)) == "cached xa"
+    changeFile(codes, "b")
+    stale = AssetRegistry()
+    stale.register(str(sites), loadSites, depends=[str(codes)])
+    stale.loadCache(cache)
+    assert stale.get(str(sites)) == "xb"
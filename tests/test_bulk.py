@@ -0,0 +1,68 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for importing users and appointments in bulk
+
+import json
+import pytest
+import bulk
+import storage
+from storage import MemoryBackend
+
+"""
+A user that passes every sign up check
+"""
+def makeUser(username: str, number: int):
+    return {"First Name": "Ali", "Last Name": "Abid", "Email Address": f"{username}@example.com",
+            "Phone Number": f"41655500{number:02d}", "Address": "1 Main St", "Postal Code": "L6E 1W7",
+            "Username": username, "Password": "Password1$"}
+
+"""
+Write records as a JSON lines file; gives back the file name
+"""
+def writeRecords(tmp_path, records: list):
+    file = str(tmp_path/"records.jsonl")
+    with open(file, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return file
+
+"""
+Use a memory backend for one test
+"""
+@pytest.fixture
+def backend():
+    old = storage.setBackend(MemoryBackend())
+    yield storage.getBackend()
+    storage.setBackend(old)
+
+"""
+Users and their appointments in the same file are all imported
+"""
+def testImportsUsersAndAppointments(tmp_path, backend):
+    file = writeRecords(tmp_path, [makeUser("first", 1), makeUser("second", 2),
+                                   {"Username": "first", "Date": "2027-01-05", "Time": "10:00", "Reasons": ["rash"]},
+                                   {"Username": "nobody", "Date": "2027-01-05", "Time": "10:00", "Reasons": ["rash"]}])
+    result = bulk.importRecords(file, workers=1)
+    assert (result.users, result.appointments) == (2, 1)
+    assert result.rejected == [(4, "there is no user called nobody")]
+    assert [i["Date"] for i in backend.getAppointments("first")] == ["2027-01-05"]
+
+"""
+When another program takes a username between the check and the save, that user's appointments are rejected
+too (With their own line numbers) instead of being dropped without a word
+"""
+def testTakenUsersAppointmentsAreRejected(tmp_path, backend, monkeypatch):
+    file = writeRecords(tmp_path, [makeUser("first", 1), makeUser("second", 2),
+                                   {"Username": "second", "Date": "2027-01-05", "Time": "10:00", "Reasons": ["rash"]},
+                                   {"Username": "first", "Date": "2027-01-06", "Time": "10:00", "Reasons": ["rash"]},
+                                   {"Username": "second", "Date": "2027-01-07", "Time": "11:00", "Reasons": ["rash"]}])
+    write = bulk.writeManyUsers
+    def otherProgramFirst(users):
+        backend.addUsers([makeUser("second", 3)])
+        return write(users)
+    monkeypatch.setattr(bulk, "writeManyUsers", otherProgramFirst)
+    result = bulk.importRecords(file, workers=1)
+    assert (result.users, result.appointments) == (1, 1)
+    assert sorted(result.rejected) == [(2, "the username second is taken"), (3, "the user was not imported"),
+                                       (5, "the user was not imported")]
+    assert backend.getAppointments("second") in (None, [])
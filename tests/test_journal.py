@@ -0,0 +1,98 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for the appointment journal when several programs share one data directory
+
+import json
+import multiprocessing
+from storage import AppointmentJournal, writeJSONAtomic
+
+"""
+Make an appointment with an ID
+"""
+def makeAppointment(appointment_id: str):
+    return {"Date": "2027-03-01", "Time": "10:00", "Reasons": ["rash"], "ID": appointment_id}
+
+"""
+Load the appointments again the way a program starting up would
+"""
+def freshState(file: str):
+    journal = AppointmentJournal(file)
+    state = journal.state
+    journal.close()
+    return state
+
+"""
+Two journals on the same file (Like two kiosks): one compacting doesn't lose what the other saved before or after
+"""
+def testCompactionKeepsOtherProgramsSaves(tmp_path):
+    file = str(tmp_path/"appointments.json")
+    writeJSONAtomic({}, file)
+    a = AppointmentJournal(file, threshold=200)
+    b = AppointmentJournal(file, threshold=200)
+    a.set("alice", [makeAppointment("a1")])
+    b.set("bob", [makeAppointment(str(i)) for i in range(5)])
+    b.compaction.join()
+    a.set("alice2", [makeAppointment("a2")])
+    a.close()
+    b.close()
+    assert sorted(freshState(file)) == ["alice", "alice2", "bob"]
+    # The snapshot has everything that was there when it was written
+    with open(file) as f:
+        assert sorted(json.load(f)) == ["alice", "bob"]
+
+"""
+A journal sees what another one saved, and removals too
+"""
+def testReadsOtherProgramsSaves(tmp_path):
+    file = str(tmp_path/"appointments.json")
+    a = AppointmentJournal(file)
+    b = AppointmentJournal(file)
+    a.set("alice", [makeAppointment("a1")])
+    assert b.get("alice") == [makeAppointment("a1")]
+    changes = a.changes
+    b.remove("alice")
+    assert a.get("alice") is None
+    assert a.changes > changes
+    a.close()
+    b.close()
+
+"""
+A half written last line (From a crash) is cut off, so later saves aren't lost behind it
+"""
+def testHalfWrittenLine(tmp_path):
+    file = str(tmp_path/"appointments.json")
+    a = AppointmentJournal(file)
+    a.set("alice", [makeAppointment("a1")])
+    a.close()
+    with open(file + ".journal", "a") as f:
+        f.write('{"user": "bob", "appoint')
+    a = AppointmentJournal(file)
+    a.set("carol", [makeAppointment("c1")])
+    a.close()
+    assert sorted(freshState(file)) == ["alice", "carol"]
+
+"""
+One writer process: saves its own users one at a time with a small threshold, so it compacts a lot
+"""
+def saveUsers(file: str, writer: int, count: int):
+    journal = AppointmentJournal(file, threshold=2000)
+    for i in range(count):
+        journal.set(f"writer{writer}_{i}", [makeAppointment(f"{writer}-{i}")])
+    journal.close()
+
+"""
+Writers in separate processes appending and compacting at once: every user they saved is there afterwards
+"""
+def testConcurrentWriters(tmp_path):
+    file = str(tmp_path/"appointments.json")
+    writeJSONAtomic({}, file)
+    writers, count = 4, 40
+    processes = [multiprocessing.Process(target=saveUsers, args=(file, writer, count)) for writer in range(writers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    state = freshState(file)
+    assert len(state) == writers*count
+    assert all(state[f"writer{writer}_{i}"] == [makeAppointment(f"{writer}-{i}")] for writer in range(writers) for i in range(count))
@@ -0,0 +1,47 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for the hospital site lookup when sites.json has mistakes in it
+
+import json
+import pytest
+from postal import SiteIndex
+
+"""
+Write a site file into a temporary directory
+"""
+def writeSites(tmp_path, text: str):
+    file = tmp_path/"sites.json"
+    file.write_text(text)
+    return str(file)
+
+"""
+A site with a bad postal code, no name or the wrong type is left out, and the good ones are still found
+"""
+def testBadSitesAreSkipped(tmp_path, capsys):
+    file = writeSites(tmp_path, json.dumps({"sites": [
+        {"Name": "Bad Code", "Postal Code": "ZZZ"},
+        {"Postal Code": "L6E 1W7"},
+        "Not a site",
+        {"Name": "Good", "Postal Code": "L6E 1W7"},
+        {"Name": "Far", "Latitude": 49.28, "Longitude": -123.12},
+    ]}))
+    index = SiteIndex(file)
+    assert [site.name for site in index.sites] == ["Good", "Far"]
+    assert index.nearestTo("L6E 1W7")[0].site.name == "Good"
+    assert capsys.readouterr().out.count("Skipped a site") == 3
+
+"""
+A file that isn't JSON, or has no list of sites, gives no sites instead of an error
+"""
+@pytest.mark.parametrize("text", ["{not json", "{}", '{"sites": 5}', "[]"])
+def testBrokenFileGivesNoSites(tmp_path, text):
+    index = SiteIndex(writeSites(tmp_path, text))
+    assert index.sites == []
+    assert index.nearestTo("L6E 1W7") == []
+
+"""
+No file means no sites (And nothing is printed)
+"""
+def testMissingFileGivesNoSites(tmp_path, capsys):
+    assert SiteIndex(str(tmp_path/"sites.json")).sites == []
+    assert capsys.readouterr().out == ""
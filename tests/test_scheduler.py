@@ -0,0 +1,69 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for booking through the slot index when saves run into other programs' saves
+
+import pytest
+import scheduler
+import storage
+from storage import MemoryBackend, ConflictError
+
+"""
+A memory backend whose first few saves fail like another kiosk saved first
+"""
+class ConflictingBackend(MemoryBackend):
+    def __init__(self, conflicts: int):
+        super().__init__()
+        self.conflicts = conflicts
+
+    def setAppointments(self, username: str, appointments: list, expected: list = None):
+        if self.conflicts>0:
+            self.conflicts -= 1
+            raise ConflictError(f"{username}'s appointments changed")
+        super().setAppointments(username, appointments, expected)
+
+"""
+Use a backend for one test, with a new slot index
+"""
+@pytest.fixture
+def useBackend():
+    old = storage.setBackend(None)
+    def use(backend):
+        storage.setBackend(backend)
+        scheduler.slot_index = None
+        return backend
+    yield use
+    storage.setBackend(old)
+    scheduler.slot_index = None
+
+"""
+A booking that had to try again still gets the time it asked for (The failed try's reservation doesn't block it)
+"""
+def testRetryKeepsTheTime(useBackend):
+    useBackend(ConflictingBackend(2))
+    placement = scheduler.bookAppointments("alice", [{"Date": "2099-03-02", "Time": "10:00", "Reasons": ["rash"]}])[0]
+    # The date can move with the severity, but the time is still free
+    assert placement.appointment["Time"] == "10:00"
+    saved = storage.getBackend().getAppointments("alice")
+    assert [(i["Date"], i["Time"]) for i in saved] == [(placement.appointment["Date"], "10:00")]
+    # The saved booking takes the slot up
+    assert not scheduler.getSlotIndex().isFree(placement.appointment["Date"], "10:00")
+
+"""
+A booking that never got saved gives its slot back
+"""
+def testFailedBookingFreesTheSlot(useBackend):
+    useBackend(ConflictingBackend(100))
+    with pytest.raises(ConflictError):
+        scheduler.bookAppointments("alice", [{"Date": "2099-03-02", "Time": "10:00", "Reasons": ["rash"]}])
+    assert not scheduler.getSlotIndex().counts
+    assert storage.getBackend().getAppointments("alice") is None
+
+"""
+Two users asking for the same time: the second one is moved to the next free slot
+"""
+def testSecondBookingIsMoved(useBackend):
+    useBackend(MemoryBackend())
+    first = scheduler.bookAppointments("alice", [{"Date": "2099-03-02", "Time": "10:00", "Reasons": ["rash"]}])[0]
+    second = scheduler.bookAppointments("bob", [{"Date": "2099-03-02", "Time": "10:00", "Reasons": ["rash"]}])[0]
+    assert first.appointment["Time"] == "10:00"
+    assert (second.appointment["Date"], second.appointment["Time"]) == (first.appointment["Date"], "10:15")
@@ -0,0 +1,47 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for finding appointments by ID in the sharded storage
+
+import json
+from storage import ShardedBackend, shardAppointments
+
+"""
+Make a sharded directory with a few users in it; gives back two backends on it (Like two programs)
+"""
+def makeShards(tmp_path):
+    appointments = {f"user{i}": [{"Date": "2027-03-01", "Time": f"{10+i}:00", "Reasons": ["rash"], "ID": f"id{i}"}] for i in range(8)}
+    (tmp_path/"appointments.json").write_text(json.dumps(appointments, indent=4))
+    (tmp_path/"data.json").write_text("{}")
+    directory = str(tmp_path/"appointments")
+    shardAppointments(str(tmp_path/"appointments.json"), directory, 4)
+    return ShardedBackend(directory, str(tmp_path/"data.json")), ShardedBackend(directory, str(tmp_path/"data.json"))
+
+"""
+An ID is found in the right user's list, and a save moves the index along with it
+"""
+def testFindAfterSaves(tmp_path):
+    backend, other = makeShards(tmp_path)
+    assert backend.getAppointment("id3")[0] == "user3"
+    assert backend.getAppointment("missing") is None
+    appointments = backend.getAppointments("user3")
+    appointments.insert(0, {"Date": "2027-03-02", "Time": "09:00", "Reasons": ["rash"], "ID": "new"})
+    backend.setAppointments("user3", appointments)
+    assert backend.getAppointment("new") == ("user3", appointments[0])
+    assert backend.getAppointment("id3") == ("user3", appointments[1])
+    backend.addAppointments({"user9": [{"Date": "2027-03-03", "Time": "09:00", "Reasons": ["rash"], "ID": "added"}]})
+    assert backend.getAppointment("added")[0] == "user9"
+
+"""
+Saves by another program are seen: a deleted appointment is gone and a new one is found
+"""
+def testFindAfterAnotherProgramSaves(tmp_path):
+    backend, other = makeShards(tmp_path)
+    assert backend.getAppointment("id5")[0] == "user5"
+    other.setAppointments("user5", [])
+    other.setAppointments("user6", other.getAppointments("user6") + [{"Date": "2027-03-04", "Time": "09:00", "Reasons": ["rash"], "ID": "theirs"}])
+    assert backend.getAppointment("id5") is None
+    assert backend.getAppointment("theirs")[0] == "user6"
+    # Moved to another user by the other program
+    other.setAppointments("user7", [])
+    other.setAppointments("user1", other.getAppointments("user1") + [{"Date": "2027-03-01", "Time": "17:00", "Reasons": ["rash"], "ID": "id7"}])
+    assert backend.getAppointment("id7")[0] == "user1"
@@ -0,0 +1,177 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for what every storage backend has to do the same way: transactions, conflicts, appointment IDs and
+# changing a username
+
+import json
+import pytest
+from storage import (JsonBackend, MemoryBackend, SqliteBackend, ShardedBackend, AppointmentTransaction, ConflictError,
+                     retryTransaction, shardAppointments)
+
+BACKENDS = ["json", "journal", "sqlite", "sharded", "memory"]
+
+"""
+Make an appointment (With no ID unless one is given)
+"""
+def makeAppointment(day: int, time: str = "10:00", appointment_id: str = None):
+    appointment = {"Date": f"2027-03-{day:02d}", "Time": time, "Reasons": ["rash"]}
+    if appointment_id is not None:
+        appointment["ID"] = appointment_id
+    return appointment
+
+"""
+A user that can be saved by every backend
+"""
+def makeUser(username: str, number: int):
+    return {"First Name": "Ali", "Last Name": "Abid", "Email Address": f"{username}@example.com",
+            "Phone Number": f"41655500{number:02d}", "Address": "1 Main St", "Postal Code": "L6E 1W7",
+            "Username": username, "Password": "Password1$"}
+
+"""
+Make a backend of a kind in a temporary directory, starting with the given users and appointments. Gives back the
+backend and a function that opens another one on the same data (Like a second program; the memory backend only has
+itself)
+"""
+def makeBackend(tmp_path, kind: str, users: list = (), appointments: dict = None):
+    appointments = appointments or {}
+    data_file, appointments_file = str(tmp_path/"data.json"), str(tmp_path/"appointments.json")
+    (tmp_path/"data.json").write_text(json.dumps({"users": list(users)}, indent=4))
+    (tmp_path/"appointments.json").write_text(json.dumps(appointments, indent=4))
+    if kind=="memory":
+        backend = MemoryBackend(list(users), appointments)
+        return backend, lambda: backend
+    if kind=="sqlite":
+        new = lambda: SqliteBackend(str(tmp_path/"habs.db"))
+        first = new()
+        first.migrateFromJSON(data_file, appointments_file)
+        first.close()
+    elif kind=="sharded":
+        shardAppointments(appointments_file, str(tmp_path/"appointments"), 4)
+        new = lambda: ShardedBackend(str(tmp_path/"appointments"), data_file)
+    else:
+        new = lambda: JsonBackend(data_file, appointments_file, journal=kind=="journal")
+    def openBackend():
+        backend = new()
+        backend.migrateIds()
+        return backend
+    return openBackend(), openBackend
+
+"""
+Every backend kind, closed after the test
+"""
+@pytest.fixture(params=BACKENDS)
+def backends(request, tmp_path):
+    made = []
+    def make(users: list = (), appointments: dict = None):
+        backend, other = makeBackend(tmp_path, request.param, users, appointments)
+        made.append(backend)
+        def openOther():
+            made.append(other())
+            return made[-1]
+        return backend, openOther
+    yield make
+    for backend in made:
+        backend.close()
+
+"""
+A transaction's changes are only saved when it commits, all at once, and a rollback (Or an error in the with block)
+saves nothing
+"""
+def testTransactionCommitsEverythingAtOnce(backends):
+    backend, openOther = backends(appointments={"alice": [makeAppointment(1, appointment_id="a1")]})
+    with AppointmentTransaction("alice", backend) as transaction:
+        transaction.add(makeAppointment(2, appointment_id="a2"))
+        transaction.add(makeAppointment(3))
+        transaction.editById("a1", makeAppointment(4, "11:00"))
+        transaction.deleteById("a2")
+        assert [i["Date"] for i in backend.getAppointments("alice")] == ["2027-03-01"]
+    saved = openOther().getAppointments("alice")
+    assert [(i["Date"], i["Time"]) for i in saved] == [("2027-03-04", "11:00"), ("2027-03-03", "10:00")]
+    assert saved[0]["ID"] == "a1" and saved[1]["ID"] not in (None, "a1", "a2")
+
+    with pytest.raises(RuntimeError):
+        with AppointmentTransaction("alice", backend) as transaction:
+            transaction.deleteById("a1")
+            raise RuntimeError("stopped")
+    transaction = AppointmentTransaction("alice", backend)
+    transaction.add(makeAppointment(5))
+    transaction.rollback()
+    transaction.commit()
+    assert backend.getAppointments("alice") == saved
+    with pytest.raises(KeyError):
+        AppointmentTransaction("alice", backend).editById("missing", makeAppointment(6))
+
+"""
+A transaction that read the appointments before another program saved them can't commit over that save, and
+retryTransaction starts over with the newest appointments so both saves are kept
+"""
+def testConflictsAreRetried(backends):
+    backend, openOther = backends(appointments={"alice": [makeAppointment(1, appointment_id="a1")]})
+    other = openOther()
+    transaction = AppointmentTransaction("alice", backend)
+    transaction.add(makeAppointment(2, appointment_id="mine"))
+    other.setAppointments("alice", other.getAppointments("alice") + [makeAppointment(3, appointment_id="theirs")])
+    with pytest.raises(ConflictError):
+        transaction.commit()
+    assert [i["ID"] for i in backend.getAppointments("alice")] == ["a1", "theirs"]
+    with pytest.raises(ConflictError):
+        backend.setAppointments("alice", [], expected=[makeAppointment(1, appointment_id="a1")])
+
+    tries = []
+    def addMine(transaction):
+        tries.append(len(transaction.appointments))
+        # The other program saves while the first try is working
+        if len(tries)==1:
+            other.setAppointments("alice", other.getAppointments("alice") + [makeAppointment(4, appointment_id="again")])
+        transaction.add(makeAppointment(5, appointment_id="mine"))
+        return "done"
+    assert retryTransaction("alice", addMine, backend=backend) == "done"
+    assert tries == [2, 3]
+    assert [i["ID"] for i in openOther().getAppointments("alice")] == ["a1", "theirs", "again", "mine"]
+
+"""
+Appointments saved before there were IDs get one when the backend opens, every program sees the same IDs, and an
+appointment can be found, edited and deleted by its ID alone
+"""
+def testAppointmentIds(backends):
+    backend, openOther = backends(appointments={"alice": [makeAppointment(1), makeAppointment(2)], "bob": [makeAppointment(3)]})
+    saved = backend.getAppointments("alice")
+    ids = [i.get("ID") for i in saved]
+    assert None not in ids and len(set(ids)) == 2
+    other = openOther()
+    assert [i["ID"] for i in other.getAppointments("alice")] == ids
+    bob_id = backend.getAppointments("bob")[0]["ID"]
+    assert backend.getAppointment(bob_id) == ("bob", backend.getAppointments("bob")[0])
+    assert backend.getAppointment("missing") is None
+
+    backend.editAppointment(ids[1], makeAppointment(9, "15:00"))
+    assert other.getAppointment(ids[1]) == ("alice", dict(makeAppointment(9, "15:00"), ID=ids[1]))
+    other.deleteAppointment(ids[0])
+    assert backend.getAppointment(ids[0]) is None
+    assert [i["ID"] for i in backend.getAppointments("alice")] == [ids[1]]
+    with pytest.raises(KeyError):
+        backend.deleteAppointment(ids[0])
+
+"""
+Changing a username moves the user's appointments with them (Found by ID under the new name) and changes the
+password; the old username is free afterwards
+"""
+def testUpdateCredentialsMovesAppointments(backends):
+    backend, openOther = backends(users=[makeUser("alice", 1), makeUser("bob", 2)],
+                                  appointments={"alice": [makeAppointment(1, appointment_id="a1")], "bob": [makeAppointment(2, appointment_id="b1")]})
+    user = backend.updateCredentials("alice", "alicia", "Newpass1$")
+    assert user["Username"] == "alicia"
+    assert backend.getUser("alice") is None
+    assert backend.verifyUser("alicia", "Newpass1$")["Email Address"] == "alice@example.com"
+    assert backend.getAppointments("alice") in (None, [])
+    assert [i["ID"] for i in backend.getAppointments("alicia")] == ["a1"]
+    assert backend.getAppointment("a1")[0] == "alicia"
+    assert [i["ID"] for i in backend.getAppointments("bob")] == ["b1"]
+    other = openOther()
+    assert other.verifyUser("alicia", "Newpass1$") is not None
+    assert [i["ID"] for i in other.getAppointments("alicia")] == ["a1"]
+    # Only the password changing leaves the appointments where they are
+    backend.updateCredentials("bob", "bob", "Another1$")
+    assert backend.verifyUser("bob", "Another1$") is not None
+    assert [i["ID"] for i in backend.getAppointments("bob")] == ["b1"]
+    assert backend.updateCredentials("nobody", "somebody", "Password1$") is None
@@ -0,0 +1,71 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Tests for the checks in validation.py
+
+import pytest
+from datetime import date, timedelta
+from validation import isValidTime, isValidDate, validateAppointment, validateSignUp, validateSignUps
+
+"""
+Every real time of day is valid, with or without a leading zero on the hour
+"""
+@pytest.mark.parametrize("time", ["00:00", "9:05", "09:05", "12:30", "23:59"])
+def testRealTimesAreValid(time):
+    assert isValidTime(time)
+
+"""
+Times past the end of the day, or not written as H:MM or HH:MM, aren't valid
+"""
+@pytest.mark.parametrize("time", ["24:00", "25:30", "99:99", "12:60", "0000:99", "010:30", "1:5", "12:345", "", "12", "ab:cd", " 10:00"])
+def testTimesThatAreNotRealAreNotValid(time):
+    assert not isValidTime(time)
+
+"""
+An appointment with a time that isn't real is rejected, and only the time is marked wrong
+"""
+def testAppointmentWithATimeThatIsNotRealIsRejected():
+    result = validateAppointment({"Date": "2099-01-01", "Time": "25:30", "Reasons": ["rash"]})
+    assert not result.valid
+    assert list(result.errors)==["Time"]
+
+"""
+Dates in the future are valid, with or without leading zeros and spaces around them
+"""
+@pytest.mark.parametrize("day", ["2099-01-01", "2099-1-1", " 2099-12-31 "])
+def testFutureDatesAreValid(day):
+    assert isValidDate(day)
+
+"""
+Past dates, dates that don't exist and dates not written as YYYY-MM-DD aren't valid
+"""
+@pytest.mark.parametrize("day", ["2000-01-01", "2099-02-30", "2099-13-01", "99-01-01", "2099/01/01", ""])
+def testPastOrBrokenDatesAreNotValid(day):
+    assert not isValidDate(day)
+
+"""
+Dates are compared as whole dates, not the year, month and day one at a time
+"""
+def testDatesAreComparedAsWholeDates():
+    today = date.today()
+    assert isValidDate(today.isoformat())
+    # Yesterday and a month ago (Earlier this year, unless it's January), and earlier years with a later month and day
+    for past in [today-timedelta(days=1), today-timedelta(days=31), date(today.year-1, 12, 31), date(today.year-6, 11, 20)]:
+        assert not isValidDate(past.isoformat())
+    assert isValidDate((today+timedelta(days=1)).isoformat())
+
+"""
+Signing up with several wrong fields gives back every error at once
+"""
+def testSignUpGivesBackEveryErrorAtOnce():
+    result = validateSignUp({"First Name": "", "Last Name": "B", "Email Address": "a@b", "Phone Number": "123",
+                             "Postal Code": "L6E 1W7", "Password": "weak"})
+    assert list(result.errors)==["Email Address", "Phone Number", "Name", "Password"]
+
+"""
+Checking many sign ups at once gives the same errors as checking them one at a time
+"""
+def testBatchSignUpMatchesOneAtATime():
+    records = [{"First Name": "A", "Last Name": "B", "Email Address": "a@b.ca", "Phone Number": "4165550000", "Postal Code": "L6E1W7"},
+               {"First Name": "A", "Last Name": "B", "Email Address": "a@b.ca", "Phone Number": "4165550000", "Postal Code": "ZZZ999",
+                "Username": "-", "Password": "Password1$"}]
+    assert [i.errors for i in validateSignUps(records)]==[validateSignUp(i).errors for i in records]
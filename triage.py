@@ -0,0 +1,107 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# The symptom catalog from symptoms.json and working out how severe appointments are
+
+import json
+from array import array
+from assets import registerAsset, getAsset, asset_registry
+from optional import importNumpy
+
+# Batches this big are scored with NumPy, if it is installed
+NUMPY_BATCH = 1000
+
+"""
+Every symptom from symptoms.json, compiled into a flat symptom to severity table
+"""
+class SymptomCatalog:
+    """
+    Read the symptom file once (Or take what toCache gave back, from the asset cache)
+    """
+    def __init__(self, file = "symptoms.json", cached: dict = None):
+        self.file = file
+        if cached is not None:
+            self.categories = cached["categories"]
+            self.severity = cached["severity"]
+            return
+        with open(file, 'r') as f:
+            symptoms = json.load(f)
+        # Category name to the names of its symptoms, in the same order as the file (For the symptom page)
+        self.categories = {}
+        # Symptom name (lower case, the same way the symptom page saves them) to its severity
+        self.severity = {}
+        for category in symptoms:
+            self.categories[category] = []
+            for symptom in symptoms[category]:
+                for name, severity in symptom.items():
+                    self.categories[category].append(name)
+                    self.severity[name.lower()] = severity
+
+    """
+    Everything read from the file as plain JSON data, for the asset cache
+    """
+    def toCache(self):
+        return {"categories": self.categories, "severity": self.severity}
+
+    """
+    Get the severity of a single symptom (0 if it isn't in the catalog)
+    """
+    def severityOf(self, symptom: str):
+        return self.severity.get(symptom.lower(), 0)
+
+    """
+    Get the highest severity out of a list of reasons
+    """
+    def highestSeverity(self, reasons: list):
+        return max((self.severityOf(i) for i in reasons), default=0)
+
+    """
+    Score a whole batch of appointments in one go. Gives back a dictionary of arrays with one
+    entry per appointment: the highest severity ("max"), the sum of the severities ("total")
+    and the number of reasons ("count")
+    """
+    def scoreMany(self, appointments: list):
+        if len(appointments)>=NUMPY_BATCH and importNumpy() is not None:
+            return self.scoreManyNumpy(appointments)
+        highest = array('i')
+        total = array('i')
+        count = array('i')
+        for appointment in appointments:
+            severities = [self.severityOf(i) for i in appointment["Reasons"]]
+            highest.append(max(severities, default=0))
+            total.append(sum(severities))
+            count.append(len(severities))
+        return {"max": highest, "total": total, "count": count}
+
+    """
+    The NumPy version of scoreMany: every reason goes into one flat array and each appointment's
+    part of it is reduced at once
+    """
+    def scoreManyNumpy(self, appointments: list):
+        numpy = importNumpy()
+        count = numpy.fromiter((len(i["Reasons"]) for i in appointments), dtype=numpy.int64, count=len(appointments))
+        flat = numpy.fromiter((self.severity.get(r.lower(), 0) for i in appointments for r in i["Reasons"]),
+                              dtype=numpy.int64, count=int(count.sum()))
+        highest = numpy.zeros(len(appointments), dtype=numpy.int64)
+        total = numpy.zeros(len(appointments), dtype=numpy.int64)
+        # Appointments without reasons have nothing to reduce and stay at 0
+        has_reasons = count>0
+        if flat.size:
+            starts = (numpy.cumsum(count)-count)[has_reasons]
+            highest[has_reasons] = numpy.maximum.reduceat(flat, starts)
+            total[has_reasons] = numpy.add.reduceat(flat, starts)
+        return {"max": highest, "total": total, "count": count}
+
+# The symptom catalog is an asset, so it's loaded once and again only when symptoms.json changes
+registerAsset("symptoms.json", SymptomCatalog)
+
+"""
+Get the symptom catalog
+"""
+def getSymptomCatalog():
+    return getAsset("symptoms.json")
+
+"""
+Load symptoms.json again even if it didn't change
+"""
+def reloadSymptomCatalog():
+    return asset_registry.reload("symptoms.json")
@@ -0,0 +1,219 @@
+# Ali Abid, Felix Gao, Aryan Rathore
+# THE HABS program (Hospital Appointment Booking System)
+# Checks for everything a user can type in; doesn't use Qt so the command line can use them too
+
+import re
+from collections import namedtuple
+from datetime import datetime
+from postal import isValidPostalCode, validatePostalCodes
+from metrics import timed
+
+# Every pattern is compiled once, when the program starts, instead of on every check
+NAME_PATTERN = re.compile(r"\w")
+# Something, an @, then something with a dot in it
+EMAIL_PATTERN = re.compile(r"^.+@.+\..+$")
+NOT_DIGIT_PATTERN = re.compile(r"\D")
+USERNAME_PATTERN = re.compile(r"[^\\/?\"\'\:;\+\*\&\^\(\)\=\[\]\{\}\<\>\-]")
+PASSWORD_PATTERN = re.compile(r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$")
+DATE_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+TIME_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+"""
+Makes sure one part of a name isn't blank
+"""
+def isValidNamePart(name: str):
+    return NAME_PATTERN.search(name) is not None
+
+"""
+Makes sure that the given name is valid (Not blank)
+"""
+@timed
+def isValidName(first_name: str, last_name: str):
+    return isValidNamePart(first_name) and isValidNamePart(last_name)
+
+"""
+Makes sure that the email given is real (Matches certain requirements)
+"""
+@timed
+def isValidEmail(email: str):
+    return EMAIL_PATTERN.search(email) is not None
+
+"""
+Makes sure the phone number is valid (10 digits long)
+"""
+@timed
+def isValidPhoneNumber(phone: str):
+    # Get only the digits of the phone number
+    return len(NOT_DIGIT_PATTERN.sub("", phone))==10
+
+"""
+Makes sure the username doesn't only have special characters that can cause problems
+(Whether it's taken is checked by the storage backend)
+"""
+@timed
+def isValidUsername(username: str):
+    return USERNAME_PATTERN.search(username) is not None
+
+"""
+Verify the password - 8 characters long, 1 special character, 1 uppercase letter and 1 digit (Minimum)
+"""
+@timed
+def isValidPassword(password: str):
+    return PASSWORD_PATTERN.search(password) is not None
+
+"""
+Check and see if a given date is in the valid format (YYYY-MM-DD) and isn't in the past
+"""
+@timed
+def isValidDate(date: str):
+    # Check if formatted correctly
+    match = DATE_PATTERN.match(date.strip())
+    if match is None:
+        return False
+    # Check if the numbers are valid
+    try:
+        day = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3))).date()
+    except ValueError:
+        return False
+    # Check if date is in the past (Today is fine)
+    return day>=datetime.today().date()
+
+"""
+Check if the time is in the correct format (24h HH:MM) and is a real time (00:00 to 23:59)
+"""
+@timed
+def isValidTime(time: str):
+    match = TIME_PATTERN.match(time)
+    return match is not None and int(match.group(1))<24 and int(match.group(2))<60
+
+"""
+Check that at least 1 reason was picked
+"""
+def hasReasons(reasons):
+    return bool(reasons)
+
+"""
+Every error found in one form; errors maps the field (Or "Name" for both names) to its message, in the order the
+rules were checked
+"""
+class ValidationResult:
+    def __init__(self, errors: dict = None):
+        self.errors = errors or {}
+
+    """
+    Check if nothing was wrong
+    """
+    @property
+    def valid(self):
+        return not self.errors
+
+    """
+    Every error message in one line (Like the sign up page shows them)
+    """
+    def message(self):
+        return " ".join(self.errors.values())
+
+"""
+One check of a form: the fields it gets (In order), the function that checks them, the message if it fails, a
+function that checks a whole column of values at once (For imports) and whether the rule is skipped when the field
+isn't there
+"""
+Rule = namedtuple("Rule", ["fields", "check", "message", "batch", "optional"], defaults=[None, False])
+
+"""
+Checks a form with a list of rules, running each rule once
+"""
+class Validator:
+    def __init__(self, rules: dict):
+        # Error key to its rule
+        self.rules = rules
+
+    """
+    Check one form; gives back a ValidationResult with every error at once
+    """
+    def validate(self, data: dict):
+        errors = {}
+        for key, rule in self.rules.items():
+            if rule.optional and rule.fields[0] not in data:
+                continue
+            if not rule.check(*[data.get(field, "") for field in rule.fields]):
+                errors[key] = rule.message
+        return ValidationResult(errors)
+
+    """
+    Check many forms at once, one rule at a time over the whole list (So rules with a batch function look at the
+    whole column in one call); gives back a ValidationResult for each form in order
+    """
+    def validateMany(self, records: list):
+        errors = [{} for i in records]
+        for key, rule in self.rules.items():
+            if rule.optional:
+                numbers = [i for i in range(len(records)) if rule.fields[0] in records[i]]
+            else:
+                numbers = range(len(records))
+            columns = [[records[i].get(field, "") for i in numbers] for field in rule.fields]
+            if rule.batch is not None:
+                passed = rule.batch(*columns)
+            else:
+                passed = map(rule.check, *columns)
+            for i, ok in zip(numbers, passed):
+                if not ok:
+                    errors[i][key] = rule.message
+        return [ValidationResult(i) for i in errors]
+
+# The first sign up page, then the second (Username and Password are only checked once they're filled in)
+sign_up_validator = Validator({
+    "Email Address": Rule(["Email Address"], isValidEmail, "Email is not valid."),
+    "Phone Number": Rule(["Phone Number"], isValidPhoneNumber, "Phone number is not valid."),
+    "Postal Code": Rule(["Postal Code"], isValidPostalCode, "Postal code is not valid.", validatePostalCodes),
+    "Name": Rule(["First Name", "Last Name"], isValidName, "Name cannot be blank or have numbers."),
+    "Username": Rule(["Username"], isValidUsername, "Username is not valid.", optional=True),
+    "Password": Rule(["Password"], isValidPassword, "Password is not valid.", optional=True),
+})
+
+# The booking and edit pages
+appointment_validator = Validator({
+    "Date": Rule(["Date"], isValidDate, "Date is not valid (YYYY-MM-DD)."),
+    "Time": Rule(["Time"], isValidTime, "Time is not valid (HH:MM)."),
+    "Reasons": Rule(["Reasons"], hasReasons, "At least 1 reason is needed."),
+})
+
+# The check for each field that can be typed in on its own, so a page can check it while the user types
+FIELD_CHECKS = {
+    "First Name": isValidNamePart,
+    "Last Name": isValidNamePart,
+    "Email Address": isValidEmail,
+    "Phone Number": isValidPhoneNumber,
+    "Postal Code": isValidPostalCode,
+    "Username": isValidUsername,
+    "Password": isValidPassword,
+    "Date": isValidDate,
+    "Time": isValidTime,
+}
+
+"""
+Check one field on its own (See FIELD_CHECKS)
+"""
+def isValidField(field: str, text: str):
+    return FIELD_CHECKS[field](text)
+
+"""
+Check every field of the sign up pages; gives back a ValidationResult with the error message for each field that is wrong
+"""
+@timed
+def validateSignUp(data: dict):
+    return sign_up_validator.validate(data)
+
+"""
+Check the sign up details of many users at once (For imports); gives back a ValidationResult for each one in order
+"""
+@timed
+def validateSignUps(records: list):
+    return sign_up_validator.validateMany(records)
+
+"""
+Check an appointment's date, time and reasons; gives back a ValidationResult
+"""
+@timed
+def validateAppointment(data: dict):
+    return appointment_validator.validate(data)